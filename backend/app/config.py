@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from functools import lru_cache
@@ -33,12 +34,89 @@ class Settings(BaseSettings):
     EMAIL_PASSWORD: str | None = os.getenv('EMAIL_PASSWORD')
     # Optional: Email sender name
     EMAILS_FROM_NAME: str | None = "NBP Currency Alert"
+    SMTP_USE_TLS: bool = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true' # STARTTLS after connecting
+    # Email delivery queue (alerts are enqueued and sent by background workers)
+    EMAIL_WORKERS: int = int(os.getenv('EMAIL_WORKERS', 2))
+    EMAIL_QUEUE_MAX_SIZE: int = int(os.getenv('EMAIL_QUEUE_MAX_SIZE', 10000))
+    EMAIL_MAX_RETRIES: int = int(os.getenv('EMAIL_MAX_RETRIES', 3))
+    EMAIL_RETRY_BACKOFF: float = float(os.getenv('EMAIL_RETRY_BACKOFF', 2.0)) # Seconds, doubled per attempt
+    EMAIL_IDLE_TIMEOUT: float = float(os.getenv('EMAIL_IDLE_TIMEOUT', 60)) # Close idle SMTP connections after this many seconds
 
     # NBP API Base URL
     NBP_API_BASE_URL: str = "http://api.nbp.pl/api"
+    # Maximum number of NBP requests in flight at once during concurrent fetches
+    NBP_MAX_CONCURRENCY: int = int(os.getenv('NBP_MAX_CONCURRENCY', 8))
+    # Above this many currencies per range, whole table A is fetched instead of one series per currency
+    NBP_TABLE_MODE_THRESHOLD: int = int(os.getenv('NBP_TABLE_MODE_THRESHOLD', 3))
+    # In-process NBP response cache: memory bound and table A publication time (Warsaw, business days)
+    NBP_CACHE_MAX_BYTES: int = int(os.getenv('NBP_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    NBP_PUBLICATION_TIME: str = os.getenv('NBP_PUBLICATION_TIME', '12:15')
+    NBP_CACHE_PENDING_TTL: int = int(os.getenv('NBP_CACHE_PENDING_TTL', 60)) # Seconds; responses still missing an overdue table
+    # One-off days without a table on top of the statutory holidays (comma-separated ISO dates)
+    NBP_EXTRA_HOLIDAYS: str = os.getenv('NBP_EXTRA_HOLIDAYS', '2018-11-12')
+    # Cross-rate tables (one per table A effective date) kept in memory for conversions
+    CROSS_RATE_CACHE_SIZE: int = int(os.getenv('CROSS_RATE_CACHE_SIZE', 256))
+    # Host-wide rate cache shared by all workers through memory-mapped files (POSIX only)
+    SHARED_CACHE_ENABLED: bool = os.getenv('SHARED_CACHE_ENABLED', 'true').lower() == 'true'
+    SHARED_CACHE_DIR: str = os.getenv('SHARED_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'nbp-rate-cache'))
+    # HTTP Cache-Control max-age (seconds) for rate data: ranges ending before today are final;
+    # ranges that include today are additionally capped at the next table publication
+    HTTP_CACHE_HISTORICAL_MAX_AGE: int = int(os.getenv('HTTP_CACHE_HISTORICAL_MAX_AGE', 7 * 24 * 3600))
+    HTTP_CACHE_RECENT_MAX_AGE: int = int(os.getenv('HTTP_CACHE_RECENT_MAX_AGE', 300))
+    # Response compression (gzip always; br / zstd when the brotli / zstandard packages are installed)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv('COMPRESSION_MIN_SIZE', 1024)) # Bytes; smaller bodies are sent as is
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6)) # 1-9
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 5)) # 0-11
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3)) # 1-22
+    COMPRESSION_FLUSH_BYTES: int = int(os.getenv('COMPRESSION_FLUSH_BYTES', 64 * 1024)) # Input bytes between forced flushes of a compressed stream
+    # Server-side cache of compressed exports of fully historical ranges
+    EXPORT_CACHE_MAX_BYTES: int = int(os.getenv('EXPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    # Columnar exports (Parquet / Arrow IPC need the optional pyarrow package)
+    EXPORT_ROW_GROUP_SIZE: int = int(os.getenv('EXPORT_ROW_GROUP_SIZE', 65536)) # Rows per Parquet row group / Arrow record batch
+    EXPORT_PARQUET_COMPRESSION: str = os.getenv('EXPORT_PARQUET_COMPRESSION', 'zstd') # Codec inside the file: zstd, snappy, gzip, none
+    # Maximum number of rows accepted by one bulk conversion request
+    CONVERSION_MAX_ROWS: int = int(os.getenv('CONVERSION_MAX_ROWS', 500000))
+
+    # Proactive ingestion into the local rate store (jobs on the notification scheduler)
+    INGEST_ENABLED: bool = os.getenv('INGEST_ENABLED', 'true').lower() == 'true'
+    INGEST_DELAY_MINUTES: int = int(os.getenv('INGEST_DELAY_MINUTES', 5)) # Daily job runs this long after NBP_PUBLICATION_TIME
+    INGEST_RETRY_MINUTES: int = int(os.getenv('INGEST_RETRY_MINUTES', 15)) # Retry interval while today's table is not out yet
+    INGEST_MAX_RETRIES: int = int(os.getenv('INGEST_MAX_RETRIES', 12))
+    INGEST_LOOKBACK_DAYS: int = int(os.getenv('INGEST_LOOKBACK_DAYS', 7)) # Days re-fetched by the daily job (covers missed runs)
+    INGEST_BACKFILL_ENABLED: bool = os.getenv('INGEST_BACKFILL_ENABLED', 'true').lower() == 'true'
+    INGEST_BACKFILL_START: str = os.getenv('INGEST_BACKFILL_START', '2002-01-02') # Oldest date backfilled (table A starts 2002-01-02)
+    INGEST_BACKFILL_WORKERS: int = int(os.getenv('INGEST_BACKFILL_WORKERS', 4)) # Date windows fetched in parallel
+    INGEST_RATE_LIMIT: float = float(os.getenv('INGEST_RATE_LIMIT', 5.0)) # Max NBP requests per second issued by ingestion jobs
+
+    # Shared HTTP client pool (NBP and SOAP upstream traffic)
+    HTTP_POOL_SIZE: int = int(os.getenv('HTTP_POOL_SIZE', 100)) # Max open connections overall
+    HTTP_PER_HOST_LIMIT: int = int(os.getenv('HTTP_PER_HOST_LIMIT', 20)) # Max open connections per upstream host
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30)) # Seconds an idle connection is kept
+    HTTP2_ENABLED: bool = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true' # Used only if the 'h2' package is installed
+
+    # Data imports: uploads are spooled to a temp file (in memory up to IMPORT_SPOOL_MAX_MEMORY)
+    IMPORT_MAX_BYTES: int = int(os.getenv('IMPORT_MAX_BYTES', 200 * 1024 * 1024))
+    IMPORT_SPOOL_MAX_MEMORY: int = int(os.getenv('IMPORT_SPOOL_MAX_MEMORY', 8 * 1024 * 1024))
+
+    # Worker threads for CPU-bound serialization / parsing / analytics started from async endpoints
+    CPU_POOL_WORKERS: int = int(os.getenv('CPU_POOL_WORKERS', min(4, os.cpu_count() or 1)))
+
+    # Scheduled jobs and the standalone SOAP server run in one elected process only
+    # (Postgres advisory lock), so several uvicorn workers / nodes do not duplicate them
+    LEADER_ELECTION_ENABLED: bool = os.getenv('LEADER_ELECTION_ENABLED', 'true').lower() == 'true'
+    LEADER_LOCK_ID: int = int(os.getenv('LEADER_LOCK_ID', 7_340_113)) # Advisory lock key, unique per deployment sharing a database
+    LEADER_POLL_INTERVAL: float = float(os.getenv('LEADER_POLL_INTERVAL', 5)) # Seconds between takeover attempts / leader health checks
 
     SOAP_SERVICE_HOST: str = os.getenv('SOAP_SERVICE_HOST', '0.0.0.0')
     SOAP_SERVICE_PORT: int = int(os.getenv('SOAP_SERVICE_PORT', 8001))
+    # SOAP requests handled in parallel (worker threads), both on the standalone port and at /soap
+    SOAP_WORKERS: int = int(os.getenv('SOAP_WORKERS', 32))
+    # Serve SOAP on its own port (SOAP_SERVICE_PORT) in addition to the /soap mount of the main app
+    SOAP_STANDALONE_ENABLED: bool = os.getenv('SOAP_STANDALONE_ENABLED', 'true').lower() == 'true'
+    # Maximum number of currency / date-range items in one get_exchange_rates_batch call
+    SOAP_BATCH_MAX_ITEMS: int = int(os.getenv('SOAP_BATCH_MAX_ITEMS', 200))
+    # Cache-Control max-age of the served WSDL, and the WSDL cache lifetime of soap_client
+    SOAP_WSDL_MAX_AGE: int = int(os.getenv('SOAP_WSDL_MAX_AGE', 86400))
 
     # Available Currencies (can be moved to a constants file)
     AVAILABLE_CURRENCIES: List[Dict[str, str]] = [
@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import date, timedelta
+from typing import List, Dict, Any, Tuple, Iterator
 from . import models, schemas
+from .services.rate_series import RateSeries, GOLD_SERIES
 
 # --- Notification CRUD ---
 def create_notification(db: Session, notification: schemas.NotificationCreate) -> models.Notification:
@@ -19,6 +23,18 @@ def get_notifications(db: Session, skip: int = 0, limit: int = 100) -> list[mode
     """Retrieves all notification records from the database."""
     return db.query(models.Notification).offset(skip).limit(limit).all()
 
+def iter_notifications(db: Session, batch_size: int = 1000) -> Iterator[models.Notification]:
+    """Yields every notification record, paging by id so no rows are silently dropped."""
+    last_id = 0
+    while True:
+        batch = db.query(models.Notification).filter(
+            models.Notification.id > last_id
+        ).order_by(models.Notification.id).limit(batch_size).all()
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1].id
+
 def get_notification_by_email_and_details(db: Session, notification: schemas.NotificationCreate) -> models.Notification | None:
     """Checks if an identical notification already exists."""
     return db.query(models.Notification).filter(
@@ -29,4 +45,96 @@ def get_notification_by_email_and_details(db: Session, notification: schemas.Not
     ).first()
 
 # Add functions like get_notification(db: Session, notification_id: int)
-# and delete_notification(db: Session, notification_id: int) if needed
\ No newline at end of file
+# and delete_notification(db: Session, notification_id: int) if needed
+
+# --- Rate Store CRUD ---
+# Rows go in and out as columnar RateSeries; Postgres caps bind parameters per
+# statement, so upserts are split into batches.
+UPSERT_BATCH_SIZE = 5000
+
+def get_exchange_rates(db: Session, currency: str, start_date: date, end_date: date) -> RateSeries:
+    """Retrieves stored rates for a currency within a date range, ordered by date."""
+    currency = currency.upper()
+    rows = db.query(models.ExchangeRate.effective_date, models.ExchangeRate.mid).filter(
+        models.ExchangeRate.currency == currency,
+        models.ExchangeRate.effective_date >= start_date,
+        models.ExchangeRate.effective_date <= end_date
+    ).order_by(models.ExchangeRate.effective_date).all()
+    return RateSeries.from_pairs(currency, rows)
+
+def upsert_exchange_rates(db: Session, currency: str, series: RateSeries) -> None:
+    """Inserts or updates the points of a currency series."""
+    currency = currency.upper()
+    rows = [
+        {"currency": currency, "effective_date": d, "mid": v}
+        for d, v in zip(series.dates.tolist(), series.values.tolist())
+    ]
+    for lo in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(models.ExchangeRate).values(rows[lo:lo + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.ExchangeRate.currency, models.ExchangeRate.effective_date],
+            set_={"mid": stmt.excluded.mid}
+        )
+        db.execute(stmt)
+    db.commit()
+
+def get_gold_prices(db: Session, start_date: date, end_date: date) -> RateSeries:
+    """Retrieves stored gold prices within a date range, ordered by date."""
+    rows = db.query(models.GoldPrice.effective_date, models.GoldPrice.price).filter(
+        models.GoldPrice.effective_date >= start_date,
+        models.GoldPrice.effective_date <= end_date
+    ).order_by(models.GoldPrice.effective_date).all()
+    return RateSeries.from_pairs(GOLD_SERIES, rows)
+
+def upsert_gold_prices(db: Session, series: RateSeries) -> None:
+    """Inserts or updates the points of the gold price series."""
+    rows = [
+        {"effective_date": d, "price": v}
+        for d, v in zip(series.dates.tolist(), series.values.tolist())
+    ]
+    for lo in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(models.GoldPrice).values(rows[lo:lo + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.GoldPrice.effective_date],
+            set_={"price": stmt.excluded.price}
+        )
+        db.execute(stmt)
+    db.commit()
+
+def get_coverage(db: Session, series: str, start_date: date, end_date: date) -> list[Tuple[date, date]]:
+    """Returns the fetched date ranges of a series that overlap [start_date, end_date], ordered by start."""
+    rows = db.query(models.RateCoverage).filter(
+        models.RateCoverage.series == series,
+        models.RateCoverage.start_date <= end_date,
+        models.RateCoverage.end_date >= start_date
+    ).order_by(models.RateCoverage.start_date).all()
+    return [(row.start_date, row.end_date) for row in rows]
+
+def add_coverage(db: Session, series: str, start_date: date, end_date: date) -> None:
+    """
+    Records [start_date, end_date] as fetched for a series, merging it with
+    any overlapping or adjacent ranges so the table stays small.
+    """
+    overlapping = db.query(models.RateCoverage).filter(
+        models.RateCoverage.series == series,
+        models.RateCoverage.start_date <= end_date + timedelta(days=1),
+        models.RateCoverage.end_date >= start_date - timedelta(days=1)
+    ).all()
+    for row in overlapping:
+        start_date = min(start_date, row.start_date)
+        end_date = max(end_date, row.end_date)
+        db.delete(row)
+    db.add(models.RateCoverage(series=series, start_date=start_date, end_date=end_date))
+    db.commit()
+
+# --- Ingestion state CRUD ---
+def get_ingestion_states(db: Session) -> list[models.IngestionState]:
+    return db.query(models.IngestionState).order_by(models.IngestionState.job).all()
+
+def save_ingestion_state(db: Session, job: str, **fields: Any) -> None:
+    """Inserts or updates the state row of an ingestion job with the given columns."""
+    values = {"job": job, **fields}
+    stmt = pg_insert(models.IngestionState).values(values)
+    stmt = stmt.on_conflict_do_update(index_elements=[models.IngestionState.job], set_=fields)
+    db.execute(stmt)
+    db.commit()
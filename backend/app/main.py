@@ -1,58 +1,104 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Response, status, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status, File, UploadFile
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.wsgi import WSGIMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from contextlib import asynccontextmanager
 from datetime import date, timedelta
-from typing import List, Dict, Literal, Union
+from typing import Callable, List, Dict, Iterator, Literal, Union
+import asyncio
+import itertools
 import logging
 import threading
-from wsgiref.simple_server import make_server
+import time
 import uvicorn
-from .services.soap.soap_service import wsgi_app, run_server
+from .services.soap.soap_service import asgi_app as soap_asgi_app, create_server as create_soap_server
 from . import crud, models, schemas, database
 from .config import settings
-from .services import nbp_api, notification_service
+from .services import nbp_api, notification_service, rate_store, http_client, export_service, import_service, analytics, cross_rates, bulk_conversion, worker_pool, http_cache, compression, columnar, ingestion
+from .services.email_queue import email_queue
+from .services.leader_election import leader_elector
+from .services.nbp_cache import nbp_now
+from .services.rate_series import RateFrame, GOLD_SERIES
+from .services.shared_cache import shared_cache
 from . import auth
-from lxml import etree
-import json
 import yaml
-import httpx
+import ijson
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_soap_server = None
+SOAP_BIND_ATTEMPTS = 10
+
 def start_soap_server():
-    """Start SOAP server in a separate thread"""
+    """
+    Start the standalone SOAP server (SOAP_SERVICE_PORT) in a separate thread.
+    Set SOAP_STANDALONE_ENABLED=false to skip it and serve SOAP only at /soap.
+    """
+    global _soap_server
+    if not settings.SOAP_STANDALONE_ENABLED:
+        logger.info("Standalone SOAP server disabled; SOAP is served at /soap only")
+        return
     try:
-        soap_thread = threading.Thread(
-            target=run_server,
-            args=(settings.SOAP_SERVICE_HOST, settings.SOAP_SERVICE_PORT),
-            daemon=True
-        )
+        for attempt in range(SOAP_BIND_ATTEMPTS):
+            try:
+                _soap_server = create_soap_server(settings.SOAP_SERVICE_HOST, settings.SOAP_SERVICE_PORT)
+                break
+            except OSError as e:
+                # On failover the previous leader may still be releasing the port
+                if attempt + 1 == SOAP_BIND_ATTEMPTS:
+                    raise
+                logger.warning(f"SOAP port {settings.SOAP_SERVICE_PORT} busy ({e}); retrying")
+                time.sleep(1)
+        soap_thread = threading.Thread(target=_soap_server.serve_forever, daemon=True)
         soap_thread.start()
         logger.info(f"SOAP server started in background thread on port {settings.SOAP_SERVICE_PORT}")
     except Exception as e:
         logger.error(f"Failed to start SOAP server: {e}")
         raise
 
+def stop_soap_server():
+    """Stops the standalone SOAP server and frees its port."""
+    global _soap_server
+    if _soap_server is not None:
+        _soap_server.shutdown()
+        _soap_server.server_close()
+        _soap_server = None
+        logger.info("SOAP server stopped")
+
+def start_leader_services():
+    """Singleton work, run only by the process holding the leader lock."""
+    notification_service.start_scheduler(database.get_db)
+    ingestion.start(notification_service.scheduler)
+    start_soap_server()
+
+def stop_leader_services():
+    stop_soap_server()
+    ingestion.stop()
+    notification_service.stop_scheduler()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown events"""
     logger.info("Starting application...")
     try:
         init_db()
-        notification_service.start_scheduler(database.get_db)
-        start_soap_server()
+        await http_client.startup()
+        email_queue.start()
+        # Scheduled jobs and the standalone SOAP server run in the elected worker only
+        leader_elector.start(on_elected=start_leader_services, on_demoted=stop_leader_services)
         yield
     except Exception as e:
         logger.error(f"Error during startup: {e}")
         raise
     finally:
         logger.info("Shutting down...")
-        notification_service.stop_scheduler()
+        leader_elector.stop()
+        email_queue.stop()
+        await http_client.shutdown()
+        worker_pool.shutdown()
 
 # Initialize FastAPI app with CORS and SOAP support
 app = FastAPI(
@@ -70,9 +116,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount SOAP service
-soap_app = WSGIMiddleware(wsgi_app)
-app.mount("/soap", soap_app)
+# Mount SOAP service (native ASGI, handlers run on a bounded worker pool)
+app.mount("/soap", soap_asgi_app)
 logger.info("SOAP service mounted at /soap endpoint")
 
 # --- Database Initialization ---
@@ -90,16 +135,84 @@ def init_db():
 def read_root():
     return {"message": f"Welcome to the {settings.PROJECT_NAME}"}
 
+CURRENCIES_ETAG = http_cache.static_etag(settings.AVAILABLE_CURRENCIES)
+CURRENCIES_MAX_AGE = 3600 # Configuration list: changes only on deploy
+
 @app.get(f"{settings.API_V1_STR}/currencies", response_model=List[Dict[str, str]], tags=["Data"])
-def get_available_currencies():
-    return settings.AVAILABLE_CURRENCIES
+def get_available_currencies(request: Request):
+    headers = http_cache.validator_headers(CURRENCIES_ETAG, None, f"public, max-age={CURRENCIES_MAX_AGE}")
+    if http_cache.is_not_modified(request, CURRENCIES_ETAG, None):
+        return http_cache.not_modified(headers)
+    return JSONResponse(settings.AVAILABLE_CURRENCIES, headers=headers)
+
+async def _load_rate_frame(data_type: str, start_date: date, end_date: date, currencies: str | None) -> RateFrame:
+    """
+    Validates the request and loads the requested series as a columnar RateFrame.
+    Dates already in the local rate store are served from the database; only
+    missing ranges are fetched from the NBP API.
+    """
+    if data_type == "currency":
+        if not currencies:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Currencies query parameter is required for data_type 'currency'")
+        currency_list = [c.strip().upper() for c in currencies.split(',') if c.strip()]
+        if not currency_list:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No valid currencies provided in the 'currencies' parameter.")
+
+        supported_currencies = []
+        for currency_code in currency_list:
+            if not any(c['value'] == currency_code.lower() for c in settings.AVAILABLE_CURRENCIES):
+                logger.warning(f"Requested currency '{currency_code}' not in configured available list.")
+                # raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Currency code '{currency_code}' is not supported.")
+                continue # Ignore unsupported currencies
+            supported_currencies.append(currency_code)
+
+        # All currencies (and all their missing chunks) are fetched concurrently
+        frame = await rate_store.get_series_async(supported_currencies, start_date, end_date) if supported_currencies else RateFrame()
+        for currency_code in frame.codes():
+            if not len(frame[currency_code]):
+                logger.warning(f"No data returned from NBP for {currency_code} between {start_date} and {end_date}")
+
+    elif data_type == "gold":
+        frame = await rate_store.get_series_async([GOLD_SERIES], start_date, end_date)
+        if not len(frame):
+            logger.warning(f"No gold data returned from NBP between {start_date} and {end_date}")
+
+    else: # Invalid data_type
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid data_type.")
+
+    if not len(frame):
+        logger.info(f"No data found for request: type={data_type}, start={start_date}, end={end_date}, curr={currencies}")
+    return frame
+
+def _frame_validators(request: Request, frame: RateFrame, end_date: date, *parts, vary_encoding: bool = False) -> tuple[Dict[str, str], Response | None]:
+    """
+    ETag / Last-Modified / Cache-Control headers for a response built from frame,
+    and a ready 304 response when the client's copy is still current. With
+    vary_encoding, both carry Vary: Accept-Encoding, as a 304 must repeat the
+    Vary of the 200 it stands for.
+    """
+    etag = http_cache.frame_etag(frame, *parts)
+    last_modified = http_cache.frame_last_modified(frame)
+    headers = http_cache.validator_headers(etag, last_modified, http_cache.cache_control_for_range(end_date))
+    if vary_encoding:
+        headers['Vary'] = 'Accept-Encoding'
+    if http_cache.is_not_modified(request, etag, last_modified):
+        return headers, http_cache.not_modified(headers)
+    return headers, None
+
+def _iter_frame_records(data_type: str, frame: RateFrame) -> Iterator[Dict]:
+    """Row dicts for the API boundary, ordered by date: {'Date', 'Rate', 'Currency'} or {'Date', 'Price'}."""
+    if data_type == "currency":
+        return frame.iter_records("Rate", "Currency")
+    return frame.iter_records("Price") # Match 'Price' key from original code
 
 @app.get(
     f"{settings.API_V1_STR}/data/{{data_type}}",
     response_model=List[Union[schemas.CurrencyExportData, schemas.GoldExportData]],
     tags=["Data"]
 )
-def get_historical_data(
+async def get_historical_data(
+    request: Request,
     data_type: Literal["currency", "gold"],
     start_date: date = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: date = Query(..., description="End date in YYYY-MM-DD format"),
@@ -107,49 +220,27 @@ def get_historical_data(
 ):
     """
     Fetches historical exchange rates for selected currencies or gold prices
-    within a specified date range from the NBP API.
+    within a specified date range. Dates already in the local rate store are
+    served from the database; only missing ranges are fetched from the NBP API.
 
     - **data_type**: Specify 'currency' or 'gold'.
     - **start_date**: The beginning of the date range.
     - **end_date**: The end of the date range.
     - **currencies**: Required only for `data_type=currency`. Provide a comma-separated string of 3-letter currency codes (e.g., "EUR,USD,CHF").
     """
-    all_formatted_data = []
     try: 
-        if data_type == "currency":
-            if not currencies:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Currencies query parameter is required for data_type 'currency'")
-            currency_list = [c.strip().upper() for c in currencies.split(',') if c.strip()]
-            if not currency_list:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No valid currencies provided in the 'currencies' parameter.")
-
-            for currency_code in currency_list:
-                if not any(c['value'] == currency_code.lower() for c in settings.AVAILABLE_CURRENCIES):
-                    logger.warning(f"Requested currency '{currency_code}' not in configured available list.")
-                    # raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Currency code '{currency_code}' is not supported.")
-                    continue # Ignore unsupported currencies
-
-                rates = nbp_api.get_currency_data_for_range(currency_code, start_date, end_date)
-                if rates:
-                    all_formatted_data.extend(nbp_api.format_currency_data(rates, currency_code))
-                else:
-                    logger.warning(f"No data returned from NBP for {currency_code} between {start_date} and {end_date}")
-
-        elif data_type == "gold":
-            prices = nbp_api.get_gold_data_for_range(start_date, end_date)
-            if prices:
-                all_formatted_data.extend(nbp_api.format_gold_data(prices))
-            else:
-                logger.warning(f"No gold data returned from NBP between {start_date} and {end_date}")
-
-        else: # Invalid data_type
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid data_type.")
-
-        if not all_formatted_data:
-            logger.info(f"No data found for request: type={data_type}, start={start_date}, end={end_date}, curr={currencies}")
-
-        all_formatted_data.sort(key=lambda x: x['Date'])
-        return all_formatted_data
+        frame = await _load_rate_frame(data_type, start_date, end_date, currencies)
+        headers, not_modified = _frame_validators(request, frame, end_date, "data", data_type, vary_encoding=True)
+        if not_modified:
+            return not_modified
+        # Records are built, serialized and compressed on the CPU pool, not on the event loop
+        content = await worker_pool.run(lambda: worker_pool.dumps(list(_iter_frame_records(data_type, frame))))
+        encoding = compression.negotiate(request.headers.get("accept-encoding"))
+        if encoding and len(content) >= settings.COMPRESSION_MIN_SIZE:
+            content = await worker_pool.run(compression.compress_bytes, content, encoding)
+            headers['Content-Encoding'] = encoding
+            headers['ETag'] = http_cache.encoded_etag(headers['ETag'], encoding)
+        return Response(content=content, media_type="application/json", headers=headers)
 
     except HTTPException as http_exc:
          raise http_exc # Forward HTTP exceptions as is
@@ -217,6 +308,20 @@ def add_notification_alert(
             detail=str(e)
         )
 
+async def _import_upload(file: UploadFile, parser) -> List[Dict]:
+    """
+    Spools an upload to a size-limited temp file and runs a streaming parser on it
+    in a worker thread, so large imports neither blow up memory nor block the event loop.
+    """
+    try:
+        spooled = await import_service.spool_upload(file)
+    except import_service.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        return await worker_pool.run(parser, spooled)
+    finally:
+        spooled.close()
+
 @app.post(f"{settings.API_V1_STR}/import/xml", tags=["Import"])
 async def import_data_xml(file: UploadFile = File(...)):
     """
@@ -230,121 +335,95 @@ async def import_data_xml(file: UploadFile = File(...)):
         </CurrencyRate>
         ...
     </Data>
+    The file is parsed incrementally (iterparse), clearing processed elements.
     """
     try:
-        content = await file.read()
-        # Parse XML using DOM
-        root = etree.fromstring(content)
-        
-        # Initialize data list
-        data = []
-        
-        # Check if this is our exported format
-        if root.tag == 'Data':
-            # Parse CurrencyRate elements
-            for record in root.findall("CurrencyRate"):
-                data.append({
-                    "Date": record.find("Date").text,
-                    "Value": float(record.find("Rate").text),
-                    "Currency": record.find("Currency").text
-                })
-        else:
-            # Fallback for simple format
-            for record in root.findall("Record"):
-                data.append({
-                    "Date": record.find("Date").text,
-                    "Value": float(record.find("Value").text)
-                })
-
-        # Sort data by date
-        sorted_data = sorted(data, key=lambda x: x["Date"])
-        
-        return {
+        sorted_data = await _import_upload(file, import_service.parse_xml)
+        return await worker_pool.json_response({
             "message": "Data imported successfully", 
             "data": sorted_data
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error importing XML: {e}")
         raise HTTPException(status_code=400, detail=f"Invalid XML file: {str(e)}")
 
 @app.post(f"{settings.API_V1_STR}/import/json", tags=["Import"])
 async def import_data_json(file: UploadFile = File(...)):
+    """Imports data from an uploaded JSON array (or {"data": [...]}), parsed incrementally."""
     try:
-        content = await file.read()
-        data = json.loads(content.decode('utf-8'))
-        
-        formatted_data = []
-        records = data.get('data', data) if isinstance(data, dict) else data
-        
-        if not isinstance(records, list):
-            raise HTTPException(status_code=400, detail="Invalid JSON format - expected array of records")
-            
-        for record in records:
-            formatted_data.append({
-                "Date": record.get("Date") or record.get("date"),
-                "Value": float(record.get("Rate") or record.get("rate") or record.get("Value") or record.get("value")),
-                "Currency": record.get("Currency") or record.get("currency", "Unknown")
-            })
-            
-        return {
+        sorted_data = await _import_upload(file, import_service.parse_json)
+        return await worker_pool.json_response({
             "message": "Data imported successfully",
-            "data": sorted(formatted_data, key=lambda x: x["Date"])
-        }
-    except json.JSONDecodeError as e:
+            "data": sorted_data
+        })
+    except HTTPException:
+        raise
+    except (ijson.JSONError, ValueError) as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON file: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error importing JSON: {str(e)}")
 
 @app.post(f"{settings.API_V1_STR}/import/yaml", tags=["Import"])
 async def import_data_yaml(file: UploadFile = File(...)):
-    """Imports data from an uploaded YAML file."""
+    """Imports data from an uploaded YAML file, streamed through parser events."""
     try:
-        content = await file.read()
-        data = yaml.safe_load(content)
-        
-        formatted_data = []
-        
-        # Handle nested data structure
-        records = data.get('Data', data) if isinstance(data, dict) else data
-        
-        if not isinstance(records, list):
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid YAML format - expected array of records"
-            )
-            
-        for record in records:
-            if not isinstance(record, dict):
-                continue
-                
-            # Ensure currency information is preserved
-            formatted_record = {
-                "Date": record.get("Date"),
-                "Value": float(record.get("Rate", 0) or record.get("Value", 0)),
-                "Currency": record.get("Currency", "Unknown").upper()
-            }
-            
-            if not formatted_record["Date"] or formatted_record["Value"] == 0:
-                continue
-                
-            formatted_data.append(formatted_record)
-            
+        formatted_data = await _import_upload(file, import_service.parse_yaml)
         if not formatted_data:
             raise HTTPException(
                 status_code=400,
                 detail="No valid records found in YAML file"
             )
             
-        return {
+        return await worker_pool.json_response({
             "message": "Data imported successfully",
-            "data": sorted(formatted_data, key=lambda x: x["Date"])
-        }
+            "data": formatted_data
+        })
+    except HTTPException:
+        raise
     except yaml.YAMLError as e:
         raise HTTPException(status_code=400, detail=f"Invalid YAML file: {str(e)}")
     except Exception as e:
         logger.error(f"Error importing YAML: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error importing YAML: {str(e)}")
 
+async def _import_columnar(file: UploadFile, parser, label: str):
+    """Shared body of the Parquet / Arrow / CSV imports; both layouts are accepted."""
+    try:
+        records = await _import_upload(file, parser)
+        if not records:
+            raise HTTPException(status_code=400, detail=f"No valid records found in {label} file")
+        return await worker_pool.json_response({
+            "message": "Data imported successfully",
+            "data": records
+        })
+    except HTTPException:
+        raise
+    except columnar.ColumnarUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing {label}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid {label} file: {str(e)}")
+
+@app.post(f"{settings.API_V1_STR}/import/parquet", tags=["Import"])
+async def import_data_parquet(file: UploadFile = File(...)):
+    """
+    Imports data from a Parquet file in long (Date, Rate|Price|Value[, Currency])
+    or wide (Date, one column per currency) layout, read column-wise.
+    """
+    return await _import_columnar(file, import_service.parse_parquet, "Parquet")
+
+@app.post(f"{settings.API_V1_STR}/import/arrow", tags=["Import"])
+async def import_data_arrow(file: UploadFile = File(...)):
+    """Imports data from an Arrow IPC stream or file, in long or wide layout."""
+    return await _import_columnar(file, import_service.parse_arrow, "Arrow")
+
+@app.post(f"{settings.API_V1_STR}/import/csv", tags=["Import"])
+async def import_data_csv(file: UploadFile = File(...)):
+    """Imports data from a CSV file with a header row, in long or wide layout."""
+    return await _import_columnar(file, import_service.parse_csv, "CSV")
+
 # Endpoint to get all notifications (consider adding authentication/authorization)
 @app.get(f"{settings.API_V1_STR}/notifications", response_model=List[schemas.NotificationRead], tags=["Notifications"])
 def list_notifications(
@@ -360,30 +439,80 @@ def list_notifications(
     return notifications
 
 # --- Data Export Endpoints ---
-def _generate_export_data(data_type: str, start_date: date, end_date: date, currencies: str | None):
-    """Helper to fetch and format data for export, with error handling."""
+async def _generate_export_data(data_type: str, start_date: date, end_date: date, currencies: str | None) -> RateFrame:
+    """Helper to fetch data for export as a RateFrame, with error handling."""
     try:
-        # Reuse the main data fetching logic
-        data_models = get_historical_data( # list of dictionaries
-            data_type=data_type,
-            start_date=start_date,
-            end_date=end_date,
-            currencies=currencies
-        )
-        # Make sure data_models is a list, even if it's empty
-        if not isinstance(data_models, list):
-            logger.error(f"get_historical_data did not return a list, got: {type(data_models)}")
-            return []
-        return data_models # Return list of dictionaries
+        # Reuse the main data fetching logic; rows are built lazily while streaming
+        return await _load_rate_frame(data_type, start_date, end_date, currencies)
 
     except Exception as e:
-        # Catch errors with get_historical_data
+        # Catch errors with _load_rate_frame
         logger.error(f"Error generating export data: {e}", exc_info=True)
         # Throw the exception further so the endpoint can catch it and return 500
         raise
 
+def _normalize_currencies(currencies: str | None) -> str | None:
+    """Canonical form of a currencies parameter: upper-cased, stripped, de-duplicated, order kept."""
+    codes = dict.fromkeys(c.strip().upper() for c in (currencies or "").split(',') if c.strip())
+    return ",".join(codes) or None
+
+async def _export_response(
+    request: Request,
+    fmt: str,
+    data_type: str,
+    start_date: date,
+    end_date: date,
+    currencies: str | None,
+    media_type: str,
+    serialize: Callable[[RateFrame], Iterator[bytes]],
+    layout: str | None = None,
+    compressible: bool = True,
+) -> Response:
+    """
+    Streams serialize(frame) with validators and the negotiated Content-Encoding.
+    Compressed exports of fully historical ranges are kept in the artifact
+    cache, so repeat downloads skip both loading and compression. Formats that
+    are compressed internally (Parquet) pass compressible=False.
+    """
+    # Body, ETag and artifact cache key are all derived from the same canonical value
+    currencies = _normalize_currencies(currencies) if data_type == "currency" else None
+    encoding = compression.negotiate(request.headers.get("accept-encoding")) if compressible else None
+    cache_key = None
+    if encoding and end_date < nbp_now().date():
+        cache_key = (fmt, layout, data_type, start_date, end_date, currencies, encoding)
+        cached = compression.artifact_cache.get(cache_key)
+        if cached is not None:
+            body, headers = cached
+            if http_cache.is_not_modified_stored(request, headers):
+                return http_cache.not_modified(headers)
+            return Response(content=body, media_type=media_type, headers=headers)
+
+    frame = await _generate_export_data(data_type, start_date, end_date, currencies)
+    if not len(frame):
+        # Return 204 No Content if there is no data to export
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    parts = (fmt, data_type, start_date, end_date, currencies) if layout is None else (fmt, layout, data_type, start_date, end_date, currencies)
+    headers, not_modified = _frame_validators(request, frame, end_date, *parts, vary_encoding=compressible)
+    if not_modified:
+        return not_modified
+    headers['Content-Disposition'] = f'attachment; filename="{data_type}_data_{start_date}_to_{end_date}.{fmt}"'
+
+    # Buffer just enough of the stream to know whether compressing is worth it
+    chunks = serialize(frame)
+    head, exhausted = await worker_pool.run(compression.take, chunks, settings.COMPRESSION_MIN_SIZE)
+    body = itertools.chain(head, chunks)
+    if encoding and not (exhausted and sum(map(len, head)) < settings.COMPRESSION_MIN_SIZE):
+        headers['Content-Encoding'] = encoding
+        headers['ETag'] = http_cache.encoded_etag(headers['ETag'], encoding)
+        body = compression.compress_iter(body, encoding)
+        if cache_key is not None and frame.complete:
+            body = compression.artifact_cache.tee(cache_key, body, headers)
+    return StreamingResponse(worker_pool.iterate(body), media_type=media_type, headers=headers)
+
 @app.get(f"{settings.API_V1_STR}/export/json", tags=["Export"])
 async def export_data_json(
+    request: Request,
     data_type: Literal["currency", "gold"] = Query(...),
     start_date: date = Query(...),
     end_date: date = Query(...),
@@ -391,20 +520,11 @@ async def export_data_json(
 ):
     """Exports the selected data in JSON format."""
     try:
-        data_list = _generate_export_data(data_type, start_date, end_date, currencies)
-        if not data_list:
-            # Return 204 No Content if there is no data to export
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-        def date_converter(o):
-            if isinstance(o, date):
-                return o.isoformat()
-            raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
-
-        json_content = json.dumps(data_list, default=date_converter, indent=2)
-        filename = f"{data_type}_data_{start_date}_to_{end_date}.json"
-        headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
-        return Response(content=json_content, media_type="application/json", headers=headers)
+        # Serialized record by record while the response is being sent
+        return await _export_response(
+            request, "json", data_type, start_date, end_date, currencies, "application/json",
+            lambda frame: export_service.iter_json(_iter_frame_records(data_type, frame)),
+        )
     except Exception as e:
         # Log error and return 500 Internal Server Error 
         logger.error(f"Error in export_data_json: {e}", exc_info=True)
@@ -413,6 +533,7 @@ async def export_data_json(
 
 @app.get(f"{settings.API_V1_STR}/export/xml", tags=["Export"])
 async def export_data_xml(
+    request: Request,
     data_type: Literal["currency", "gold"] = Query(...),
     start_date: date = Query(...),
     end_date: date = Query(...),
@@ -420,32 +541,25 @@ async def export_data_xml(
 ):
     """Exports the selected data in XML format."""
     try: 
-        data_list = _generate_export_data(data_type, start_date, end_date, currencies)
-        if not data_list:
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-        root = etree.Element("Data", type=data_type, startDate=start_date.isoformat(), endDate=end_date.isoformat())
+        root_attrs = {"type": data_type, "startDate": start_date.isoformat(), "endDate": end_date.isoformat()}
+        currencies = _normalize_currencies(currencies)
         if data_type == "currency" and currencies:
-            root.set("currencies", currencies)
+            root_attrs["currencies"] = currencies
 
         record_name = "CurrencyRate" if data_type == "currency" else "GoldPrice"
 
-        for entry in data_list:
-            item = etree.SubElement(root, record_name)
-            for key, value in entry.items():
-                text_value = str(value.isoformat() if isinstance(value, date) else value)
-                etree.SubElement(item, key).text = text_value
-
-        xml_content = etree.tostring(root, pretty_print=True, xml_declaration=True, encoding='UTF-8')
-        filename = f"{data_type}_data_{start_date}_to_{end_date}.xml"
-        headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
-        return Response(content=xml_content, media_type="application/xml", headers=headers)
+        # Written incrementally with lxml's xmlfile instead of building the whole tree
+        return await _export_response(
+            request, "xml", data_type, start_date, end_date, currencies, "application/xml",
+            lambda frame: export_service.iter_xml(_iter_frame_records(data_type, frame), root_attrs, record_name),
+        )
     except Exception as e:
         logger.error(f"Error in export_data_xml: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to export data as XML: {e}")
 
 @app.get(f"{settings.API_V1_STR}/export/yaml", tags=["Export"])
 async def export_data_yaml(
+    request: Request,
     data_type: Literal["currency", "gold"] = Query(...),
     start_date: date = Query(...),
     end_date: date = Query(...),
@@ -453,25 +567,254 @@ async def export_data_yaml(
 ):
     """Exports the selected data in YAML format."""
     try:
-        data_list = _generate_export_data(data_type, start_date, end_date, currencies)
-        if not data_list:
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-        data_list_yaml_safe = []
-        for item in data_list:
-            yaml_item = {}
-            for k, v in item.items():
-                yaml_item[k] = v.isoformat() if isinstance(v, date) else v
-            data_list_yaml_safe.append(yaml_item)
-
-        yaml_content = yaml.dump({"Data": data_list_yaml_safe}, allow_unicode=True, default_flow_style=False)
-        filename = f"{data_type}_data_{start_date}_to_{end_date}.yaml"
-        headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
-        return Response(content=yaml_content, media_type="application/x-yaml", headers=headers)
+        # Emitted batch by batch of list items under a single 'Data' key
+        return await _export_response(
+            request, "yaml", data_type, start_date, end_date, currencies, "application/x-yaml",
+            lambda frame: export_service.iter_yaml(_iter_frame_records(data_type, frame)),
+        )
     except Exception as e:
         logger.error(f"Error in export_data_yaml: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to export data as YAML: {e}")
 
+def _columnar_export(fmt: str, data_type: str, layout: str):
+    """serialize() for _export_response: the columnar writer with this data type's column names."""
+    writer = {"parquet": columnar.iter_parquet, "arrow": columnar.iter_arrow, "csv": columnar.iter_csv}[fmt]
+    if data_type == "currency":
+        return lambda frame: writer(frame, layout, "Rate", "Currency")
+    return lambda frame: writer(frame, layout, "Price")
+
+async def _export_columnar(request: Request, fmt: str, media_type: str, data_type: str, start_date: date, end_date: date, currencies: str | None, layout: str, compressible: bool = True):
+    """Shared body of the Parquet / Arrow / CSV exports."""
+    try:
+        if fmt != "csv":
+            columnar.require_pyarrow()
+        return await _export_response(
+            request, fmt, data_type, start_date, end_date, currencies, media_type,
+            _columnar_export(fmt, data_type, layout), layout=layout, compressible=compressible,
+        )
+    except HTTPException:
+        raise
+    except columnar.ColumnarUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in export_data_{fmt}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to export data as {fmt}: {e}")
+
+@app.get(f"{settings.API_V1_STR}/export/parquet", tags=["Export"])
+async def export_data_parquet(
+    request: Request,
+    data_type: Literal["currency", "gold"] = Query(...),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None),
+    layout: Literal["long", "wide"] = Query("long", description="'long': Date, Rate, Currency rows; 'wide': one column per currency")
+):
+    """
+    Exports the selected data as Parquet (zstd-compressed columns), written
+    straight from the fetched series one row group at a time.
+    """
+    # Already compressed inside the file, so no Content-Encoding on top
+    return await _export_columnar(request, "parquet", columnar.PARQUET_MEDIA_TYPE, data_type, start_date, end_date, currencies, layout, compressible=False)
+
+@app.get(f"{settings.API_V1_STR}/export/arrow", tags=["Export"])
+async def export_data_arrow(
+    request: Request,
+    data_type: Literal["currency", "gold"] = Query(...),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None),
+    layout: Literal["long", "wide"] = Query("long", description="'long': Date, Rate, Currency rows; 'wide': one column per currency")
+):
+    """Exports the selected data as an Arrow IPC stream (read with pyarrow.ipc.open_stream), one record batch at a time."""
+    return await _export_columnar(request, "arrow", columnar.ARROW_MEDIA_TYPE, data_type, start_date, end_date, currencies, layout)
+
+@app.get(f"{settings.API_V1_STR}/export/csv", tags=["Export"])
+async def export_data_csv(
+    request: Request,
+    data_type: Literal["currency", "gold"] = Query(...),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None),
+    layout: Literal["long", "wide"] = Query("long", description="'long': Date, Rate, Currency rows; 'wide': one column per currency")
+):
+    """Exports the selected data as CSV with a header row, formatted column-wise."""
+    return await _export_columnar(request, "csv", "text/csv", data_type, start_date, end_date, currencies, layout)
+
+# --- Analytics Endpoints ---
+async def _load_aligned(start_date: date, end_date: date, currencies: str | None):
+    """Loads the requested currencies (all available ones by default) on a shared date axis."""
+    if not currencies:
+        currencies = ",".join(c['value'].upper() for c in settings.AVAILABLE_CURRENCIES)
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+    frame = await _load_rate_frame("currency", start_date, end_date, currencies)
+    return await worker_pool.run(analytics.align, frame)
+
+@app.get(f"{settings.API_V1_STR}/analytics/rolling", tags=["Analytics"])
+async def analytics_rolling(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None, description="Comma-separated currency codes; all available currencies if omitted"),
+    window: int = Query(20, ge=2, le=1000, description="Window length in publication days")
+):
+    """Rolling mean and standard deviation of mid rates per currency."""
+    dates, codes, values = await _load_aligned(start_date, end_date, currencies)
+
+    def compute():
+        mean, std = analytics.rolling_mean_std(values, window)
+        return {"window": window, "currencies": analytics.per_currency(codes, dates, rate=values, mean=mean, std=std)}
+    return await worker_pool.json_response(await worker_pool.run(compute))
+
+@app.get(f"{settings.API_V1_STR}/analytics/returns", tags=["Analytics"])
+async def analytics_returns(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None, description="Comma-separated currency codes; all available currencies if omitted")
+):
+    """Day-over-day log returns per currency (dated by the later day)."""
+    dates, codes, values = await _load_aligned(start_date, end_date, currencies)
+
+    def compute():
+        return {"currencies": analytics.per_currency(codes, dates[1:], log_return=analytics.log_returns(values))}
+    return await worker_pool.json_response(await worker_pool.run(compute))
+
+@app.get(f"{settings.API_V1_STR}/analytics/volatility", tags=["Analytics"])
+async def analytics_volatility(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None, description="Comma-separated currency codes; all available currencies if omitted")
+):
+    """Annualised volatility of log returns per currency."""
+    dates, codes, values = await _load_aligned(start_date, end_date, currencies)
+    volatility = await worker_pool.run(lambda: analytics.to_json_list(analytics.annualised_volatility(analytics.log_returns(values))))
+    return {
+        "periods_per_year": analytics.TRADING_DAYS_PER_YEAR,
+        "volatility": dict(zip(codes, volatility))
+    }
+
+@app.get(f"{settings.API_V1_STR}/analytics/drawdowns", tags=["Analytics"])
+async def analytics_drawdowns(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None, description="Comma-separated currency codes; all available currencies if omitted")
+):
+    """Drawdown from the running peak per currency, with the maximum drawdown."""
+    dates, codes, values = await _load_aligned(start_date, end_date, currencies)
+
+    def compute():
+        drawdown, max_drawdown = analytics.drawdowns(values)
+        payload = analytics.per_currency(codes, dates, drawdown=drawdown)
+        for code, worst in zip(codes, analytics.to_json_list(max_drawdown)):
+            payload[code]["max_drawdown"] = worst
+        return {"currencies": payload}
+    return await worker_pool.json_response(await worker_pool.run(compute))
+
+@app.get(f"{settings.API_V1_STR}/analytics/correlation", tags=["Analytics"])
+async def analytics_correlation(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    currencies: str = Query(None, description="Comma-separated currency codes; all available currencies if omitted")
+):
+    """N x N correlation matrix of daily log returns across the requested currencies."""
+    dates, codes, values = await _load_aligned(start_date, end_date, currencies)
+    matrix = await worker_pool.run(lambda: analytics.to_json_list(analytics.correlation_matrix(analytics.log_returns(values)), decimals=4))
+    return {"currencies": codes, "matrix": matrix}
+
+# --- Conversion Endpoints ---
+def _cross_rate_error(e: Exception) -> HTTPException:
+    if isinstance(e, cross_rates.CrossRateUnavailable):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    if isinstance(e, nbp_api.NBPFetchError):
+        return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to fetch table A from NBP: {e}")
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.get(f"{settings.API_V1_STR}/convert", tags=["Conversion"])
+async def convert_currency(
+    from_currency: str = Query(..., min_length=3, max_length=3),
+    to_currency: str = Query(..., min_length=3, max_length=3),
+    amount: float = Query(..., gt=0),
+    on_date: date = Query(None, alias="date", description="Rates in force on this date (default: today); weekends and holidays use the last published table"),
+):
+    """Converts an amount between two table A currencies (or PLN) using NBP mid rates."""
+    try:
+        return await asyncio.to_thread(cross_rates.convert, amount, from_currency, to_currency, on_date)
+    except (cross_rates.CrossRateUnavailable, nbp_api.NBPFetchError, ValueError) as e:
+        raise _cross_rate_error(e)
+
+@app.get(f"{settings.API_V1_STR}/crossrates/{{on_date}}", tags=["Conversion"])
+async def get_cross_rates(
+    on_date: date,
+    currencies: str = Query(None, description="Comma-separated currency codes; all table A currencies and PLN if omitted"),
+):
+    """
+    Full cross-rate matrix in force on a date: matrix[i][j] is the amount of
+    currencies[j] for one unit of currencies[i].
+    """
+    try:
+        table = await asyncio.to_thread(cross_rates.get_table, on_date)
+    except (cross_rates.CrossRateUnavailable, nbp_api.NBPFetchError) as e:
+        raise _cross_rate_error(e)
+    if currencies:
+        codes, matrix = table.submatrix([c.strip() for c in currencies.split(',') if c.strip()])
+    else:
+        codes, matrix = table.codes, table.matrix
+    return {
+        "requested_date": on_date,
+        "effective_date": table.effective_date,
+        "table_no": table.table_no,
+        "currencies": codes,
+        "matrix": analytics.to_json_list(matrix, decimals=8)
+    }
+
+CONVERSION_FIELDS = ["amount", "from_currency", "to_currency", "date", "rate", "result", "effective_date", "error"]
+
+async def _convert_batch(batch: bulk_conversion.ConversionBatch):
+    """Fetches each currency of the batch once and converts all rows vectorized."""
+    try:
+        series = await bulk_conversion.fetch_batch_series(batch)
+    except nbp_api.NBPFetchError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to fetch rates from NBP: {e}")
+    columns = await worker_pool.run(bulk_conversion.convert_batch, batch, series)
+    totals = bulk_conversion.summary(columns)
+    headers = {"X-Conversion-Rows": str(totals["rows"]), "X-Conversion-Failed": str(totals["failed"])}
+    return bulk_conversion.iter_results(batch, columns), headers
+
+@app.post(f"{settings.API_V1_STR}/convert/bulk", tags=["Conversion"])
+async def convert_bulk(request: schemas.BulkConversionRequest):
+    """
+    Converts many (amount, from_currency, to_currency, date) rows, each at the last
+    NBP mid rates published on or before its date. Results stream back as a JSON
+    array in input order; rows without a rate carry an error instead of a result.
+    """
+    try:
+        batch = bulk_conversion.ConversionBatch.from_rows(row.model_dump() for row in request.rows)
+    except bulk_conversion.ConversionInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    records, headers = await _convert_batch(batch)
+    return StreamingResponse(worker_pool.iterate(export_service.iter_json(records)), media_type="application/json", headers=headers)
+
+@app.post(f"{settings.API_V1_STR}/convert/bulk/csv", tags=["Conversion"])
+async def convert_bulk_csv(file: UploadFile = File(...)):
+    """
+    Bulk conversion of an uploaded CSV with an amount,from_currency,to_currency,date
+    header. Returns the rows as CSV with rate, result, effective_date and error columns.
+    """
+    try:
+        spooled = await import_service.spool_upload(file)
+    except import_service.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        batch = await worker_pool.run(
+            lambda: bulk_conversion.ConversionBatch.from_rows(bulk_conversion.iter_csv_rows(spooled))
+        )
+    except (bulk_conversion.ConversionInputError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid CSV file: {e}")
+    finally:
+        spooled.close()
+    records, headers = await _convert_batch(batch)
+    headers["Content-Disposition"] = 'attachment; filename="converted.csv"'
+    return StreamingResponse(worker_pool.iterate(export_service.iter_csv(records, CONVERSION_FIELDS)), media_type="text/csv", headers=headers)
+
 # Optional: Add health check endpoint for the database
 @app.get(f"{settings.API_V1_STR}/health/db", tags=["Health Check"])
 def health_check_db(db: Session = Depends(database.get_db)):
@@ -486,14 +829,42 @@ def health_check_db(db: Session = Depends(database.get_db)):
             detail=f"Database connection error: {e}",
         )
        
+@app.get(f"{settings.API_V1_STR}/health/cache", tags=["Health Check"])
+def health_check_cache():
+    """Returns counters of the in-process NBP response, cross-rate and export artifact caches and of request coalescing."""
+    return {
+        "responses": nbp_api.cache_stats(),
+        "cross_rates": cross_rates.cache_stats(),
+        "export_artifacts": compression.artifact_cache.stats(),
+        "shared": shared_cache.stats(),
+        "coalescing": {"nbp": nbp_api.coalescing_stats(), "rate_store": rate_store.coalescing_stats()}
+    }
+
+@app.get(f"{settings.API_V1_STR}/health/ingestion", tags=["Health Check"])
+def health_check_ingestion():
+    """Returns the status and progress of the daily ingestion and historical backfill jobs."""
+    return ingestion.status()
+
+@app.get(f"{settings.API_V1_STR}/health/leader", tags=["Health Check"])
+def health_check_leader():
+    """Returns whether this worker process is the elected leader (scheduled jobs, SOAP server)."""
+    return leader_elector.stats()
+
+@app.get(f"{settings.API_V1_STR}/health/email", tags=["Health Check"])
+def health_check_email():
+    """Returns queue depth, delivery counters and send latency of the email queue."""
+    return email_queue.stats()
+
 @app.get("/health/soap", tags=["Health Check"])
 async def check_soap_health():
     """Check if SOAP service is running"""
+    if not settings.SOAP_STANDALONE_ENABLED:
+        return {"status": "ok", "message": "Standalone SOAP server disabled; SOAP is served at /soap"}
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"http://{settings.SOAP_SERVICE_HOST}:{settings.SOAP_SERVICE_PORT}/soap?wsdl")
-            if response.status_code == 200:
-                return {"status": "ok", "message": "SOAP service is running"}
+        client = http_client.get_async_client()
+        response = await client.get(f"http://{settings.SOAP_SERVICE_HOST}:{settings.SOAP_SERVICE_PORT}/soap?wsdl")
+        if response.status_code == 200:
+            return {"status": "ok", "message": "SOAP service is running"}
     except Exception as e:
         raise HTTPException(
             status_code=503,
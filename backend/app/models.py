@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum as SQLEnum
 from .database import Base
 import enum
 
@@ -20,7 +20,63 @@ class Notification(Base):
     def __repr__(self):
         return f"<Notification(id={self.id}, currency='{self.currency}', threshold={self.threshold}, email='{self.email}', direction='{self.direction.value}')>"
 
+class ExchangeRate(Base):
+    """Database model for locally stored NBP table A mid rates."""
+    __tablename__ = 'exchange_rates'
+
+    currency = Column(String(3), primary_key=True) # e.g., 'EUR'
+    effective_date = Column(Date, primary_key=True)
+    mid = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<ExchangeRate(currency='{self.currency}', effective_date={self.effective_date}, mid={self.mid})>"
+
+class GoldPrice(Base):
+    """Database model for locally stored NBP gold prices."""
+    __tablename__ = 'gold_prices'
+
+    effective_date = Column(Date, primary_key=True)
+    price = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<GoldPrice(effective_date={self.effective_date}, price={self.price})>"
+
+class RateCoverage(Base):
+    """
+    Date ranges already fetched from NBP for a series ('EUR', 'GOLD', ...).
+    Needed because weekends and holidays have no rows, so missing rows alone
+    cannot tell us whether a day was fetched.
+    """
+    __tablename__ = 'rate_coverage'
+
+    id = Column(Integer, primary_key=True, index=True)
+    series = Column(String(8), index=True, nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+
+    def __repr__(self):
+        return f"<RateCoverage(series='{self.series}', start_date={self.start_date}, end_date={self.end_date})>"
+
+class IngestionState(Base):
+    """
+    Status and progress of an ingestion job ('daily', 'backfill'). What is
+    already stored is tracked by RateCoverage; this row is what the job reports.
+    """
+    __tablename__ = 'ingestion_state'
+
+    job = Column(String(32), primary_key=True)
+    status = Column(String(16), nullable=False) # 'running', 'completed', 'partial', 'waiting', 'failed'
+    cursor = Column(Date, nullable=True) # Backfill: oldest date reached; daily: latest table date stored
+    windows_total = Column(Integer, nullable=False, default=0)
+    windows_done = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<IngestionState(job='{self.job}', status='{self.status}', cursor={self.cursor}, done={self.windows_done}/{self.windows_total})>"
+
 # Ensure the table is created when the application starts
 # (You might prefer Alembic for production migrations)
 # from .database import engine
-# Base.metadata.create_all(bind=engine) # Called in main.py lifespan event instead
\ No newline at end of file
+# Base.metadata.create_all(bind=engine) # Called in main.py lifespan event instead
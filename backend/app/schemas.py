@@ -34,6 +34,19 @@ class GoldExportData(ExportDataBase):
     """Schema for gold data points for export/charting."""
     Price: float # Match original naming for consistency
 
+# --- Conversion Schemas ---
+
+class ConversionRow(BaseModel):
+    """A single line of a bulk conversion request."""
+    amount: float
+    from_currency: str = Field(..., min_length=3, max_length=3)
+    to_currency: str = Field(..., min_length=3, max_length=3)
+    date: date
+
+class BulkConversionRequest(BaseModel):
+    """Rows to convert, each at the NBP mid rates in force on its own date."""
+    rows: List[ConversionRow]
+
 # --- Notification Schemas ---
 
 class NotificationBase(BaseModel):
@@ -0,0 +1,50 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Tuple
+from ..models import Notification, NotificationDirection
+
+class AlertIndex:
+    """
+    Notifications grouped by currency, with ABOVE and BELOW thresholds kept in
+    sorted arrays so the alerts fired by a rate are found by binary search.
+    """
+
+    def __init__(self):
+        # currency -> (sorted thresholds, notifications in the same order)
+        self._above: Dict[str, Tuple[List[float], List[Notification]]] = {}
+        self._below: Dict[str, Tuple[List[float], List[Notification]]] = {}
+        self.size = 0
+
+    @classmethod
+    def build(cls, notifications: Iterable[Notification]) -> "AlertIndex":
+        """Builds the index from any iterable of notifications (e.g. crud.iter_notifications)."""
+        grouped: Dict[Tuple[str, NotificationDirection], List[Notification]] = {}
+        for notification in notifications:
+            key = (notification.currency.upper(), notification.direction)
+            grouped.setdefault(key, []).append(notification)
+
+        index = cls()
+        for (currency, direction), group in grouped.items():
+            group.sort(key=lambda n: n.threshold)
+            target = index._above if direction == NotificationDirection.ABOVE else index._below
+            target[currency] = ([n.threshold for n in group], group)
+            index.size += len(group)
+        return index
+
+    def __len__(self) -> int:
+        return self.size
+
+    def currencies(self) -> List[str]:
+        """Distinct currencies with at least one notification."""
+        return sorted(set(self._above) | set(self._below))
+
+    def triggered(self, currency: str, rate: float) -> List[Notification]:
+        """Notifications fired by `rate`: ABOVE with threshold < rate, BELOW with threshold > rate."""
+        currency = currency.upper()
+        fired: List[Notification] = []
+        if currency in self._above:
+            thresholds, notifications = self._above[currency]
+            fired.extend(notifications[:bisect_left(thresholds, rate)])
+        if currency in self._below:
+            thresholds, notifications = self._below[currency]
+            fired.extend(notifications[bisect_right(thresholds, rate):])
+        return fired
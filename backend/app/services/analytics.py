@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .rate_series import RateFrame
+
+# Vectorized analytics over a RateFrame. Series are first aligned on a shared
+# date axis (a date x currency matrix, NaN where a series has no point), so
+# every statistic is a handful of NumPy operations regardless of range length.
+
+TRADING_DAYS_PER_YEAR = 252
+
+def align(frame: RateFrame) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Returns (dates, codes, values) where values[i, j] is codes[j] on dates[i], or NaN."""
+    codes = [code for code in frame.codes() if len(frame[code])]
+    if not codes:
+        return np.empty(0, dtype="datetime64[D]"), [], np.empty((0, 0))
+    dates = np.unique(np.concatenate([frame[code].dates for code in codes]))
+    values = np.full((len(dates), len(codes)), np.nan)
+    for j, code in enumerate(codes):
+        series = frame[code]
+        values[np.searchsorted(dates, series.dates), j] = series.values
+    return dates, codes, values
+
+def log_returns(values: np.ndarray) -> np.ndarray:
+    """Day-over-day log returns per column; one row shorter than values."""
+    if len(values) < 2:
+        return np.empty((0, values.shape[1]))
+    return np.diff(np.log(values), axis=0)
+
+def rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and sample standard deviation per column over `window` rows.
+    The first window - 1 rows are NaN, as are windows containing a NaN.
+    """
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0) # (rows - window + 1, columns, window)
+        mean[window - 1:] = windows.mean(axis=-1)
+        std[window - 1:] = windows.std(axis=-1, ddof=1)
+    return mean, std
+
+def annualised_volatility(returns: np.ndarray, periods_per_year: int = TRADING_DAYS_PER_YEAR) -> np.ndarray:
+    """Sample standard deviation of returns per column, scaled to a year."""
+    if len(returns) < 2:
+        return np.full(returns.shape[1], np.nan)
+    return np.nanstd(returns, axis=0, ddof=1) * np.sqrt(periods_per_year)
+
+def drawdowns(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Drawdown from the running peak per column (0 at a peak, negative below) and its minimum."""
+    filled = _forward_fill(values)
+    peaks = np.fmax.accumulate(filled, axis=0)
+    drawdown = filled / peaks - 1.0
+    max_drawdown = np.nanmin(drawdown, axis=0) if len(drawdown) else np.full(values.shape[1], np.nan)
+    return drawdown, max_drawdown
+
+def correlation_matrix(returns: np.ndarray) -> np.ndarray:
+    """Pearson correlation of returns across columns, over rows where every column has a value."""
+    complete = returns[~np.isnan(returns).any(axis=1)]
+    if len(complete) < 2:
+        return np.full((returns.shape[1], returns.shape[1]), np.nan)
+    return np.atleast_2d(np.corrcoef(complete, rowvar=False))
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carries the last known value down each column over NaN gaps."""
+    if not len(values):
+        return values
+    mask = np.isnan(values)
+    index = np.where(~mask, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    return filled
+
+def to_json_list(values: np.ndarray, decimals: int = 6) -> List[Any]:
+    """Rounded nested list for JSON, with NaN / inf mapped to None."""
+    rounded = np.round(values, decimals)
+    return np.where(np.isfinite(rounded), rounded, None).tolist()
+
+def date_list(dates: np.ndarray) -> List[str]:
+    return np.datetime_as_string(dates, unit="D").tolist()
+
+def per_currency(codes: List[str], dates: np.ndarray, **columns: np.ndarray) -> Dict[str, Dict[str, Any]]:
+    """Columnar per-currency payload: {code: {'dates': [...], name: [...], ...}}."""
+    shared_dates = date_list(dates)
+    return {
+        code: {"dates": shared_dates, **{name: to_json_list(column[:, j]) for name, column in columns.items()}}
+        for j, code in enumerate(codes)
+    }
@@ -0,0 +1,166 @@
+import codecs
+import csv
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
+import numpy as np
+from ..config import settings
+from . import nbp_api, nbp_calendar
+from .cross_rates import BASE_CURRENCY
+from .nbp_cache import nbp_now
+from .rate_series import RateSeries
+
+# Batch conversion of (amount, from, to, date) rows at the rates in force on
+# each row's date. Rows are held as columns; every currency involved is fetched
+# once for the whole date span of the batch (see nbp_api.fetch_ranges_async) and
+# each row is resolved to the last rate on or before its date with a binary
+# search over the currency's sorted dates.
+
+class ConversionInputError(ValueError):
+    """Raised for malformed or oversized conversion batches."""
+
+def supported_codes() -> set[str]:
+    """Currencies a row may use: the configured ones plus PLN. Others are never sent to NBP."""
+    return {c["value"].upper() for c in settings.AVAILABLE_CURRENCIES} | {BASE_CURRENCY}
+
+@dataclass
+class ConversionBatch:
+    amounts: np.ndarray # float64
+    from_codes: np.ndarray # str
+    to_codes: np.ndarray # str
+    dates: np.ndarray # datetime64[D]
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "ConversionBatch":
+        """Builds a batch from dicts with amount, from_currency, to_currency and date keys."""
+        amounts, from_codes, to_codes, dates = [], [], [], []
+        for number, row in enumerate(rows, start=1):
+            if number > settings.CONVERSION_MAX_ROWS:
+                raise ConversionInputError(f"Batch exceeds the {settings.CONVERSION_MAX_ROWS} row limit")
+            try:
+                amounts.append(float(row["amount"]))
+                from_codes.append(str(row["from_currency"]).strip().upper())
+                to_codes.append(str(row["to_currency"]).strip().upper())
+                dates.append(str(row["date"]).strip())
+            except (KeyError, TypeError, ValueError) as e:
+                raise ConversionInputError(f"Row {number}: {e!r}") from None
+        try:
+            date_array = np.array(dates, dtype="datetime64[D]")
+        except ValueError as e:
+            raise ConversionInputError(f"Invalid date: {e}") from None
+        return cls(
+            np.array(amounts, dtype=np.float64),
+            np.array(from_codes, dtype=str),
+            np.array(to_codes, dtype=str),
+            date_array
+        )
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[Dict[str, str]]:
+    """
+    Streams rows of a CSV upload with an amount,from_currency,to_currency,date
+    header ('from' / 'to' are accepted as column aliases).
+    """
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(stream))
+    aliases = {"from": "from_currency", "to": "to_currency"}
+    for row in reader:
+        yield {aliases.get(key.strip().lower(), key.strip().lower()): value for key, value in row.items() if key}
+
+def _as_of(series: RateSeries, dates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Rate and effective date of the last point on or before each date (NaN / NaT if none)."""
+    if not len(series):
+        return np.full(len(dates), np.nan), np.full(len(dates), np.datetime64("NaT"), dtype="datetime64[D]")
+    positions = np.searchsorted(series.dates, dates, side="right") - 1
+    found = positions >= 0
+    positions = np.clip(positions, 0, None)
+    rates = np.where(found, series.values[positions], np.nan)
+    effective = np.where(found, series.dates[positions], np.datetime64("NaT"))
+    return rates, effective
+
+async def fetch_batch_series(batch: ConversionBatch) -> Dict[str, RateSeries]:
+    """
+    Fetches every non-PLN currency of the batch over one shared range: from the
+    last business day before the earliest row (so it can fall back to an earlier
+    table) to the latest row, clamped to today.
+    """
+    used = set(np.unique(batch.from_codes).tolist()) | set(np.unique(batch.to_codes).tolist())
+    # Unsupported codes are not fetched; their rows fail in iter_results
+    currencies = sorted((used & supported_codes()) - {BASE_CURRENCY})
+    if not currencies or not len(batch):
+        return {}
+    today = nbp_now().date()
+    start_date = nbp_calendar.previous_business_day(min(batch.dates.min().astype(date), today))
+    end_date = min(batch.dates.max().astype(date), today)
+    results = await nbp_api.fetch_ranges_async([(code, start_date, end_date) for code in currencies], raise_on_error=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return dict(zip(currencies, results))
+
+def convert_batch(batch: ConversionBatch, series: Dict[str, RateSeries]) -> Dict[str, np.ndarray]:
+    """
+    Converts all rows in one pass. Returns columns 'rate' (to_currency per unit
+    of from_currency), 'result' and 'effective_date'; rows without a rate on or
+    before their date get NaN / NaT.
+    """
+    count = len(batch)
+    pln_per_from = np.ones(count)
+    pln_per_to = np.ones(count)
+    effective = np.full(count, np.datetime64("NaT"), dtype="datetime64[D]")
+    for code, points in series.items():
+        from_rows = batch.from_codes == code
+        to_rows = batch.to_codes == code
+        rows = from_rows | to_rows
+        if not rows.any():
+            continue
+        rates, dates = _as_of(points, batch.dates[rows])
+        pln_per_from[from_rows] = rates[from_rows[rows]]
+        pln_per_to[to_rows] = rates[to_rows[rows]]
+        # Table A currencies share publication dates; keep the later one if the legs differ
+        current = effective[rows]
+        effective[rows] = np.where(np.isnat(current) | (dates > current), dates, current)
+
+    # Currencies that were not fetched (e.g. unknown codes) have no rate
+    known = set(series) | {BASE_CURRENCY}
+    pln_per_from[~np.isin(batch.from_codes, list(known))] = np.nan
+    pln_per_to[~np.isin(batch.to_codes, list(known))] = np.nan
+    # PLN -> PLN rows need no table
+    both_pln = (batch.from_codes == BASE_CURRENCY) & (batch.to_codes == BASE_CURRENCY)
+    effective[both_pln] = batch.dates[both_pln]
+
+    rate = pln_per_from / pln_per_to
+    return {"rate": rate, "result": batch.amounts * rate, "effective_date": effective}
+
+def iter_results(batch: ConversionBatch, columns: Dict[str, np.ndarray], decimals: int = 4) -> Iterator[Dict[str, Any]]:
+    """Yields one output record per input row, in input order."""
+    rates = columns["rate"]
+    converted = np.isfinite(rates)
+    supported = supported_codes()
+    results = np.round(columns["result"], decimals)
+    for amount, from_code, to_code, on_date, ok, rate, result, effective in zip(
+        batch.amounts.tolist(), batch.from_codes.tolist(), batch.to_codes.tolist(),
+        batch.dates.tolist(), converted.tolist(), rates.tolist(), results.tolist(),
+        columns["effective_date"].tolist()
+    ):
+        yield {
+            "amount": amount,
+            "from_currency": from_code,
+            "to_currency": to_code,
+            "date": on_date,
+            "rate": rate if ok else None,
+            "result": result if ok else None,
+            "effective_date": effective if ok else None,
+            "error": None if ok else _row_error(from_code, to_code, on_date, supported)
+        }
+
+def _row_error(from_code: str, to_code: str, on_date: date, supported: set[str]) -> str:
+    for code in (from_code, to_code):
+        if code not in supported:
+            return f"Unsupported currency: {code!r}"
+    return f"No NBP rate for {from_code}/{to_code} on or before {on_date}"
+
+def summary(columns: Dict[str, np.ndarray]) -> Dict[str, int]:
+    converted = int(np.isfinite(columns["rate"]).sum())
+    return {"rows": len(columns["rate"]), "converted": converted, "failed": len(columns["rate"]) - converted}
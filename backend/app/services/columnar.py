@@ -0,0 +1,198 @@
+import csv
+import io
+from typing import BinaryIO, Dict, Iterator, List
+import numpy as np
+from ..config import settings
+from .analytics import align
+from .rate_series import GOLD_SERIES, RateFrame, RateSeries
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError: # Optional: Parquet / Arrow IPC are unavailable, CSV falls back to the csv module
+    pa = None
+    pq = None
+
+# Column-wise conversion between RateFrame and tabular files (Parquet, Arrow
+# IPC stream, CSV), built straight from the frame's NumPy arrays without per-row
+# dicts. Two layouts:
+#   long: Date, <value_key>[, Currency] - one row per point, ordered by date
+#   wide: Date, <code>, <code>, ...     - one row per date, empty where a series has no point
+
+LAYOUTS = ("long", "wide")
+VALUE_KEYS = ("Rate", "Price", "Value", "Mid") # Value column names accepted on import (long layout)
+CODE_KEY = "Currency"
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+class ColumnarUnavailable(RuntimeError):
+    """Raised when Parquet / Arrow support is used without pyarrow installed."""
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ColumnarUnavailable("Parquet and Arrow support requires the 'pyarrow' package")
+
+# --- Export ---
+def _arrow_table(frame: RateFrame, layout: str, value_key: str, code_key: str | None) -> "pa.Table":
+    if layout == "wide":
+        dates, codes, values = align(frame)
+        arrays = [pa.array(dates)] + [pa.array(values[:, j], from_pandas=True) for j in range(len(codes))] # NaN -> null
+        return pa.Table.from_arrays(arrays, names=["Date", *codes])
+    dates, values, owners = frame.long_columns()
+    arrays, names = [pa.array(dates), pa.array(values)], ["Date", value_key]
+    if code_key is not None:
+        # Dictionary-encoded: one small int per row instead of a repeated string
+        arrays.append(pa.DictionaryArray.from_arrays(owners.astype(np.int32), frame.codes()))
+        names.append(code_key)
+    return pa.Table.from_arrays(arrays, names=names)
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that holds writes until drained; tell() keeps counting so writers can record offsets."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._parts)
+        self._parts.clear()
+        return chunk
+
+def iter_parquet(frame: RateFrame, layout: str, value_key: str, code_key: str | None = None) -> Iterator[bytes]:
+    """Streams a Parquet file, one row group of EXPORT_ROW_GROUP_SIZE rows at a time, footer last."""
+    require_pyarrow()
+    table = _arrow_table(frame, layout, value_key, code_key)
+    sink = _ChunkSink()
+    compression = settings.EXPORT_PARQUET_COMPRESSION
+    with pq.ParquetWriter(sink, table.schema, compression=None if compression == "none" else compression) as writer:
+        for batch in table.to_batches(max_chunksize=settings.EXPORT_ROW_GROUP_SIZE):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+def iter_arrow(frame: RateFrame, layout: str, value_key: str, code_key: str | None = None) -> Iterator[bytes]:
+    """Streams an Arrow IPC stream, one record batch of EXPORT_ROW_GROUP_SIZE rows at a time."""
+    require_pyarrow()
+    table = _arrow_table(frame, layout, value_key, code_key)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=settings.EXPORT_ROW_GROUP_SIZE):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+def iter_csv(frame: RateFrame, layout: str, value_key: str, code_key: str | None = None) -> Iterator[bytes]:
+    """
+    Streams CSV with a header row. Each block of rows is formatted column by
+    column (shortest round-trip float repr, empty cells for missing values).
+    """
+    if layout == "wide":
+        dates, codes, values = align(frame)
+        header = ["Date", *codes]
+    else:
+        dates, values, owners = frame.long_columns()
+        values = values[:, None]
+        header = ["Date", value_key] + ([code_key] if code_key is not None else [])
+        code_names = np.array(frame.codes())
+    yield (",".join(header) + "\n").encode("utf-8")
+
+    size = settings.EXPORT_ROW_GROUP_SIZE
+    for lo in range(0, len(dates), size):
+        hi = lo + size
+        block = values[lo:hi]
+        text = block.astype(str)
+        text[np.isnan(block)] = ""
+        columns = [np.datetime_as_string(dates[lo:hi], unit="D"), *text.T]
+        if layout == "long" and code_key is not None:
+            columns.append(code_names[owners[lo:hi]])
+        yield ("\n".join(map(",".join, zip(*columns))) + "\n").encode("utf-8")
+
+# --- Import ---
+def frame_from_columns(columns: Dict[str, np.ndarray]) -> RateFrame:
+    """
+    Builds a frame from imported columns. A Rate / Price / Value / Mid column
+    means long layout (codes from 'Currency'; GOLD for 'Price' without one),
+    otherwise every column other than Date is a series (wide layout).
+    Rows with a missing date or value are skipped.
+    """
+    if "Date" not in columns:
+        raise ValueError("Missing 'Date' column")
+    dates = np.asarray(columns["Date"]).astype("datetime64[D]")
+    value_key = next((key for key in VALUE_KEYS if key in columns), None)
+
+    if value_key is None:
+        series = []
+        for code, column in columns.items():
+            if code == "Date":
+                continue
+            values = np.asarray(column, dtype=np.float64)
+            valid = ~np.isnan(values) & ~np.isnat(dates)
+            series.append(RateSeries(str(code).upper(), dates[valid], values[valid]).sort())
+        return RateFrame(series)
+
+    values = np.asarray(columns[value_key], dtype=np.float64)
+    if CODE_KEY in columns:
+        codes = np.char.upper(np.asarray(columns[CODE_KEY]).astype(str))
+    else:
+        codes = np.full(len(dates), GOLD_SERIES if value_key == "Price" else "UNKNOWN")
+    valid = ~np.isnan(values) & ~np.isnat(dates)
+    dates, values, codes = dates[valid], values[valid], codes[valid]
+    names, owners = np.unique(codes, return_inverse=True)
+    return RateFrame(
+        RateSeries(str(name), dates[owners == i], values[owners == i]).sort()
+        for i, name in enumerate(names)
+    )
+
+def _frame_from_table(table: "pa.Table") -> RateFrame:
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        columns[name] = column.to_numpy()
+    return frame_from_columns(columns)
+
+def read_parquet(stream: BinaryIO) -> RateFrame:
+    require_pyarrow()
+    return _frame_from_table(pq.read_table(stream))
+
+def read_arrow(stream: BinaryIO) -> RateFrame:
+    """Reads an Arrow IPC stream (as exported), or an Arrow IPC / Feather v2 file."""
+    require_pyarrow()
+    try:
+        table = pa.ipc.open_stream(stream).read_all()
+    except pa.ArrowInvalid:
+        stream.seek(0)
+        table = pa.ipc.open_file(stream).read_all()
+    return _frame_from_table(table)
+
+def read_csv(stream: BinaryIO) -> RateFrame:
+    """Reads CSV in either layout; parsed column-wise by pyarrow when available."""
+    if pa is not None:
+        return _frame_from_table(pyarrow.csv.read_csv(stream))
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("Empty CSV file")
+    cells = list(zip(*reader)) or [()] * len(header)
+    columns = {}
+    for name, column in zip(header, cells):
+        column = np.array(column, dtype=str)
+        if name not in ("Date", CODE_KEY):
+            column = np.where(column == "", "nan", column).astype(np.float64)
+        columns[name] = column
+    return frame_from_columns(columns)
@@ -0,0 +1,172 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Tuple
+from ..config import settings
+
+try:
+    import brotli
+except ImportError: # Optional: 'br' is simply not offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError: # Optional: 'zstd' is simply not offered
+    zstandard = None
+
+# Content-Encoding negotiation and streaming compression for API responses,
+# plus a byte-bounded LRU of compressed export artifacts for immutable
+# (fully historical) ranges.
+
+def available_encodings() -> List[str]:
+    """Supported encodings in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Best encoding acceptable to the client per Accept-Encoding q-values, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def _compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes], Callable[[], bytes]]:
+    """(compress, flush, finish) functions for one stream."""
+    if encoding == "gzip":
+        stream = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31) # 31: gzip container
+        return stream.compress, lambda: stream.flush(zlib.Z_SYNC_FLUSH), stream.flush
+    if encoding == "br":
+        stream = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return stream.process, stream.flush, stream.finish
+    if encoding == "zstd":
+        stream = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+        return (
+            stream.compress,
+            lambda: stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            lambda: stream.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH),
+        )
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+def compress_iter(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compresses a stream chunk by chunk. The compressor is flushed only when
+    COMPRESSION_FLUSH_BYTES of input went in without producing any output, so
+    the client still receives data steadily while small chunks do not each end
+    a block (which costs ratio); the rest is left to finish().
+    """
+    compress, flush, finish = _compressor(encoding)
+    pending = 0 # Input bytes since the compressor last produced output
+    for chunk in chunks:
+        out = compress(chunk)
+        pending += len(chunk)
+        if not out and pending >= settings.COMPRESSION_FLUSH_BYTES:
+            out = flush()
+        if out:
+            pending = 0
+            yield out
+    yield finish()
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    compress, _, finish = _compressor(encoding)
+    return compress(data) + finish()
+
+def take(chunks: Iterator[bytes], min_size: int) -> Tuple[List[bytes], bool]:
+    """
+    Pulls chunks until at least min_size bytes are buffered or the stream ends.
+    Returns (buffered chunks, whether the stream is exhausted).
+    """
+    head, size = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            return head, False
+    return head, True
+
+class ArtifactCache:
+    """
+    Thread-safe LRU of compressed response bodies, bounded by total bytes.
+    Each entry keeps the response headers (validators) it was served with.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, Tuple[bytes, Dict[str, str]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bytes, Dict[str, str]] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes, headers: Dict[str, str]) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key)[0])
+            self._entries[key] = (body, dict(headers))
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def tee(self, key: Hashable, chunks: Iterable[bytes], headers: Dict[str, str]) -> Iterator[bytes]:
+        """Passes chunks through and stores the complete body once the stream finishes."""
+        parts, size = [], 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size <= self.max_bytes:
+                    parts.append(chunk)
+                else:
+                    parts = None # Too large to cache; keep streaming
+            yield chunk
+        if parts is not None:
+            self.put(key, b"".join(parts), headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+artifact_cache = ArtifactCache(settings.EXPORT_CACHE_MAX_BYTES)
@@ -0,0 +1,186 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from ..config import settings
+from . import nbp_api, nbp_calendar
+from .nbp_cache import nbp_now, response_expiry
+
+logger = logging.getLogger(__name__)
+
+# Cross rates between all table A currencies (plus PLN) for one effective date.
+# A single table fetch yields the full N x N matrix, so conversions are memory
+# lookups. Weekend and holiday dates resolve to the last table published
+# before them; the calendar says which one, so a fetch window spans just that
+# table and the one before it (in case today's is not out yet).
+
+BASE_CURRENCY = "PLN"
+LOOKBACK_DAYS = 10 # Covers the longest run of days without a table (e.g. Christmas / New Year); fallback window
+FIRST_TABLE_DATE = date(2002, 1, 2) # Earliest table A available from the NBP API
+
+class CrossRateUnavailable(Exception):
+    """Raised when no table A is published on or before the requested date."""
+
+class CrossRateTable:
+    """Mid rates of one table A; matrix[i, j] is the amount of codes[j] for 1 unit of codes[i]."""
+
+    def __init__(self, effective_date: date, table_no: str | None, codes: List[str], mids: np.ndarray):
+        self.effective_date = effective_date
+        self.table_no = table_no
+        self.codes = codes
+        self.mids = mids # PLN per unit of each code
+        self.index = {code: i for i, code in enumerate(codes)}
+        self._matrix = None
+
+    @classmethod
+    def from_table(cls, table: Dict[str, Any]) -> "CrossRateTable":
+        rates = [r for r in table.get('rates', []) if r.get('code') != BASE_CURRENCY]
+        codes = [BASE_CURRENCY] + [r['code'] for r in rates]
+        mids = np.array([1.0] + [r['mid'] for r in rates], dtype=np.float64)
+        return cls(date.fromisoformat(table['effectiveDate']), table.get('no'), codes, mids)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.divide.outer(self.mids, self.mids)
+        return self._matrix
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Amount of to_currency for 1 unit of from_currency."""
+        try:
+            i, j = self.index[from_currency.upper()], self.index[to_currency.upper()]
+        except KeyError as e:
+            raise ValueError(f"Currency {e.args[0]} is not in table A of {self.effective_date}") from None
+        return float(self.mids[i] / self.mids[j])
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        return amount * self.rate(from_currency, to_currency)
+
+    def submatrix(self, currencies: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Matrix restricted to the given currencies, in the given order; unknown codes are dropped."""
+        codes = [c.upper() for c in currencies if c.upper() in self.index]
+        positions = [self.index[c] for c in codes]
+        return codes, self.matrix[np.ix_(positions, positions)]
+
+class CrossRateCache:
+    """
+    Tables keyed by effective date, plus the requested date -> effective date
+    resolutions. Both are LRU-bounded; resolutions that may still change (dates
+    from today on) expire at the next table publication.
+    """
+
+    def __init__(self, max_tables: int):
+        self.max_tables = max_tables
+        self._tables: OrderedDict[date, CrossRateTable] = OrderedDict()
+        self._resolved: OrderedDict[date, Tuple[date, datetime | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, on_date: date) -> CrossRateTable | None:
+        with self._lock:
+            resolved = self._resolved.get(on_date)
+            if resolved is not None:
+                effective_date, expires_at = resolved
+                if expires_at is not None and nbp_now() >= expires_at:
+                    del self._resolved[on_date]
+                elif effective_date in self._tables:
+                    self._resolved.move_to_end(on_date)
+                    self._tables.move_to_end(effective_date)
+                    self.hits += 1
+                    return self._tables[effective_date]
+            self.misses += 1
+            return None
+
+    def store(self, tables: List[CrossRateTable], window_start: date, window_end: date) -> None:
+        """Stores the tables of a fetch window and resolves every date of the window it answers."""
+        tables = sorted(tables, key=lambda t: t.effective_date)
+        with self._lock:
+            for table in tables:
+                self._tables[table.effective_date] = table
+                self._tables.move_to_end(table.effective_date)
+            position = 0
+            day = max(window_start, tables[0].effective_date) if tables else window_end + timedelta(days=1)
+            while day <= window_end:
+                while position + 1 < len(tables) and tables[position + 1].effective_date <= day:
+                    position += 1
+                self._resolved[day] = (tables[position].effective_date, response_expiry(day, tables[position].effective_date))
+                self._resolved.move_to_end(day)
+                day += timedelta(days=1)
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+            while len(self._resolved) > self.max_tables * LOOKBACK_DAYS:
+                self._resolved.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+            self._resolved.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tables": len(self._tables),
+                "resolved_dates": len(self._resolved),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None
+            }
+
+cross_rate_cache = CrossRateCache(settings.CROSS_RATE_CACHE_SIZE)
+
+def get_table(on_date: date | None = None) -> CrossRateTable:
+    """
+    Cross-rate table in force on on_date (default: today, Warsaw time): the
+    table published that day, or the last one before it.
+    """
+    today = nbp_now().date()
+    on_date = min(on_date or today, today)
+    if on_date < FIRST_TABLE_DATE:
+        raise CrossRateUnavailable(f"No table A is available before {FIRST_TABLE_DATE}")
+
+    table = cross_rate_cache.lookup(on_date)
+    if table is not None:
+        return table
+
+    effective_date = nbp_calendar.business_day_on_or_before(on_date)
+    window_start = max(nbp_calendar.previous_business_day(effective_date), FIRST_TABLE_DATE)
+    tables = _fetch_tables(window_start, on_date)
+    if not tables:
+        # Not where the calendar expects it (e.g. an unlisted holiday): look further back
+        window_start = max(on_date - timedelta(days=LOOKBACK_DAYS), FIRST_TABLE_DATE)
+        tables = _fetch_tables(window_start, on_date)
+    if not tables:
+        raise CrossRateUnavailable(f"No table A published between {window_start} and {on_date}")
+    cross_rate_cache.store(tables, window_start, on_date)
+    return max(tables, key=lambda t: t.effective_date)
+
+def _fetch_tables(window_start: date, window_end: date) -> List[CrossRateTable]:
+    data = nbp_api.fetch_nbp_data(nbp_api._table_range_url(window_start, window_end), raise_on_error=True, range_end=window_end)
+    tables = [CrossRateTable.from_table(t) for t in nbp_api._extract_tables(data)]
+    for table in tables:
+        if table.table_no and nbp_calendar.is_business_day(table.effective_date):
+            expected = nbp_calendar.table_number(table.effective_date)
+            if table.table_no != expected:
+                logger.warning(f"Table {table.table_no} of {table.effective_date} does not match the calendar ({expected}); check NBP_EXTRA_HOLIDAYS")
+    return tables
+
+def convert(amount: float, from_currency: str, to_currency: str, on_date: date | None = None) -> Dict[str, Any]:
+    """Converts amount between any two table A currencies (or PLN) at the mid rates in force on on_date."""
+    table = get_table(on_date)
+    rate = table.rate(from_currency, to_currency)
+    return {
+        "from_currency": from_currency.upper(),
+        "to_currency": to_currency.upper(),
+        "amount": amount,
+        "rate": rate,
+        "result": amount * rate,
+        "effective_date": table.effective_date,
+        "table_no": table.table_no
+    }
+
+def cache_stats() -> Dict[str, Any]:
+    return cross_rate_cache.stats()
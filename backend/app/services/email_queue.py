@@ -0,0 +1,231 @@
+import queue
+import smtplib
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from typing import Any, Dict, List
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class EmailJob:
+    """A prepared message waiting for delivery."""
+    recipient: str
+    message: MIMEMultipart
+    enqueued_at: float
+    attempts: int = 0
+
+# Connection-level errors worth retrying after reconnecting
+TRANSIENT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError, # socket.timeout
+)
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed delivery is worth retrying: connection problems and 4xx
+    (temporary) SMTP replies. Other SMTP errors - 5xx replies, refused senders,
+    unsupported commands - are final. SMTPException derives from OSError, so
+    it is classified before the remaining (network level) OSErrors.
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+class EmailQueue:
+    """
+    Bounded delivery queue drained by a small pool of worker threads. Each worker
+    keeps its own authenticated SMTP connection open and reuses it across messages,
+    so callers only enqueue and return instead of waiting on the SMTP server.
+    """
+
+    def __init__(self, workers: int, max_size: int, max_retries: int, retry_backoff: float, idle_timeout: float):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self._queue: "queue.Queue[EmailJob | None]" = queue.Queue(maxsize=max_size)
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._stop_deadline = 0.0
+        self._stats_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self.connections_opened = 0
+        self._send_latency_total = 0.0
+        self._last_send_latency: float | None = None
+        self._last_delivery_latency: float | None = None
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"email-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Email delivery queue started with {self.workers} worker(s)")
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Lets workers finish queued messages for up to timeout seconds, then closes
+        their SMTP connections. Never blocks longer, even with a full queue;
+        messages still queued by then are not delivered.
+        """
+        if not self._threads:
+            return
+        deadline = self._stop_deadline = time.monotonic() + timeout
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                # One stop marker per worker, queued behind pending messages
+                self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break # Workers see _stopping once the queue drains or times out
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+        if self._queue.qsize():
+            logger.warning(f"Email delivery queue stopped with {self._queue.qsize()} message(s) undelivered")
+        else:
+            logger.info("Email delivery queue stopped")
+
+    # --- Producer side ---
+    def enqueue(self, recipient: str, message: MIMEMultipart) -> bool:
+        """Queues a message without blocking. Returns False if the queue is full."""
+        if not self._threads:
+            self.start()
+        try:
+            self._queue.put_nowait(EmailJob(recipient=recipient, message=message, enqueued_at=time.monotonic()))
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            logger.error(f"Email queue full, dropping message to {recipient}")
+            return False
+
+    # --- Worker side ---
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=30)
+        server.ehlo() # Start SMTP conversation
+        if settings.SMTP_USE_TLS:
+            server.starttls() # Enable TLS encryption
+            server.ehlo() # Restart SMTP conversation over TLS
+        if settings.EMAIL_ADDRESS and settings.EMAIL_PASSWORD:
+            server.login(settings.EMAIL_ADDRESS, settings.EMAIL_PASSWORD)
+        with self._stats_lock:
+            self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP | None):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _worker(self):
+        server: smtplib.SMTP | None = None
+        while True:
+            try:
+                job = self._queue.get(timeout=1.0 if self._stopping.is_set() else self.idle_timeout)
+            except queue.Empty:
+                # Don't hold idle connections; servers drop them anyway
+                self._close(server)
+                server = None
+                if self._stopping.is_set():
+                    return
+                continue
+            if job is None:
+                self._queue.task_done()
+                self._close(server)
+                return
+            try:
+                server = self._deliver(server, job)
+            finally:
+                self._queue.task_done()
+            if self._stopping.is_set() and time.monotonic() >= self._stop_deadline:
+                self._close(server)
+                return
+
+    def _deliver(self, server: smtplib.SMTP | None, job: EmailJob) -> smtplib.SMTP | None:
+        """Sends one job, reconnecting and retrying with exponential backoff. Returns the connection to reuse."""
+        while True:
+            job.attempts += 1
+            started = time.monotonic()
+            try:
+                if server is None:
+                    server = self._connect()
+                server.sendmail(settings.EMAIL_ADDRESS, job.recipient, job.message.as_string())
+                finished = time.monotonic()
+                with self._stats_lock:
+                    self.sent += 1
+                    self._last_send_latency = finished - started
+                    self._send_latency_total += finished - started
+                    self._last_delivery_latency = finished - job.enqueued_at
+                logger.info(f"Successfully sent alert email to {job.recipient}")
+                return server
+            except smtplib.SMTPAuthenticationError:
+                logger.error("SMTP Authentication failed. Check your Gmail App Password and email settings.")
+                self._close(server)
+                server = None
+            except smtplib.SMTPRecipientsRefused as e:
+                logger.error(f"Recipient refused for {job.recipient}: {e}")
+            except (smtplib.SMTPException, OSError) as e:
+                if is_transient(e) or not isinstance(e, smtplib.SMTPResponseException):
+                    # Retry on a fresh connection; a permanent reply leaves this one usable (smtplib resets it)
+                    self._close(server)
+                    server = None
+                if not is_transient(e):
+                    logger.error(f"Permanent SMTP error sending to {job.recipient}: {e}")
+                elif job.attempts <= self.max_retries and not self._stopping.is_set():
+                    delay = self.retry_backoff * (2 ** (job.attempts - 1))
+                    with self._stats_lock:
+                        self.retries += 1
+                    logger.warning(f"SMTP error sending to {job.recipient} (attempt {job.attempts}): {e}; retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                else:
+                    logger.error(f"Giving up on email to {job.recipient} after {job.attempts} attempts: {e}")
+            except Exception as e:
+                logger.error(f"Failed to send email notification: {str(e)}")
+            with self._stats_lock:
+                self.failed += 1
+            return server
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "workers": len(self._threads),
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "dropped": self.dropped,
+                "connections_opened": self.connections_opened,
+                "avg_send_latency_s": round(self._send_latency_total / self.sent, 4) if self.sent else None,
+                "last_send_latency_s": self._last_send_latency,
+                "last_delivery_latency_s": self._last_delivery_latency,
+            }
+
+email_queue = EmailQueue(
+    workers=settings.EMAIL_WORKERS,
+    max_size=settings.EMAIL_QUEUE_MAX_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    idle_timeout=settings.EMAIL_IDLE_TIMEOUT,
+)
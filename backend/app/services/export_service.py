@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from datetime import date
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+import yaml
+from lxml import etree
+
+# Records serialized per yielded chunk: large enough to keep per-chunk overhead
+# low, small enough that memory stays flat and the first bytes go out quickly.
+EXPORT_BATCH_SIZE = 500
+
+def _batches(records: Iterable[Dict[str, Any]], size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _plain(value: Any) -> Any:
+    """Dates become ISO strings; everything else is left as is."""
+    return value.isoformat() if isinstance(value, date) else value
+
+def iter_json(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Streams records as a JSON array, byte-identical to
+    json.dumps(records, indent=2) with dates as ISO strings.
+    """
+    first = True
+    yield b"["
+    for batch in _batches(records):
+        parts = []
+        for record in batch:
+            item = json.dumps({k: _plain(v) for k, v in record.items()}, indent=2)
+            parts.append(("\n  " if first else ",\n  ") + item.replace("\n", "\n  "))
+            first = False
+        yield "".join(parts).encode("utf-8")
+    yield b"]" if first else b"\n]"
+
+def iter_xml(records: Iterable[Dict[str, Any]], root_attrs: Dict[str, str], record_name: str) -> Iterator[bytes]:
+    """
+    Streams records as <Data ...><record_name>...</record_name>...</Data> using
+    lxml's incremental writer; only the current batch of elements is held in memory.
+    """
+    buffer = io.BytesIO()
+
+    def drain() -> bytes:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    with etree.xmlfile(buffer, encoding="UTF-8") as xf:
+        xf.write_declaration()
+        with xf.element("Data", root_attrs):
+            xf.write("\n")
+            for batch in _batches(records):
+                for record in batch:
+                    item = etree.Element(record_name)
+                    for key, value in record.items():
+                        etree.SubElement(item, key).text = str(_plain(value))
+                    etree.indent(item, space="  ", level=1)
+                    xf.write("  ")
+                    xf.write(item)
+                    xf.write("\n")
+                xf.flush()
+                yield drain()
+    yield drain()
+
+def iter_yaml(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Streams records as a YAML document {'Data': [...]}, one batch of list items at a time."""
+    yield b"Data:\n"
+    for batch in _batches(records):
+        items = [{k: _plain(v) for k, v in record.items()} for record in batch]
+        yield yaml.dump(items, allow_unicode=True, default_flow_style=False).encode("utf-8")
+
+def iter_csv(records: Iterable[Dict[str, Any]], fieldnames: List[str]) -> Iterator[bytes]:
+    """Streams records as CSV with a header row; None values become empty cells."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator="\n")
+    writer.writeheader()
+    for batch in _batches(records):
+        writer.writerows({k: _plain(v) for k, v in record.items()} for record in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
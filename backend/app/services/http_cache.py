@@ -0,0 +1,96 @@
+import hashlib
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable
+from fastapi import Request, Response
+from ..config import settings
+from .nbp_cache import NBP_TIMEZONE, next_publication_time, nbp_now
+from .rate_series import RateFrame
+
+# HTTP validators for rate data. The dataset version is a hash of the frame's
+# columns (raw array bytes, so nothing is serialized) plus the parameters that
+# shape the representation; Last-Modified is the publication time of the latest
+# effective date in the response. Fully historical ranges get a long max-age,
+# ranges that include today one that ends at the next table publication.
+
+def frame_etag(frame: RateFrame, *parts: Any) -> str:
+    """Strong ETag of a RateFrame's contents and the given representation parameters."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    for code in frame.codes():
+        series = frame[code]
+        digest.update(code.encode("utf-8"))
+        digest.update(series.dates.tobytes())
+        digest.update(series.values.tobytes())
+    return f'"{digest.hexdigest()}"'
+
+def static_etag(content: Any) -> str:
+    """Strong ETag of a small static payload (e.g. configuration lists)."""
+    return f'"{hashlib.blake2b(repr(content).encode("utf-8"), digest_size=16).hexdigest()}"'
+
+def frame_last_modified(frame: RateFrame) -> datetime | None:
+    """Publication time (table A, Warsaw) of the latest effective date in the frame."""
+    latest = max((frame[code].dates[-1] for code in frame.codes() if len(frame[code])), default=None)
+    if latest is None:
+        return None
+    hour, minute = (int(part) for part in settings.NBP_PUBLICATION_TIME.split(':'))
+    published = datetime.combine(latest.astype(date), time(hour, minute), tzinfo=NBP_TIMEZONE)
+    return min(published, nbp_now()).replace(microsecond=0)
+
+def cache_control_for_range(end_date: date) -> str:
+    """Long-lived for ranges ending before today (final data), short for ranges that include today."""
+    now = nbp_now()
+    if end_date < now.date():
+        return f"public, max-age={settings.HTTP_CACHE_HISTORICAL_MAX_AGE}"
+    until_publication = int((next_publication_time(now) - now).total_seconds())
+    return f"public, max-age={max(0, min(until_publication, settings.HTTP_CACHE_RECENT_MAX_AGE))}"
+
+def validator_headers(etag: str, last_modified: datetime | None, cache_control: str) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+def encoded_etag(etag: str, encoding: str | None) -> str:
+    """ETag of a content-coded representation: '"<hash>-<encoding>"'."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def base_etag(etag: str) -> str:
+    """ETag without the W/ prefix and the content-coding suffix added by encoded_etag."""
+    value = etag[2:] if etag.startswith("W/") else etag
+    base, _, encoding = value.strip('"').rpartition("-")
+    return f'"{base}"' if base and encoding in ("gzip", "br", "zstd") else value
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, ignoring the content-coding suffix of encoded_etag."""
+    candidates: Iterable[str] = (value.strip() for value in header.split(","))
+    return any(candidate == "*" or base_etag(candidate) == etag for candidate in candidates)
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """
+    Evaluates If-None-Match, or If-Modified-Since when no If-None-Match is
+    sent (RFC 9110 precedence).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+def is_not_modified_stored(request: Request, headers: Dict[str, str]) -> bool:
+    """is_not_modified against the validator headers a stored response was served with."""
+    last_modified = headers.get("Last-Modified")
+    return is_not_modified(request, base_etag(headers["ETag"]), parsedate_to_datetime(last_modified) if last_modified else None)
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
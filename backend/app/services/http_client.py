@@ -0,0 +1,93 @@
+import httpx
+import logging
+import threading
+from urllib.parse import urlsplit
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Process-wide clients shared by all NBP and SOAP upstream traffic, so TCP/TLS
+# connections are kept alive and reused instead of being set up per request.
+# Created in main.lifespan via startup() and closed via shutdown(); code running
+# outside the app (scripts, the standalone SOAP server) gets them lazily.
+_async_client: httpx.AsyncClient | None = None
+_sync_client: httpx.Client | None = None
+_sync_lock = threading.Lock()
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is used when enabled in settings and the optional 'h2' package is installed."""
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _upstream_hosts() -> list[str]:
+    """Hosts that get a dedicated, per-host limited connection pool."""
+    nbp_host = urlsplit(settings.NBP_API_BASE_URL).netloc
+    soap_host = f"{settings.SOAP_SERVICE_HOST}:{settings.SOAP_SERVICE_PORT}"
+    return [nbp_host, soap_host]
+
+def _limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+
+def _client_kwargs(transport_cls) -> dict:
+    """
+    Common client configuration. Each upstream host is mounted on its own transport
+    limited to HTTP_PER_HOST_LIMIT connections; everything else shares the default
+    pool of HTTP_POOL_SIZE connections.
+    """
+    http2 = _http2_enabled()
+    mounts = {
+        f"all://{host}": transport_cls(http2=http2, limits=_limits(settings.HTTP_PER_HOST_LIMIT))
+        for host in _upstream_hosts()
+    }
+    return {
+        "http2": http2,
+        "limits": _limits(settings.HTTP_POOL_SIZE),
+        "mounts": mounts,
+        "timeout": httpx.Timeout(15.0),
+    }
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the shared async client (for code running on the application event loop)."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(**_client_kwargs(httpx.AsyncHTTPTransport))
+    return _async_client
+
+def get_sync_client() -> httpx.Client:
+    """Returns the shared, thread-safe sync client (scheduler jobs, SOAP handlers)."""
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(**_client_kwargs(httpx.HTTPTransport))
+    return _sync_client
+
+async def startup():
+    """Creates the shared clients. Called from main.lifespan."""
+    get_async_client()
+    get_sync_client()
+    logger.info(
+        f"Shared HTTP clients started (pool={settings.HTTP_POOL_SIZE}, "
+        f"per_host={settings.HTTP_PER_HOST_LIMIT}, http2={_http2_enabled()})"
+    )
+
+async def shutdown():
+    """Closes the shared clients and their pooled connections. Called from main.lifespan."""
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    with _sync_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+    logger.info("Shared HTTP clients closed")
@@ -0,0 +1,176 @@
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, List
+import ijson
+import yaml
+from fastapi import UploadFile
+from lxml import etree
+from ..config import settings
+from . import columnar
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an uploaded file exceeds IMPORT_MAX_BYTES."""
+
+async def spool_upload(file: UploadFile) -> BinaryIO:
+    """
+    Copies an upload into a spooled temp file (in memory up to
+    IMPORT_SPOOL_MAX_MEMORY, on disk beyond), enforcing IMPORT_MAX_BYTES while
+    copying. The returned file is rewound and ready for a streaming parser.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MAX_MEMORY)
+    total = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        total += len(chunk)
+        if total > settings.IMPORT_MAX_BYTES:
+            spooled.close()
+            raise UploadTooLarge(f"File exceeds the {settings.IMPORT_MAX_BYTES} byte upload limit")
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+# --- XML ---
+def iter_xml_records(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Streams records from the exported <Data><CurrencyRate>... format, or the
+    simple <Record><Date/><Value/></Record> fallback, using iterparse and clearing
+    each processed element so memory does not grow with the file.
+    """
+    root_tag = None
+    for event, element in etree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root_tag is None:
+                root_tag = element.tag
+            continue
+        if root_tag == "Data" and element.tag == "CurrencyRate":
+            yield {
+                "Date": element.findtext("Date"),
+                "Value": float(element.findtext("Rate")),
+                "Currency": element.findtext("Currency")
+            }
+        elif root_tag != "Data" and element.tag == "Record":
+            yield {
+                "Date": element.findtext("Date"),
+                "Value": float(element.findtext("Value"))
+            }
+        else:
+            continue
+        # Free the processed record and any siblings already handled
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+def parse_xml(stream: BinaryIO) -> List[Dict[str, Any]]:
+    return sorted(iter_xml_records(stream), key=lambda x: x["Date"])
+
+# --- JSON ---
+def _json_items_prefix(stream: BinaryIO) -> str | None:
+    """ijson prefix of the record array: a top-level array, or the 'data' key of an object."""
+    while first := stream.read(1):
+        if not first.isspace():
+            stream.seek(stream.tell() - 1)
+            return {b"[": "item", b"{": "data.item"}.get(first)
+    return None
+
+def iter_json_records(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Streams records from a JSON array (or {"data": [...]}) with an incremental parser."""
+    prefix = _json_items_prefix(stream)
+    if prefix is None:
+        raise ValueError("Invalid JSON format - expected array of records")
+    for record in ijson.items(stream, prefix, use_float=True):
+        yield {
+            "Date": record.get("Date") or record.get("date"),
+            "Value": float(record.get("Rate") or record.get("rate") or record.get("Value") or record.get("value")),
+            "Currency": record.get("Currency") or record.get("currency", "Unknown")
+        }
+
+def parse_json(stream: BinaryIO) -> List[Dict[str, Any]]:
+    return sorted(iter_json_records(stream), key=lambda x: x["Date"])
+
+# --- YAML ---
+def _yaml_scalar(loader: yaml.SafeLoader, event: yaml.ScalarEvent) -> Any:
+    """Value of a scalar event, resolved and constructed exactly as yaml.safe_load would."""
+    tag = event.tag
+    if tag is None or tag == "!":
+        tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+    node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    constructor = loader.yaml_constructors.get(tag, yaml.SafeLoader.construct_undefined)
+    return constructor(loader, node)
+
+def _iter_yaml_mappings(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Walks YAML parser events and yields each flat mapping of the record
+    sequence (top-level, or under a top-level 'Data' key) as it completes.
+    Scalars get the same types as with yaml.safe_load (0, null, dates, quoted
+    strings); nested values inside a record are skipped.
+    """
+    loader = yaml.SafeLoader(stream)
+    depth = 0 # Collection nesting depth
+    records_depth = None # Depth of the record sequence once found
+    pending_key = None # Top-level mapping key awaiting its value
+    record = None
+    record_key = None
+    has_key = False # Whether record_key holds a key awaiting its value (keys may be null)
+
+    try:
+        while loader.check_event():
+            event = loader.get_event()
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                depth += 1
+                if records_depth is None and isinstance(event, yaml.SequenceStartEvent):
+                    # Top-level sequence, or the sequence under the 'Data' key
+                    if depth == 1 or (depth == 2 and pending_key == "Data"):
+                        records_depth = depth
+                elif records_depth is not None and depth == records_depth + 1 and isinstance(event, yaml.MappingStartEvent):
+                    record, has_key = {}, False
+                elif record is not None and has_key:
+                    has_key = False # Nested value inside a record: skip it
+                pending_key = None
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                if record is not None and depth == records_depth + 1:
+                    yield record
+                    record = None
+                elif records_depth is not None and depth == records_depth:
+                    return
+                depth -= 1
+            elif isinstance(event, yaml.ScalarEvent):
+                if record is not None and depth == records_depth + 1:
+                    if not has_key:
+                        record_key, has_key = _yaml_scalar(loader, event), True
+                    else:
+                        record[record_key] = _yaml_scalar(loader, event)
+                        has_key = False
+                elif depth == 1 and records_depth is None:
+                    # Alternate key / value scalars of the top-level mapping
+                    pending_key = event.value if pending_key is None else None
+    finally:
+        loader.dispose()
+
+def iter_yaml_records(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Streams valid records from YAML, skipping entries without a date or value."""
+    for record in _iter_yaml_mappings(stream):
+        formatted_record = {
+            "Date": record.get("Date"),
+            "Value": float(record.get("Rate", 0) or record.get("Value", 0)),
+            "Currency": record.get("Currency", "Unknown").upper()
+        }
+        if not formatted_record["Date"] or formatted_record["Value"] == 0:
+            continue
+        yield formatted_record
+
+def parse_yaml(stream: BinaryIO) -> List[Dict[str, Any]]:
+    return sorted(iter_yaml_records(stream), key=lambda x: x["Date"])
+
+# --- Columnar (Parquet / Arrow / CSV) ---
+def _frame_records(frame) -> List[Dict[str, Any]]:
+    """Date-ordered records in the same shape as the other importers."""
+    return frame.to_records("Value", "Currency")
+
+def parse_parquet(stream: BinaryIO) -> List[Dict[str, Any]]:
+    return _frame_records(columnar.read_parquet(stream))
+
+def parse_arrow(stream: BinaryIO) -> List[Dict[str, Any]]:
+    return _frame_records(columnar.read_arrow(stream))
+
+def parse_csv(stream: BinaryIO) -> List[Dict[str, Any]]:
+    return _frame_records(columnar.read_csv(stream))
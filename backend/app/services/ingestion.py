@@ -0,0 +1,226 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+from apscheduler.schedulers.base import BaseScheduler
+from apscheduler.triggers.cron import CronTrigger
+from .. import crud, database
+from ..config import settings
+from . import nbp_api, nbp_calendar, rate_store
+from .nbp_cache import NBP_TIMEZONE, nbp_now
+from .rate_series import GOLD_SERIES
+
+logger = logging.getLogger(__name__)
+
+# Proactive ingestion into the local rate store, so user requests are served
+# from the database instead of waiting on NBP:
+#   daily    - shortly after each table A publication, re-fetches the last
+#              INGEST_LOOKBACK_DAYS for all currencies and gold; retried until
+#              today's table is out.
+#   backfill - fills every gap in RateCoverage back to INGEST_BACKFILL_START,
+#              newest windows first, in parallel and rate limited. Coverage is
+#              recorded per stored window, so a restarted backfill only plans
+#              what is still missing.
+
+DAILY_JOB_ID = "ingest_daily"
+DAILY_RETRY_JOB_ID = "ingest_daily_retry"
+BACKFILL_JOB_ID = "ingest_backfill"
+
+_scheduler: BaseScheduler | None = None
+_stop = threading.Event()
+_backfill_lock = threading.Lock()
+
+class RateLimiter:
+    """Spaces acquire() calls at least 1 / rate seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            _stop.wait(wait)
+
+_limiter = RateLimiter(settings.INGEST_RATE_LIMIT)
+
+def ingested_series() -> List[str]:
+    """Every configured currency plus gold."""
+    return [c["value"].upper() for c in settings.AVAILABLE_CURRENCIES] + [GOLD_SERIES]
+
+def _save_state(job: str, **fields: Any) -> None:
+    try:
+        with database.SessionLocal() as db:
+            crud.save_ingestion_state(db, job, updated_at=nbp_now(), **fields)
+    except Exception as e:
+        logger.error(f"Could not save {job} ingestion state: {e}")
+
+def _fetch_window(series_list: List[str], start_date: date, end_date: date) -> Dict[str, date | None]:
+    """One rate-limited request per group: whole table A for the currencies, and gold."""
+    latest: Dict[str, date | None] = {}
+    currencies = [s for s in series_list if s != GOLD_SERIES]
+    if currencies:
+        _limiter.acquire()
+        latest.update(rate_store.ingest_range(currencies, start_date, end_date))
+    if GOLD_SERIES in series_list and not _stop.is_set():
+        _limiter.acquire()
+        latest.update(rate_store.ingest_range([GOLD_SERIES], start_date, end_date))
+    return latest
+
+# --- Daily ingestion ---
+def run_daily(attempt: int = 0) -> None:
+    """Stores the latest tables; reschedules itself while today's table A is missing (never on holidays)."""
+    today = nbp_now().date()
+    start_date = today - timedelta(days=settings.INGEST_LOOKBACK_DAYS)
+    logger.info(f"Daily ingestion of {start_date} - {today} (attempt {attempt + 1})")
+    try:
+        latest = _fetch_window(ingested_series(), start_date, today)
+    except nbp_api.NBPFetchError as e:
+        logger.warning(f"Daily ingestion failed: {e}")
+        _save_state("daily", status="failed", last_error=str(e)[:500])
+        _schedule_retry(attempt)
+        return
+
+    table_date = max((d for code, d in latest.items() if code != GOLD_SERIES and d is not None), default=None)
+    published = table_date == today or not nbp_calendar.is_business_day(today)
+    _save_state("daily", status="completed" if published else "waiting", cursor=table_date, last_error=None)
+    if published:
+        logger.info(f"Daily ingestion stored table A of {table_date}")
+    else:
+        logger.info(f"Today's table A is not published yet (latest {table_date})")
+        _schedule_retry(attempt)
+
+def _schedule_retry(attempt: int) -> None:
+    if _scheduler is None or _stop.is_set() or attempt + 1 > settings.INGEST_MAX_RETRIES:
+        return
+    run_date = datetime.now(NBP_TIMEZONE) + timedelta(minutes=settings.INGEST_RETRY_MINUTES)
+    _scheduler.add_job(run_daily, 'date', run_date=run_date, args=[attempt + 1], id=DAILY_RETRY_JOB_ID, replace_existing=True)
+
+# --- Historical backfill ---
+def _windows(start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """NBP-sized windows covering [start_date, end_date], newest first."""
+    windows = []
+    while end_date >= start_date:
+        window_start = max(start_date, end_date - timedelta(days=nbp_api.MAX_NBP_RANGE_DAYS - 1))
+        windows.append((window_start, end_date))
+        end_date = window_start - timedelta(days=1)
+    return windows
+
+def plan_backfill(start_date: date, end_date: date) -> List[Tuple[date, date, List[str]]]:
+    """(window start, window end, series with a gap in it) for each window that still has gaps."""
+    with database.SessionLocal() as db:
+        gaps = {
+            series: rate_store.find_missing_ranges(crud.get_coverage(db, series, start_date, end_date), start_date, end_date)
+            for series in ingested_series()
+        }
+    plan = []
+    for window_start, window_end in _windows(start_date, end_date):
+        missing = [
+            series for series, ranges in gaps.items()
+            if any(s <= window_end and e >= window_start for s, e in ranges)
+        ]
+        if missing:
+            plan.append((window_start, window_end, missing))
+    return plan
+
+def run_backfill() -> None:
+    """Fills all coverage gaps back to INGEST_BACKFILL_START; a no-op when another backfill is running."""
+    if not _backfill_lock.acquire(blocking=False):
+        logger.info("Backfill already running; skipping")
+        return
+    try:
+        start_date = date.fromisoformat(settings.INGEST_BACKFILL_START)
+        end_date = nbp_now().date() - timedelta(days=1)
+        plan = plan_backfill(start_date, end_date)
+        if not plan:
+            _save_state("backfill", status="completed", cursor=start_date, windows_total=0, windows_done=0, failures=0)
+            return
+
+        logger.info(f"Backfilling {len(plan)} window(s) between {start_date} and {end_date}")
+        _save_state("backfill", status="running", windows_total=len(plan), windows_done=0, failures=0, last_error=None)
+        done, failures, oldest, last_error = 0, 0, None, None
+        with ThreadPoolExecutor(max_workers=settings.INGEST_BACKFILL_WORKERS, thread_name_prefix="backfill") as executor:
+            futures = {
+                executor.submit(_backfill_window, window_start, window_end, series): window_start
+                for window_start, window_end, series in plan
+            }
+            for future in as_completed(futures):
+                try:
+                    if not future.result():
+                        continue # Skipped after stop()
+                    done += 1
+                    oldest = min(oldest or futures[future], futures[future])
+                except Exception as e:
+                    failures += 1
+                    last_error = str(e)[:500]
+                    logger.warning(f"Backfill window starting {futures[future]} failed: {e}")
+                _save_state("backfill", status="running", cursor=oldest, windows_done=done, failures=failures, last_error=last_error)
+
+        status = "completed" if done == len(plan) else "partial"
+        _save_state("backfill", status=status, cursor=oldest, windows_done=done, failures=failures, last_error=last_error)
+        logger.info(f"Backfill {status}: {done}/{len(plan)} window(s), {failures} failure(s)")
+    finally:
+        _backfill_lock.release()
+
+def _backfill_window(window_start: date, window_end: date, series: List[str]) -> bool:
+    if _stop.is_set():
+        return False
+    _fetch_window(series, window_start, window_end)
+    return True
+
+# --- Scheduling ---
+def start(scheduler: BaseScheduler) -> None:
+    """
+    Registers the ingestion jobs on the (running) scheduler. Both also run once
+    right away, so a restart catches up on whatever was missed.
+    """
+    global _scheduler
+    if not settings.INGEST_ENABLED:
+        logger.info("Ingestion jobs disabled")
+        return
+    _scheduler = scheduler
+    _stop.clear()
+    hour, minute = (int(part) for part in settings.NBP_PUBLICATION_TIME.split(':'))
+    hour, minute = divmod((hour * 60 + minute + settings.INGEST_DELAY_MINUTES) % (24 * 60), 60)
+    now = datetime.now(NBP_TIMEZONE)
+    scheduler.add_job(
+        run_daily, CronTrigger(day_of_week='mon-fri', hour=hour, minute=minute, timezone=NBP_TIMEZONE),
+        id=DAILY_JOB_ID, replace_existing=True, coalesce=True, misfire_grace_time=3600, next_run_time=now
+    )
+    if settings.INGEST_BACKFILL_ENABLED:
+        # Nightly re-run picks up windows that failed or were interrupted
+        scheduler.add_job(
+            run_backfill, CronTrigger(hour=3, minute=0, timezone=NBP_TIMEZONE),
+            id=BACKFILL_JOB_ID, replace_existing=True, coalesce=True, misfire_grace_time=3600, next_run_time=now
+        )
+    logger.info(f"Ingestion jobs scheduled (daily at {hour:02d}:{minute:02d} Warsaw time, backfill from {settings.INGEST_BACKFILL_START})")
+
+def stop() -> None:
+    """Makes running jobs finish their current window and stop; call before the scheduler shuts down."""
+    _stop.set()
+
+def status() -> Dict[str, Any]:
+    with database.SessionLocal() as db:
+        states = crud.get_ingestion_states(db)
+    return {
+        "enabled": settings.INGEST_ENABLED,
+        "backfill_running": _backfill_lock.locked(),
+        "jobs": {
+            state.job: {
+                "status": state.status,
+                "cursor": state.cursor,
+                "windows_total": state.windows_total,
+                "windows_done": state.windows_done,
+                "failures": state.failures,
+                "last_error": state.last_error,
+                "updated_at": state.updated_at,
+            }
+            for state in states
+        },
+    }
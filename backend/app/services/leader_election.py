@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from .. import database
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class LeaderElector:
+    """
+    Elects one process (across uvicorn workers and nodes sharing the database)
+    to run singleton work: scheduled jobs and the standalone SOAP listener.
+
+    The leader holds a session-level Postgres advisory lock on a dedicated
+    connection. If the leader process dies its connection closes and Postgres
+    releases the lock; a follower polling every poll_interval seconds then
+    takes over. A leader that loses its connection demotes itself.
+    """
+
+    def __init__(self, lock_id: int, poll_interval: float, enabled: bool = True):
+        self.lock_id = lock_id
+        self.poll_interval = poll_interval
+        self.enabled = enabled
+        self._on_elected: Callable[[], None] | None = None
+        self._on_demoted: Callable[[], None] | None = None
+        self._connection: Connection | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.leader_since: float | None = None
+        self.elections = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader_since is not None
+
+    # --- Lifecycle ---
+    def start(self, on_elected: Callable[[], None], on_demoted: Callable[[], None]):
+        """Starts campaigning; on_elected / on_demoted run in the elector thread."""
+        if self._thread is not None:
+            return
+        self._on_elected, self._on_demoted = on_elected, on_demoted
+        self._stop.clear()
+        if not self.enabled:
+            # Single-process deployments: this process is always the leader
+            self._promote()
+            return
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+        self._thread.start()
+        logger.info(f"Leader election started (advisory lock {self.lock_id}, pid {os.getpid()})")
+
+    def stop(self, timeout: float = 10.0):
+        """Stops campaigning; a leader stops its singleton work and releases the lock."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self.is_leader:
+            self._demote(release=True)
+
+    # --- Election loop ---
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.is_leader:
+                    self._check_connection()
+                elif self._try_acquire():
+                    self._promote()
+            except Exception as e:
+                logger.error(f"Leader election error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def _try_acquire(self) -> bool:
+        connection = database.engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}).scalar()
+            connection.commit() # The lock is session-level; do not sit idle in a transaction
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection # Kept open (and out of the pool) for as long as we lead
+        return True
+
+    def _check_connection(self):
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+        except Exception as e:
+            logger.error(f"Lost the leader lock connection: {e}")
+            self._demote(release=False)
+
+    def _promote(self):
+        with self._lock:
+            self.leader_since = time.time()
+            self.elections += 1
+        logger.info(f"Process {os.getpid()} elected leader")
+        try:
+            self._on_elected()
+        except Exception as e:
+            logger.error(f"Error starting leader services: {e}")
+
+    def _demote(self, release: bool):
+        with self._lock:
+            self.leader_since = None
+        logger.info(f"Process {os.getpid()} is no longer leader")
+        try:
+            self._on_demoted()
+        except Exception as e:
+            logger.error(f"Error stopping leader services: {e}")
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            if release:
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": self.lock_id})
+                connection.commit()
+        except Exception as e:
+            logger.warning(f"Could not release leader lock: {e}")
+        finally:
+            # Never hand a connection that may still hold the lock back to the pool
+            connection.invalidate()
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pid": os.getpid(),
+            "is_leader": self.is_leader,
+            "leader_for_s": round(time.time() - self.leader_since, 1) if self.leader_since else None,
+            "elections": self.elections,
+            "lock_id": self.lock_id,
+        }
+
+leader_elector = LeaderElector(
+    lock_id=settings.LEADER_LOCK_ID,
+    poll_interval=settings.LEADER_POLL_INTERVAL,
+    enabled=settings.LEADER_ELECTION_ENABLED,
+)
@@ -1,7 +1,13 @@
-import requests
+import asyncio
+import httpx
 from datetime import date, timedelta
 from typing import List, Dict, Any, Literal, Union
 from ..config import settings
+from . import http_client, nbp_calendar
+from .nbp_cache import ResponseCache, latest_table_date, nbp_now, response_expiry
+from .rate_series import RateSeries, GOLD_SERIES
+from .shared_cache import shared_cache
+from .single_flight import SingleFlight
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -9,148 +15,498 @@ logger = logging.getLogger(__name__)
 
 NBP_API_BASE_URL = settings.NBP_API_BASE_URL
 MAX_NBP_RANGE_DAYS = 93 # NBP limit for date ranges in a single request
+AS_OF_MAX_TABLES = 3 # Tables tried by get_rate_as_of when the expected one is missing (late publication, unlisted holiday)
 
-def fetch_nbp_data(url: str) -> List[Dict[str, Any]] | None:
-    """Helper function to fetch data from NBP API with error handling."""
+# Responses for ranges ending before today never expire; ranges touching today
+# expire at the next table A publication, or soon if the latest table is overdue
+# (see nbp_cache.response_expiry)
+response_cache = ResponseCache(settings.NBP_CACHE_MAX_BYTES)
+
+# Concurrent identical requests (same URL, i.e. same series and chunk range)
+# wait on a single upstream call, in threads and on the event loop alike
+inflight = SingleFlight("nbp")
+
+_FAILED = object() # Marks a chunk that failed when errors are not raised
+
+class NBPFetchError(Exception):
+    """Raised (on request) when an NBP call fails for a reason other than 'no data'."""
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit, miss and eviction counters of the NBP response cache."""
+    return response_cache.stats()
+
+def coalescing_stats() -> Dict[str, Any]:
+    """How many NBP calls were served by joining an identical in-flight call."""
+    return inflight.stats()
+
+def fetch_nbp_data(url: str, raise_on_error: bool = False, range_end: date | None = None) -> List[Dict[str, Any]] | None:
+    """
+    Helper function to fetch data from NBP API with error handling.
+
+    A 404 always yields None, since NBP uses it for "no data in this period".
+    Any other failure yields None as well, unless raise_on_error is set, in
+    which case NBPFetchError is raised so callers can tell the two apart.
+    When range_end (last date the URL covers) is given, successful responses,
+    including 404s, are served from and stored in the response cache.
+    Concurrent calls for the same URL share one upstream request.
+    """
+    if range_end is not None:
+        hit, cached = response_cache.get(url)
+        if hit:
+            return cached
+    try:
+        return inflight.do(url, _fetch_nbp_data, url, range_end)
+    except NBPFetchError:
+        if raise_on_error:
+            raise
+        return None
+
+def _newest_date(data: Any) -> date | None:
+    """Newest effective date in a range response of any endpoint (rates, tables, gold)."""
+    entries = data.get('rates') if isinstance(data, dict) else data
+    dates = [e.get('effectiveDate') or e.get('data') for e in entries or [] if isinstance(e, dict)]
+    dates = [d for d in dates if d]
+    return date.fromisoformat(max(dates)) if dates else None
+
+def _fetch_nbp_data(url: str, range_end: date | None) -> List[Dict[str, Any]] | None:
+    """Single upstream request behind fetch_nbp_data; failures other than 404 raise NBPFetchError."""
     try:
-        response = requests.get(
+        # Shared pooled client: keep-alive connections are reused across calls
+        response = http_client.get_sync_client().get(
             url,
             headers={'Accept': 'application/json'},
             timeout=15 # Increased timeout
         )
-        response.raise_for_status() # Raises HTTPError for bad responses (4xx or 5xx)
-        return response.json()
-    except requests.exceptions.Timeout:
+        response.raise_for_status() # Raises HTTPStatusError for bad responses (4xx or 5xx)
+        data = response.json()
+        if range_end is not None:
+            response_cache.put(url, data, response_expiry(range_end, _newest_date(data)))
+        return data
+    except httpx.TimeoutException:
         logger.error(f"Timeout while requesting {url}")
-    except requests.exceptions.HTTPError as http_err:
-        logger.error(f"HTTP error occurred: {http_err} - URL: {url}")
+    except httpx.HTTPStatusError as http_err:
         # NBP often returns 404 for no data or bad date ranges, 400 for bad requests
-        if response.status_code == 404:
+        if http_err.response.status_code == 404:
             logger.warning(f"NBP API returned 404 for {url}. Often means no data for the period or invalid query.")
-        elif response.status_code == 400:
+            if range_end is not None:
+                response_cache.put(url, None, response_expiry(range_end, None))
+            return None
+        logger.error(f"HTTP error occurred: {http_err} - URL: {url}")
+        if http_err.response.status_code == 400:
              logger.warning(f"NBP API returned 400 Bad Request for {url}. Check parameters.")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching data from {url}: {e}")
     except Exception as e:
         logger.error(f"An unexpected error occurred fetching {url}: {e}")
-    return None
+    raise NBPFetchError(f"Failed to fetch {url}")
 
 
-def get_currency_data_for_range(currency: str, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+def _date_chunks(start_date: date, end_date: date) -> List[tuple[date, date]]:
     """
-    Fetches currency data for a single currency, handling NBP date range limits
-    by splitting into multiple requests if necessary.
+    Splits [start_date, end_date] into consecutive chunks respecting the NBP range
+    limit, each trimmed to its first and last business day. Spans that cannot hold
+    a table (weekends, holidays, dates after today) yield no chunk and no request.
     """
-    all_rates = []
+    end_date = min(end_date, nbp_now().date())
+    chunks = []
     current_start = start_date
-    currency = currency.upper()
-
     while current_start <= end_date:
-        # Calculate end date for this chunk, respecting NBP limit and overall end_date
         chunk_end = min(current_start + timedelta(days=MAX_NBP_RANGE_DAYS - 1), end_date)
-        start_str = current_start.strftime('%Y-%m-%d')
-        end_str = chunk_end.strftime('%Y-%m-%d')
+        trimmed = nbp_calendar.trim(current_start, chunk_end)
+        if trimmed is not None:
+            chunks.append(trimmed)
+        current_start = chunk_end + timedelta(days=1)
+    return chunks
 
-        url = f"{NBP_API_BASE_URL}/exchangerates/rates/a/{currency}/{start_str}/{end_str}/"
-        logger.info(f"Fetching NBP currency data: {currency} from {start_str} to {end_str}")
-        data = fetch_nbp_data(url)
+def _currency_range_url(currency: str, start_date: date, end_date: date) -> str:
+    return f"{NBP_API_BASE_URL}/exchangerates/rates/a/{currency}/{start_date:%Y-%m-%d}/{end_date:%Y-%m-%d}/"
 
-        if data and isinstance(data, dict) and 'rates' in data:
-            # Ensure we have the expected structure before appending
-             all_rates.extend(data['rates'])
-        elif data:
-             logger.warning(f"Unexpected data format received from NBP for {currency}: {data}")
-        # If fetch_nbp_data returned None due to error, loop continues but logs error
+def _currency_date_url(currency: str, on_date: date) -> str:
+    return f"{NBP_API_BASE_URL}/exchangerates/rates/a/{currency}/{on_date:%Y-%m-%d}/"
 
-        # Move to the next chunk
-        current_start = chunk_end + timedelta(days=1)
+def _gold_range_url(start_date: date, end_date: date) -> str:
+    return f"{NBP_API_BASE_URL}/cenyzlota/{start_date:%Y-%m-%d}/{end_date:%Y-%m-%d}/"
 
-    # Deduplicate rates (NBP might return overlapping dates if chunk boundaries align with weekends/holidays)
-    # This assumes 'effectiveDate' is unique per day for a currency
-    unique_rates = []
-    seen_dates = set()
-    for rate in all_rates:
-        if rate['effectiveDate'] not in seen_dates:
-            unique_rates.append(rate)
-            seen_dates.add(rate['effectiveDate'])
+def _table_range_url(start_date: date, end_date: date) -> str:
+    return f"{NBP_API_BASE_URL}/exchangerates/tables/a/{start_date:%Y-%m-%d}/{end_date:%Y-%m-%d}/"
+
+def use_table_mode(currency_count: int) -> bool:
+    """Whether fetching whole tables is cheaper than one series per currency."""
+    return currency_count > settings.NBP_TABLE_MODE_THRESHOLD
+
+def split_tables(tables: List[Dict[str, Any]], currencies: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Splits table A responses into per-currency series ({'effectiveDate', 'mid'})
+    in a single pass, in the same shape as the /rates/ endpoint returns them.
+    """
+    wanted = {c.upper() for c in currencies}
+    series: Dict[str, List[Dict[str, Any]]] = {c: [] for c in wanted}
+    for table in tables:
+        effective_date = table['effectiveDate']
+        for rate in table.get('rates', []):
+            code = rate['code']
+            if code in wanted:
+                series[code].append({"no": table.get('no'), "effectiveDate": effective_date, "mid": rate['mid']})
+    return series
+
+def _extract_tables(data: Any) -> List[Dict[str, Any]]:
+    """Table endpoint returns a list of daily tables."""
+    if data and isinstance(data, list):
+        return data
+    if data:
+        logger.warning(f"Unexpected data format received from NBP for table A: {data}")
+    return []
 
-    return unique_rates
+def _extract_rates(data: Any, currency: str) -> List[Dict[str, Any]]:
+    """Pulls the 'rates' list out of a single-currency response."""
+    if data and isinstance(data, dict) and 'rates' in data:
+        return data['rates']
+    if data:
+        logger.warning(f"Unexpected data format received from NBP for {currency}: {data}")
+    # If the fetch returned None due to error or no data, there is nothing to add
+    return []
 
+def _extract_gold(data: Any) -> List[Dict[str, Any]]:
+    """Gold API returns a list directly."""
+    if data and isinstance(data, list):
+        return data
+    if data:
+        logger.warning(f"Unexpected data format received from NBP for gold: {data}")
+    return []
 
-def get_gold_data_for_range(start_date: date, end_date: date) -> List[Dict[str, Any]]:
+def _deduplicate(entries: List[Dict[str, Any]], date_key: str) -> List[Dict[str, Any]]:
     """
-    Fetches gold price data, handling NBP date range limits by splitting
-    into multiple requests if necessary.
+    Drops repeated dates, keeping the first occurrence. NBP might return overlapping
+    dates if chunk boundaries align with weekends/holidays.
     """
-    all_prices = []
-    current_start = start_date
+    unique_entries = []
+    seen_dates = set()
+    for entry in entries:
+        if entry[date_key] not in seen_dates:
+            unique_entries.append(entry)
+            seen_dates.add(entry[date_key])
+    return unique_entries
 
-    while current_start <= end_date:
-        chunk_end = min(current_start + timedelta(days=MAX_NBP_RANGE_DAYS - 1), end_date)
-        start_str = current_start.strftime('%Y-%m-%d')
-        end_str = chunk_end.strftime('%Y-%m-%d')
 
-        url = f"{NBP_API_BASE_URL}/cenyzlota/{start_str}/{end_str}/"
-        logger.info(f"Fetching NBP gold data from {start_str} to {end_str}")
-        data = fetch_nbp_data(url)
+def _fetch_chunks(urls: List[tuple[str, date]], raise_on_error: bool) -> tuple[List[Any], bool]:
+    """
+    Fetches (url, range_end) chunks in order. Returns the responses (None for
+    404s and, without raise_on_error, for failed chunks) and whether every
+    chunk succeeded, i.e. whether the result may be stored as complete.
+    """
+    responses, complete = [], True
+    for url, range_end in urls:
+        try:
+            responses.append(fetch_nbp_data(url, raise_on_error=True, range_end=range_end))
+        except NBPFetchError:
+            if raise_on_error:
+                raise
+            responses.append(None)
+            complete = False
+    return responses, complete
 
-        if data and isinstance(data, list): # Gold API returns a list directly
-            all_prices.extend(data)
-        elif data:
-             logger.warning(f"Unexpected data format received from NBP for gold: {data}")
+def _fetch_currency_range(currency: str, start_date: date, end_date: date, raise_on_error: bool) -> List[Dict[str, Any]]:
+    urls = [(_currency_range_url(currency, s, e), e) for s, e in _date_chunks(start_date, end_date)]
+    logger.info(f"Fetching NBP currency data: {currency} from {start_date} to {end_date} in {len(urls)} chunk(s)")
+    responses, complete = _fetch_chunks(urls, raise_on_error)
+    # This assumes 'effectiveDate' is unique per day for a currency
+    rates = _deduplicate([rate for data in responses for rate in _extract_rates(data, currency)], 'effectiveDate')
+    if complete:
+        shared_cache.store(currency, start_date, end_date, rates_to_series(currency, rates))
+    return rates
 
-        current_start = chunk_end + timedelta(days=1)
+def get_currency_data_for_range(currency: str, start_date: date, end_date: date, raise_on_error: bool = False) -> List[Dict[str, Any]]:
+    """
+    Fetches currency data for a single currency, handling NBP date range limits
+    by splitting into multiple requests if necessary.
+    With raise_on_error, a failed chunk raises NBPFetchError instead of being skipped.
+    Ranges complete in the shared cache are served from it without any request.
+    """
+    currency = currency.upper()
+    cached = shared_cache.lookup(currency, start_date, end_date)
+    if cached is not None:
+        return cached.to_entries('effectiveDate', 'mid')
+    return _fetch_currency_range(currency, start_date, end_date, raise_on_error)
 
+def _fetch_gold_range(start_date: date, end_date: date, raise_on_error: bool) -> List[Dict[str, Any]]:
+    urls = [(_gold_range_url(s, e), e) for s, e in _date_chunks(start_date, end_date)]
+    logger.info(f"Fetching NBP gold data from {start_date} to {end_date} in {len(urls)} chunk(s)")
+    responses, complete = _fetch_chunks(urls, raise_on_error)
     # Deduplicate based on 'data' field
-    unique_prices = []
-    seen_dates = set()
-    for price in all_prices:
-        if price['data'] not in seen_dates:
-            unique_prices.append(price)
-            seen_dates.add(price['data'])
+    prices = _deduplicate([price for data in responses for price in _extract_gold(data)], 'data')
+    if complete:
+        shared_cache.store(GOLD_SERIES, start_date, end_date, gold_to_series(prices))
+    return prices
+
+def get_gold_series_for_range(start_date: date, end_date: date, raise_on_error: bool = False) -> RateSeries:
+    """
+    Fetches gold prices as a RateSeries, handling NBP date range limits by splitting
+    into multiple requests if necessary. With raise_on_error, a failed chunk raises
+    NBPFetchError instead of being skipped. Ranges complete in the shared cache are
+    sliced from it without any request.
+    """
+    cached = shared_cache.lookup(GOLD_SERIES, start_date, end_date)
+    if cached is not None:
+        return cached
+    return gold_to_series(_fetch_gold_range(start_date, end_date, raise_on_error))
+
+def _split_and_store(tables: List[Dict[str, Any]], currencies: List[str], start_date: date, end_date: date, complete: bool) -> Dict[str, List[Dict[str, Any]]]:
+    """Per-currency series of table A responses; stored in the shared cache when every chunk arrived."""
+    series = {code: _deduplicate(rates, 'effectiveDate') for code, rates in split_tables(tables, currencies).items()}
+    if complete:
+        for code, rates in series.items():
+            shared_cache.store(code, start_date, end_date, rates_to_series(code, rates))
+    return series
+
+def _cached_tables(currencies: List[str], start_date: date, end_date: date) -> Dict[str, List[Dict[str, Any]]] | None:
+    """Table-mode result from the shared cache, if every currency's range is complete there."""
+    cached = {}
+    for code in {c.upper() for c in currencies}:
+        series = shared_cache.lookup(code, start_date, end_date)
+        if series is None:
+            return None
+        cached[code] = series.to_entries('effectiveDate', 'mid')
+    return cached
 
-    return unique_prices
+def get_table_data_for_range(currencies: List[str], start_date: date, end_date: date, raise_on_error: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetches many currencies at once through whole table A responses, one request
+    per chunk instead of one per currency per chunk. Returns {code: rates}, with
+    each series deduplicated by 'effectiveDate' like get_currency_data_for_range.
+    """
+    cached = _cached_tables(currencies, start_date, end_date)
+    if cached is not None:
+        return cached
+    urls = [(_table_range_url(s, e), e) for s, e in _date_chunks(start_date, end_date)]
+    logger.info(f"Fetching NBP table A from {start_date} to {end_date} for {len(currencies)} currencies in {len(urls)} chunk(s)")
+    responses, complete = _fetch_chunks(urls, raise_on_error)
+    tables = [table for data in responses for table in _extract_tables(data)]
+    return _split_and_store(tables, currencies, start_date, end_date, complete)
 
 
-def format_currency_data(rates: List[Dict[str, Any]], currency_code: str) -> List[Dict[str, Any]]:
-    """Formats raw NBP currency rates into the structure needed by the frontend/export."""
-    return [
-        {"Date": entry['effectiveDate'], "Rate": entry['mid'], "Currency": currency_code.upper()}
-        for entry in rates
-    ]
+# --- Async API ---
+# Fetches every chunk of every requested series at the same time, bounded by
+# NBP_MAX_CONCURRENCY, so latency is roughly that of the slowest single chunk.
 
-def format_gold_data(prices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Formats raw NBP gold prices into the structure needed by the frontend/export."""
-    return [
-        {"Date": entry['data'], "Price": entry['cena']} # Match 'Price' key from original code
-        for entry in prices
-    ]
+async def fetch_nbp_data_async(client: httpx.AsyncClient, url: str, raise_on_error: bool = False, range_end: date | None = None) -> List[Dict[str, Any]] | None:
+    """Async counterpart of fetch_nbp_data with the same 404 / error / caching / coalescing semantics."""
+    if range_end is not None:
+        hit, cached = response_cache.get(url)
+        if hit:
+            return cached
+    try:
+        return await inflight.do_async(url, lambda: _fetch_nbp_data_async(client, url, range_end))
+    except NBPFetchError:
+        if raise_on_error:
+            raise
+        return None
+
+async def _fetch_nbp_data_async(client: httpx.AsyncClient, url: str, range_end: date | None) -> List[Dict[str, Any]] | None:
+    try:
+        response = await client.get(url, headers={'Accept': 'application/json'}, timeout=15)
+        if response.status_code == 404:
+            logger.warning(f"NBP API returned 404 for {url}. Often means no data for the period or invalid query.")
+            if range_end is not None:
+                response_cache.put(url, None, response_expiry(range_end, None))
+            return None
+        response.raise_for_status()
+        data = response.json()
+        if range_end is not None:
+            response_cache.put(url, data, response_expiry(range_end, _newest_date(data)))
+        return data
+    except httpx.TimeoutException:
+        logger.error(f"Timeout while requesting {url}")
+    except httpx.HTTPStatusError as http_err:
+        logger.error(f"HTTP error occurred: {http_err} - URL: {url}")
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching data from {url}: {e}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred fetching {url}: {e}")
+    raise NBPFetchError(f"Failed to fetch {url}")
+
+async def _gather_chunks(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, chunks: List[tuple[str, date]], raise_on_error: bool) -> tuple[List[Any], bool]:
+    """
+    Fetches all (url, range_end) chunks concurrently. Returns the responses in the
+    original (chronological) order and whether every chunk succeeded, like _fetch_chunks.
+    """
+    async def fetch(url: str, range_end: date):
+        async with semaphore:
+            try:
+                return await fetch_nbp_data_async(client, url, raise_on_error=True, range_end=range_end)
+            except NBPFetchError:
+                if raise_on_error:
+                    raise
+                return _FAILED
+    responses = await asyncio.gather(*(fetch(url, range_end) for url, range_end in chunks))
+    complete = all(response is not _FAILED for response in responses)
+    return [None if response is _FAILED else response for response in responses], complete
+
+async def _fetch_currency_range_async(
+    currency: str, start_date: date, end_date: date, raise_on_error: bool,
+    client: httpx.AsyncClient, semaphore: asyncio.Semaphore
+) -> List[Dict[str, Any]]:
+    urls = [(_currency_range_url(currency, s, e), e) for s, e in _date_chunks(start_date, end_date)]
+    logger.info(f"Fetching NBP currency data: {currency} from {start_date} to {end_date} in {len(urls)} concurrent chunk(s)")
+    responses, complete = await _gather_chunks(client, semaphore, urls, raise_on_error)
+    rates = _deduplicate([rate for data in responses for rate in _extract_rates(data, currency)], 'effectiveDate')
+    if complete:
+        # The store takes a file lock and rewrites the series file; keep it off the loop
+        await asyncio.to_thread(lambda: shared_cache.store(currency, start_date, end_date, rates_to_series(currency, rates)))
+    return rates
+
+async def _fetch_gold_range_async(
+    start_date: date, end_date: date, raise_on_error: bool,
+    client: httpx.AsyncClient, semaphore: asyncio.Semaphore
+) -> List[Dict[str, Any]]:
+    urls = [(_gold_range_url(s, e), e) for s, e in _date_chunks(start_date, end_date)]
+    logger.info(f"Fetching NBP gold data from {start_date} to {end_date} in {len(urls)} concurrent chunk(s)")
+    responses, complete = await _gather_chunks(client, semaphore, urls, raise_on_error)
+    prices = _deduplicate([price for data in responses for price in _extract_gold(data)], 'data')
+    if complete:
+        await asyncio.to_thread(lambda: shared_cache.store(GOLD_SERIES, start_date, end_date, gold_to_series(prices)))
+    return prices
+
+async def _fetch_table_range_async(
+    currencies: List[str], start_date: date, end_date: date, raise_on_error: bool,
+    client: httpx.AsyncClient, semaphore: asyncio.Semaphore
+) -> Dict[str, List[Dict[str, Any]]]:
+    urls = [(_table_range_url(s, e), e) for s, e in _date_chunks(start_date, end_date)]
+    logger.info(f"Fetching NBP table A from {start_date} to {end_date} for {len(currencies)} currencies in {len(urls)} concurrent chunk(s)")
+    responses, complete = await _gather_chunks(client, semaphore, urls, raise_on_error)
+    tables = [table for data in responses for table in _extract_tables(data)]
+    return await asyncio.to_thread(_split_and_store, tables, currencies, start_date, end_date, complete)
+
+async def fetch_ranges_async(
+    ranges: List[tuple[str, date, date]], raise_on_error: bool = False
+) -> List[RateSeries | Exception]:
+    """
+    Fetches many (series, start_date, end_date) ranges at once, where series is a
+    currency code or GOLD_SERIES, and returns each as a RateSeries. Ranges complete
+    in the shared cache are sliced from it; all chunks of the remaining ranges share
+    the pooled client and one concurrency limit. Currencies sharing the same range
+    are fetched through table A when there are more than NBP_TABLE_MODE_THRESHOLD of
+    them. Results come back in request order; with raise_on_error a failed range
+    yields its NBPFetchError instead of a series, leaving the others intact.
+    """
+    semaphore = asyncio.Semaphore(settings.NBP_MAX_CONCURRENCY)
+    results: List[Any] = [None] * len(ranges)
+
+    # Group the currency ranges not in the shared cache by date range to decide on table mode per range
+    pending: List[int] = []
+    by_range: Dict[tuple[date, date], List[int]] = {}
+    for index, (series, s, e) in enumerate(ranges):
+        cached = shared_cache.lookup(series, s, e)
+        if cached is not None:
+            results[index] = cached
+            continue
+        pending.append(index)
+        if series.upper() != GOLD_SERIES:
+            by_range.setdefault((s, e), []).append(index)
+
+    client = http_client.get_async_client()
+    jobs = []  # (indices the job fills, coroutine)
+    for index in pending:
+        series, s, e = ranges[index]
+        if series.upper() == GOLD_SERIES:
+            jobs.append(([index], _fetch_gold_range_async(s, e, raise_on_error, client, semaphore)))
+    for (s, e), indices in by_range.items():
+        if use_table_mode(len(indices)):
+            codes = [ranges[i][0].upper() for i in indices]
+            jobs.append((indices, _fetch_table_range_async(codes, s, e, raise_on_error, client, semaphore)))
+        else:
+            for i in indices:
+                jobs.append(([i], _fetch_currency_range_async(ranges[i][0].upper(), s, e, raise_on_error, client, semaphore)))
+
+    outcomes = await asyncio.gather(*(job for _, job in jobs), return_exceptions=raise_on_error)
+    for (indices, _), outcome in zip(jobs, outcomes):
+        for i in indices:
+            series = ranges[i][0].upper()
+            if isinstance(outcome, Exception):
+                results[i] = outcome
+            elif isinstance(outcome, dict): # Table mode result, split per currency
+                results[i] = rates_to_series(series, outcome.get(series, []))
+            elif series == GOLD_SERIES:
+                results[i] = gold_to_series(outcome)
+            else:
+                results[i] = rates_to_series(series, outcome)
+    return results
+
+
+def rates_to_series(currency: str, rates: List[Dict[str, Any]]) -> RateSeries:
+    """Builds a columnar RateSeries straight from NBP rate entries ({'effectiveDate', 'mid'})."""
+    return RateSeries.from_entries(currency.upper(), rates, 'effectiveDate', 'mid').dedup()
+
+def gold_to_series(prices: List[Dict[str, Any]]) -> RateSeries:
+    """Builds a columnar RateSeries straight from NBP gold entries ({'data', 'cena'})."""
+    return RateSeries.from_entries(GOLD_SERIES, prices, 'data', 'cena').dedup()
+
+def _latest_window() -> tuple[date, date]:
+    """
+    The expected latest table (see nbp_cache.latest_table_date) and the one before
+    it, which is the latest when today's table comes out late.
+    """
+    latest = latest_table_date()
+    return nbp_calendar.previous_business_day(latest), latest
 
 def get_latest_rate(currency: str) -> float | None:
     """Fetches the most recent available exchange rate for a currency."""
     currency = currency.upper()
-    # Fetch last 10 days to increase chance of getting a recent rate, as NBP might not publish on weekends/holidays
-    end_date = date.today()
-    start_date = end_date - timedelta(days=10)
-    start_str = start_date.strftime('%Y-%m-%d')
-    end_str = end_date.strftime('%Y-%m-%d')
-
-    url = f"{NBP_API_BASE_URL}/exchangerates/rates/a/{currency}/{start_str}/{end_str}/"
+    start_date, end_date = _latest_window()
     logger.info(f"Fetching latest rate for {currency}")
-    data = fetch_nbp_data(url)
+    data = fetch_nbp_data(_currency_range_url(currency, start_date, end_date), range_end=end_date)
 
     if data and isinstance(data, dict) and 'rates' in data and data['rates']:
         # Return the rate from the latest entry
         latest_entry = data['rates'][-1]
         logger.info(f"Latest rate for {currency} ({latest_entry['effectiveDate']}): {latest_entry['mid']}")
         return latest_entry['mid']
+    logger.warning(f"Could not fetch latest rate for {currency}")
+    return None
+
+def get_rate_as_of(currency: str, on_date: date, raise_on_error: bool = False) -> Dict[str, Any] | None:
+    """
+    Rate entry ({'effectiveDate', 'mid'}) of the table in force on on_date: the one
+    published that day, or on the last business day before it. The table date is
+    resolved with the calendar, and for today (or later) with the expected latest
+    publication, so this is usually a single request. When that table is missing,
+    earlier business days are tried, up to AS_OF_MAX_TABLES tables in all. None
+    when none of them has the currency.
+    """
+    currency = currency.upper()
+    now = nbp_now()
+    if on_date >= now.date():
+        effective_date = latest_table_date(now)
     else:
-        # Fallback: Try fetching just today's rate (might fail if not published yet)
-        url_today = f"{NBP_API_BASE_URL}/exchangerates/rates/a/{currency}/today/"
-        data_today = fetch_nbp_data(url_today)
-        if data_today and isinstance(data_today, list) and data_today: # 'today' endpoint returns a list
-             entry = data_today[0]
-             logger.info(f"Latest rate for {currency} (fallback 'today' - {entry['effectiveDate']}): {entry['mid']}")
-             return entry['mid']
-        logger.warning(f"Could not fetch latest rate for {currency}")
-        return None
\ No newline at end of file
+        effective_date = nbp_calendar.business_day_on_or_before(on_date)
+    for _ in range(AS_OF_MAX_TABLES):
+        data = fetch_nbp_data(_currency_date_url(currency, effective_date), raise_on_error=raise_on_error, range_end=effective_date)
+        rates = _extract_rates(data, currency)
+        if rates:
+            return rates[0]
+        logger.warning(f"No NBP table for {currency} on {effective_date}, trying the previous business day")
+        effective_date = nbp_calendar.previous_business_day(effective_date)
+    return None
+
+def get_latest_rates(currencies: List[str]) -> Dict[str, float | None]:
+    """
+    Fetches the most recent available rate for several currencies. With more than
+    NBP_TABLE_MODE_THRESHOLD currencies, the latest two tables A are fetched
+    once instead of calling get_latest_rate per currency.
+    """
+    currencies = list(dict.fromkeys(c.upper() for c in currencies))
+    if not use_table_mode(len(currencies)):
+        return {currency: get_latest_rate(currency) for currency in currencies}
+
+    start_date, end_date = _latest_window()
+    logger.info(f"Fetching latest rates for {len(currencies)} currencies via table A")
+    data = fetch_nbp_data(_table_range_url(start_date, end_date), range_end=end_date)
+    tables = _extract_tables(data)
+    series = split_tables(tables, currencies)
+
+    latest: Dict[str, float | None] = {}
+    for currency in currencies:
+        rates = series.get(currency)
+        # A currency missing from fetched tables is not in table A; only a failed
+        # table fetch falls back to the single-currency path
+        latest[currency] = rates[-1]['mid'] if rates else (None if tables else get_latest_rate(currency))
+    return latest
@@ -0,0 +1,138 @@
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Tuple
+from zoneinfo import ZoneInfo
+from ..config import settings
+from . import nbp_calendar
+
+NBP_TIMEZONE = ZoneInfo("Europe/Warsaw")
+
+def nbp_now() -> datetime:
+    """Current time in NBP's (Warsaw) time zone."""
+    return datetime.now(NBP_TIMEZONE)
+
+def _publication_time(day: date) -> datetime:
+    hour, minute = (int(part) for part in settings.NBP_PUBLICATION_TIME.split(':'))
+    return datetime.combine(day, time(hour, minute), tzinfo=NBP_TIMEZONE)
+
+def next_publication_time(now: datetime | None = None) -> datetime:
+    """
+    Next moment a new table A can appear: NBP publishes it on business days
+    (see nbp_calendar) around NBP_PUBLICATION_TIME (Warsaw time).
+    """
+    now = now or nbp_now()
+    candidate = now.date()
+    if not nbp_calendar.is_business_day(candidate) or _publication_time(candidate) <= now:
+        candidate = nbp_calendar.next_business_day(candidate)
+    return _publication_time(candidate)
+
+def latest_table_date(now: datetime | None = None) -> date:
+    """Effective date of the newest table A that should be published by now."""
+    now = now or nbp_now()
+    today = now.date()
+    if nbp_calendar.is_business_day(today) and _publication_time(today) <= now:
+        return today
+    return nbp_calendar.previous_business_day(today)
+
+def expiry_for(range_end: date, now: datetime | None = None) -> datetime | None:
+    """
+    Expiry of a response covering dates up to range_end. Ranges ending before
+    today are final and never expire (None); ranges touching today are valid
+    until the next table publication.
+    """
+    now = now or nbp_now()
+    if range_end < now.date():
+        return None
+    return next_publication_time(now)
+
+def response_expiry(range_end: date, newest: date | None, now: datetime | None = None) -> datetime | None:
+    """
+    expiry_for a response whose newest effective date is newest (None: no data).
+    A range that should already include the latest table but does not (NBP is
+    publishing late) expires after NBP_CACHE_PENDING_TTL instead, so retries
+    see the table once it is out.
+    """
+    now = now or nbp_now()
+    expected = latest_table_date(now)
+    if range_end >= expected and (newest is None or newest < expected):
+        return now + timedelta(seconds=settings.NBP_CACHE_PENDING_TTL)
+    return expiry_for(range_end, now)
+
+def _estimate_size(value: Any) -> int:
+    """Rough in-memory size of a decoded JSON value, in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of decoded NBP responses, bounded by estimated memory.
+    Entries carry an optional absolute expiry (see expiry_for).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Tuple[Any, datetime | None, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Returns (True, value) on a hit, (False, None) on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at is None or nbp_now() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any, expires_at: datetime | None) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return # Would evict everything else; not worth caching
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Tuple
+import numpy as np
+from ..config import settings
+
+# NBP publication calendar: table A (and the gold price) is published on every
+# Polish business day, i.e. Monday to Friday except public holidays, and tables
+# are numbered per year ("001/A/NBP/2024" is the first business day of 2024).
+# Knowing which dates have a table lets callers compute the dates that should
+# exist, skip requests that cannot return data, and resolve "latest" / "as of"
+# dates without trial and error. One-off holidays go in NBP_EXTRA_HOLIDAYS.
+
+FIRST_YEAR = 2002 # First year of table A in the NBP API
+LAST_YEAR = 2100
+
+def easter_sunday(year: int) -> date:
+    """Western (Gregorian) Easter Sunday, by the anonymous Gregorian algorithm."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> FrozenSet[date]:
+    """Polish statutory public holidays of a year (including those on weekends)."""
+    easter = easter_sunday(year)
+    days = {
+        date(year, 1, 1), # New Year's Day
+        easter, # Easter Sunday
+        easter + timedelta(days=1), # Easter Monday
+        date(year, 5, 1), # Labour Day
+        date(year, 5, 3), # Constitution Day
+        easter + timedelta(days=49), # Pentecost
+        easter + timedelta(days=60), # Corpus Christi
+        date(year, 8, 15), # Assumption
+        date(year, 11, 1), # All Saints' Day
+        date(year, 11, 11), # Independence Day
+        date(year, 12, 25), # Christmas
+        date(year, 12, 26), # Second day of Christmas
+    }
+    if year >= 2011:
+        days.add(date(year, 1, 6)) # Epiphany
+    if year >= 2025:
+        days.add(date(year, 12, 24)) # Christmas Eve
+    return frozenset(days)
+
+def _extra_holidays() -> list[date]:
+    return [date.fromisoformat(d.strip()) for d in settings.NBP_EXTRA_HOLIDAYS.split(',') if d.strip()]
+
+@lru_cache(maxsize=1)
+def _busdaycalendar() -> np.busdaycalendar:
+    days = [d for year in range(FIRST_YEAR, LAST_YEAR + 1) for d in holidays(year)] + _extra_holidays()
+    return np.busdaycalendar(weekmask="1111100", holidays=np.array(days, dtype="datetime64[D]"))
+
+def _day(value: date) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+def is_business_day(day: date) -> bool:
+    """Whether NBP publishes a table on this date."""
+    return bool(np.is_busday(_day(day), busdaycal=_busdaycalendar()))
+
+def business_days(start_date: date, end_date: date) -> np.ndarray:
+    """Dates (datetime64[D]) in [start_date, end_date] with a table."""
+    if start_date > end_date:
+        return np.empty(0, dtype="datetime64[D]")
+    days = np.arange(_day(start_date), _day(end_date) + 1, dtype="datetime64[D]")
+    return days[np.is_busday(days, busdaycal=_busdaycalendar())]
+
+def count_business_days(start_date: date, end_date: date) -> int:
+    """Number of tables in [start_date, end_date]."""
+    if start_date > end_date:
+        return 0
+    return int(np.busday_count(_day(start_date), _day(end_date) + 1, busdaycal=_busdaycalendar()))
+
+def business_day_on_or_before(day: date) -> date:
+    """Date of the table in force on day: day itself, or the last business day before it."""
+    return np.busday_offset(_day(day), 0, roll="backward", busdaycal=_busdaycalendar()).astype(date)
+
+def business_day_on_or_after(day: date) -> date:
+    return np.busday_offset(_day(day), 0, roll="forward", busdaycal=_busdaycalendar()).astype(date)
+
+def previous_business_day(day: date) -> date:
+    """Last business day strictly before day."""
+    return np.busday_offset(_day(day), -1, roll="forward", busdaycal=_busdaycalendar()).astype(date)
+
+def next_business_day(day: date) -> date:
+    """First business day strictly after day."""
+    return np.busday_offset(_day(day), 1, roll="backward", busdaycal=_busdaycalendar()).astype(date)
+
+def trim(start_date: date, end_date: date) -> Tuple[date, date] | None:
+    """[start_date, end_date] narrowed to its first and last business day; None if it has none."""
+    first, last = business_day_on_or_after(start_date), business_day_on_or_before(end_date)
+    return (first, last) if first <= last else None
+
+def table_number(day: date) -> str:
+    """Number of the table A published on a business day, e.g. '001/A/NBP/2024'."""
+    if not is_business_day(day):
+        raise ValueError(f"No table A is published on {day}")
+    return f"{count_business_days(date(day.year, 1, 1), day):03d}/A/NBP/{day.year}"
+
+def missing_business_days(dates: Iterable[date] | np.ndarray, start_date: date, end_date: date) -> np.ndarray:
+    """
+    Business days of [start_date, end_date] absent from dates: real gaps in a
+    series, as opposed to weekends and holidays, which are expected.
+    """
+    present = np.asarray(dates, dtype="datetime64[D]")
+    return np.setdiff1d(business_days(start_date, end_date), present, assume_unique=False)
@@ -1,4 +1,3 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
@@ -10,21 +9,23 @@ import logging
 from datetime import datetime
 from .. import crud
 from ..config import settings
-from .nbp_api import get_latest_rate
+from .nbp_api import get_latest_rate, get_latest_rates
+from .alert_index import AlertIndex
+from .email_queue import email_queue
 
 logger = logging.getLogger(__name__)
 
 def send_email_notification(notification, current_rate: float):
     """
-    Sends an email alert for currency rate threshold notifications.
-    Uses Gmail SMTP with App Password authentication.
+    Queues an email alert for currency rate threshold notifications.
+    Delivery (SMTP connection reuse, retries) happens on the email queue workers.
     
     Args:
         notification: Notification object containing email and currency details
         current_rate: Current exchange rate for the currency
     
     Returns:
-        bool: True if email was sent successfully, False otherwise
+        bool: True if the email was queued for delivery, False otherwise
     """
     try:
         # Create message container
@@ -54,50 +55,28 @@ Best regards,
         # Attach body to email
         msg.attach(MIMEText(body, 'plain'))
 
-        try:
-            # Setup SMTP server with SSL
-            server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
-            server.ehlo()  # Start SMTP conversation
-            server.starttls()  # Enable TLS encryption
-            server.ehlo()  # Restart SMTP conversation over TLS
-
-            # Log in to server
-            server.login(settings.EMAIL_ADDRESS, settings.EMAIL_PASSWORD)
-            
-            # Convert message to string and send
-            text = msg.as_string()
-            server.sendmail(settings.EMAIL_ADDRESS, notification.email, text)
-            
-            logger.info(f"Successfully sent alert email to {notification.email} for {notification.currency}")
-            
-            # Close the connection
-            server.quit()
-            return True
-
-        except smtplib.SMTPAuthenticationError:
-            logger.error("SMTP Authentication failed. Check your Gmail App Password and email settings.")
-            return False
-        except smtplib.SMTPException as e:
-            logger.error(f"SMTP error occurred: {str(e)}")
-            return False
+        return email_queue.enqueue(notification.email, msg)
 
     except Exception as e:
-        logger.error(f"Failed to send email notification: {str(e)}")
+        logger.error(f"Failed to queue email notification: {str(e)}")
         return False
 
-def check_and_notify(notification, db: Session):
+def check_and_notify(notification, db: Session, current_rate: float | None = None, commit: bool = True):
     """
-    Checks if a notification's conditions are met and sends an email if necessary.
+    Checks if a notification's conditions are met and queues an email if necessary.
     
     Args:
         notification: The notification to check
         db: Database session
+        current_rate: Already fetched latest rate for the currency; fetched here if omitted
+        commit: Commit the updated last_checked; batch callers pass False and commit once
     
     Returns:
-        bool: True if notification was sent, False otherwise
+        bool: True if notification was queued, False otherwise
     """
     try:
-        current_rate = get_latest_rate(notification.currency)
+        if current_rate is None:
+            current_rate = get_latest_rate(notification.currency)
         if current_rate is None:
             logger.warning(f"Could not get current rate for {notification.currency}")
             return False
@@ -111,11 +90,12 @@ def check_and_notify(notification, db: Session):
             logger.info(f"Rate {current_rate} is below threshold {notification.threshold}")
 
         if should_notify:
-            logger.info(f"Sending notification for {notification.currency} to {notification.email}")
+            logger.info(f"Queueing notification for {notification.currency} to {notification.email}")
             if send_email_notification(notification, current_rate):
                 # Update last notification time
                 notification.last_checked = datetime.now()
-                db.commit()
+                if commit:
+                    db.commit()
                 return True
 
         return False
@@ -127,19 +107,35 @@ def check_and_notify(notification, db: Session):
 def check_thresholds(db: Session):
     """
     Periodic task that checks all notifications against current rates.
+    Notifications are indexed by currency so each latest rate is fetched once
+    and the triggered alerts are found by binary search over sorted thresholds.
     """
     logger.info("Starting scheduled check of currency rate thresholds")
     try:
-        notifications = crud.get_notifications(db)
-        if not notifications:
+        index = AlertIndex.build(crud.iter_notifications(db))
+        if not index:
             logger.info("No notifications to check")
             return
 
-        for notification in notifications:
-            try:
-                check_and_notify(notification, db)
-            except Exception as e:
-                logger.error(f"Error checking notification {notification.id}: {str(e)}")
+        # One latest-rate lookup per distinct currency (table A when there are many)
+        latest_rates = get_latest_rates(index.currencies())
+        logger.info(f"Checking {len(index)} notifications across {len(latest_rates)} currencies")
+
+        # Committing per alert would expire every loaded notification and reload each
+        # one with its own SELECT; last_checked updates are committed once per cycle
+        fired = 0
+        for currency, current_rate in latest_rates.items():
+            if current_rate is None:
+                logger.warning(f"Could not get current rate for {currency}")
+                continue
+            for notification in index.triggered(currency, current_rate):
+                try:
+                    fired += check_and_notify(notification, db, current_rate, commit=False)
+                except Exception as e:
+                    logger.error(f"Error checking notification {notification.id}: {str(e)}")
+        if fired:
+            db.commit()
+            logger.info(f"Queued {fired} alert email(s)")
 
     except Exception as e:
         logger.error(f"Error in check_thresholds: {str(e)}")
@@ -159,13 +155,17 @@ def start_scheduler(db_getter):
             lambda: check_thresholds(next(db_getter())),
             'interval',
             minutes=15,  # Check every 15 minutes
-            id='check_currency_thresholds'
+            id='check_currency_thresholds',
+            replace_existing=True # The scheduler is restarted when this process is re-elected
         )
         scheduler.start()
         logger.info("Currency rate notification scheduler started")
 
 def stop_scheduler():
     """Stops the notification scheduler."""
+    global scheduler
     if scheduler.running:
         scheduler.shutdown()
+        # A shut down scheduler cannot be started again; keep a fresh one for the next start_scheduler
+        scheduler = BackgroundScheduler(daemon=True)
         logger.info("Currency rate notification scheduler stopped")
\ No newline at end of file
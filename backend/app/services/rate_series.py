@@ -0,0 +1,140 @@
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+import numpy as np
+
+# Columnar representation of NBP data used internally instead of lists of
+# per-row dicts: one datetime64[D] array of dates and one float64 array of
+# values per series. Row dicts are only built at the API boundary.
+
+GOLD_SERIES = "GOLD" # Series key used for gold prices next to currency codes
+
+class RateSeries:
+    """A single series (currency code or 'GOLD') of (date, value) points."""
+
+    __slots__ = ("code", "dates", "values")
+
+    def __init__(self, code: str, dates: np.ndarray, values: np.ndarray):
+        self.code = code
+        self.dates = dates.astype("datetime64[D]", copy=False)
+        self.values = values.astype(np.float64, copy=False)
+
+    @classmethod
+    def empty(cls, code: str) -> "RateSeries":
+        return cls(code, np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.float64))
+
+    @classmethod
+    def from_entries(cls, code: str, entries: Sequence[Dict[str, Any]], date_key: str, value_key: str) -> "RateSeries":
+        """Builds a series from NBP JSON entries, e.g. date_key='effectiveDate', value_key='mid'."""
+        count = len(entries)
+        dates = np.fromiter((str(e[date_key]) for e in entries), dtype="datetime64[D]", count=count)
+        values = np.fromiter((e[value_key] for e in entries), dtype=np.float64, count=count)
+        return cls(code, dates, values)
+
+    @classmethod
+    def from_pairs(cls, code: str, pairs: Iterable[Tuple[date, float]]) -> "RateSeries":
+        """Builds a series from (date, value) tuples, e.g. database rows."""
+        pairs = list(pairs)
+        if not pairs:
+            return cls.empty(code)
+        dates, values = zip(*pairs)
+        return cls(code, np.array(dates, dtype="datetime64[D]"), np.array(values, dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        return f"<RateSeries(code='{self.code}', points={len(self)})>"
+
+    def is_sorted(self) -> bool:
+        return len(self) < 2 or bool(np.all(self.dates[1:] >= self.dates[:-1]))
+
+    def sort(self) -> "RateSeries":
+        """Sorted by date; stable, so equal dates keep their original order."""
+        if self.is_sorted():
+            return self
+        order = np.argsort(self.dates, kind="stable")
+        return RateSeries(self.code, self.dates[order], self.values[order])
+
+    def dedup(self) -> "RateSeries":
+        """Sorted by date with one point per date, keeping the first occurrence."""
+        ordered = self.sort()
+        if len(ordered) < 2:
+            return ordered
+        keep = np.concatenate(([True], ordered.dates[1:] != ordered.dates[:-1]))
+        if keep.all():
+            return ordered
+        return RateSeries(self.code, ordered.dates[keep], ordered.values[keep])
+
+    def merge(self, other: "RateSeries") -> "RateSeries":
+        """Union of both series; on equal dates this series' values win."""
+        if not len(other):
+            return self.dedup()
+        if not len(self):
+            return RateSeries(self.code, other.dates, other.values).dedup()
+        return RateSeries(
+            self.code,
+            np.concatenate((self.dates, other.dates)),
+            np.concatenate((self.values, other.values))
+        ).dedup()
+
+    def slice(self, start_date: date, end_date: date) -> "RateSeries":
+        """Points with start_date <= date <= end_date. The series must be sorted."""
+        lo = np.searchsorted(self.dates, np.datetime64(start_date, "D"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(end_date, "D"), side="right")
+        return RateSeries(self.code, self.dates[lo:hi], self.values[lo:hi])
+
+    def to_entries(self, date_key: str, value_key: str) -> List[Dict[str, Any]]:
+        """Back to NBP-shaped dicts, for callers that need the raw JSON layout."""
+        return [
+            {date_key: d.isoformat(), value_key: v}
+            for d, v in zip(self.dates.tolist(), self.values.tolist())
+        ]
+
+class RateFrame:
+    """An ordered collection of RateSeries keyed by code."""
+
+    def __init__(self, series: Iterable[RateSeries] = (), complete: bool = True):
+        self.series: Dict[str, RateSeries] = {s.code: s for s in series}
+        self.complete = complete # False when part of the requested range could not be loaded
+
+    def __len__(self) -> int:
+        """Total number of points across all series."""
+        return sum(len(s) for s in self.series.values())
+
+    def __getitem__(self, code: str) -> RateSeries:
+        return self.series[code]
+
+    def get(self, code: str) -> RateSeries | None:
+        return self.series.get(code)
+
+    def codes(self) -> List[str]:
+        return list(self.series)
+
+    def long_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(dates, values, series index) of all points, ordered by date; stable across series order."""
+        parts = list(self.series.values())
+        if not parts:
+            return np.empty(0, dtype="datetime64[D]"), np.empty(0), np.empty(0, dtype=np.intp)
+        dates = np.concatenate([s.dates for s in parts])
+        values = np.concatenate([s.values for s in parts])
+        owners = np.repeat(np.arange(len(parts)), [len(s) for s in parts])
+        order = np.argsort(dates, kind="stable")
+        return dates[order], values[order], owners[order]
+
+    def iter_records(self, value_key: str, code_key: str | None = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yields long-format row dicts ({'Date', value_key[, code_key]}) ordered by date,
+        materialising only batch_size rows at a time. Used at the API boundary.
+        """
+        dates, values, owners = self.long_columns()
+        codes = list(self.series)
+        for lo in range(0, len(dates), batch_size):
+            hi = lo + batch_size
+            batch = zip(dates[lo:hi].tolist(), values[lo:hi].tolist(), owners[lo:hi].tolist())
+            if code_key is None:
+                yield from ({"Date": d, value_key: v} for d, v, _ in batch)
+            else:
+                yield from ({"Date": d, value_key: v, code_key: codes[o]} for d, v, o in batch)
+
+    def to_records(self, value_key: str, code_key: str | None = None) -> List[Dict[str, Any]]:
+        return list(self.iter_records(value_key, code_key))
@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+import asyncio
+import logging
+import numpy as np
+from .. import crud, database
+from . import nbp_api, nbp_calendar
+from .nbp_cache import nbp_now
+from .rate_series import RateSeries, RateFrame, GOLD_SERIES
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_inflight = SingleFlight("rate_store")
+
+def find_missing_ranges(covered: List[Tuple[date, date]], start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """
+    Returns the sub-ranges of [start_date, end_date] not covered by any of the
+    given (start, end) ranges. `covered` must be sorted by start date.
+    """
+    missing = []
+    cursor = start_date
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end_date:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start - timedelta(days=1)))
+        cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor > end_date:
+            break
+    if cursor <= end_date:
+        missing.append((cursor, end_date))
+    return missing
+
+def _last_final_date() -> date:
+    """
+    Latest date whose rates can be considered final. Today's table may not be
+    published yet, so only ranges up to yesterday are recorded as covered.
+    """
+    return nbp_now().date() - timedelta(days=1)
+
+def _plan_gaps(db: Session, series: str, start_date: date, end_date: date) -> List[Tuple[date, date]]:
+    """Returns the parts of [start_date, end_date] that still have to be fetched for a series."""
+    end_date = min(end_date, nbp_now().date()) # Nothing to fetch from the future
+    if start_date > end_date:
+        return []
+    covered = crud.get_coverage(db, series, start_date, end_date)
+    return find_missing_ranges(covered, start_date, end_date)
+
+def _store_gap(db: Session, series: str, gap_start: date, gap_end: date, data: RateSeries) -> None:
+    """Upserts the points fetched for a gap and records the final part of it as covered."""
+    if series == GOLD_SERIES:
+        crud.upsert_gold_prices(db, data)
+    else:
+        crud.upsert_exchange_rates(db, series, data)
+    final_end = min(gap_end, _last_final_date())
+    if len(data) and data.dates.max() >= np.datetime64(nbp_calendar.business_day_on_or_before(gap_end), "D"):
+        final_end = gap_end # The gap's last table is already published, so the rest of it is final too
+    if len(data):
+        # Business days without a point between the first and last one are real gaps, not holidays
+        missing = nbp_calendar.missing_business_days(data.dates, data.dates.min().astype(date), data.dates.max().astype(date))
+        if len(missing):
+            logger.warning(f"{series} has no data for {len(missing)} business day(s) in {gap_start} - {gap_end}, first {missing[0]}")
+    if gap_start <= final_end:
+        crud.add_coverage(db, series, gap_start, final_end)
+
+def _read_series(db: Session, series: str, start_date: date, end_date: date) -> RateSeries:
+    """Reads a stored series back as a columnar RateSeries."""
+    if series == GOLD_SERIES:
+        return crud.get_gold_prices(db, start_date, end_date)
+    return crud.get_exchange_rates(db, series, start_date, end_date)
+
+async def get_series_async(series_list: List[str], start_date: date, end_date: date) -> RateFrame:
+    """
+    Returns rates for the given series (currency codes or GOLD_SERIES), serving stored
+    dates from the database and fetching only missing ranges from NBP. The gaps of all
+    series are fetched from NBP concurrently in one fan-out; database work runs in
+    worker threads on its own sessions so the event loop is not blocked. Concurrent
+    identical requests (same series, in any order, and range) share one load.
+    Returns a RateFrame in series_list order.
+    """
+    series_list = [s.upper() for s in series_list]
+    key = (frozenset(series_list), start_date, end_date)
+    frame = await _inflight.do_async(key, lambda: _load_series(sorted(set(series_list)), start_date, end_date))
+    return RateFrame((frame[series] for series in series_list), complete=frame.complete)
+
+async def _load_series(series_list: List[str], start_date: date, end_date: date) -> RateFrame:
+    def plan() -> List[Tuple[str, date, date]]:
+        with database.SessionLocal() as db:
+            return [
+                (series, gap_start, gap_end)
+                for series in series_list
+                for gap_start, gap_end in _plan_gaps(db, series, start_date, end_date)
+            ]
+
+    gaps = await asyncio.to_thread(plan)
+    results = await nbp_api.fetch_ranges_async(gaps, raise_on_error=True) if gaps else []
+
+    def store_and_read() -> RateFrame:
+        complete = True
+        with database.SessionLocal() as db:
+            for (series, gap_start, gap_end), data in zip(gaps, results):
+                if isinstance(data, Exception):
+                    # Leave the gap unrecorded so the next request retries it
+                    logger.warning(f"Could not fill {series} gap {gap_start} - {gap_end}: {data}")
+                    complete = False
+                    continue
+                _store_gap(db, series, gap_start, gap_end, data)
+            return RateFrame((_read_series(db, series, start_date, end_date) for series in series_list), complete=complete)
+
+    return await asyncio.to_thread(store_and_read)
+
+def ingest_range(series_list: List[str], start_date: date, end_date: date) -> Dict[str, date | None]:
+    """
+    Fetches and stores [start_date, end_date] for the given series regardless of
+    coverage: currencies through whole table A responses, gold separately. Used by
+    the ingestion jobs; failures raise NBPFetchError without storing anything.
+    Returns the latest stored date per series (None when NBP had no data).
+    """
+    series_list = [s.upper() for s in series_list]
+    currencies = [s for s in series_list if s != GOLD_SERIES]
+    fetched: Dict[str, RateSeries] = {}
+    if currencies:
+        tables = nbp_api.get_table_data_for_range(currencies, start_date, end_date, raise_on_error=True)
+        fetched.update({code: nbp_api.rates_to_series(code, rates) for code, rates in tables.items()})
+    if GOLD_SERIES in series_list:
+        fetched[GOLD_SERIES] = nbp_api.get_gold_series_for_range(start_date, end_date, raise_on_error=True)
+    with database.SessionLocal() as db:
+        for series, data in fetched.items():
+            _store_gap(db, series, start_date, end_date, data)
+    return {series: data.dates.max().astype(date) if len(data) else None for series, data in fetched.items()}
+
+def coalescing_stats():
+    """How many multi-series loads were served by joining an identical in-flight load."""
+    return _inflight.stats()
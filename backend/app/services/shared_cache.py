@@ -0,0 +1,243 @@
+import logging
+import mmap
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, Tuple
+import numpy as np
+from ..config import settings
+from . import nbp_calendar
+from .nbp_cache import nbp_now
+from .rate_series import RateSeries, GOLD_SERIES
+
+try:
+    import fcntl
+except ImportError: # Not on POSIX: the shared cache is disabled
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Host-wide rate cache shared by all worker processes through memory-mapped
+# files, one per series (<SHARED_CACHE_DIR>/<SERIES>.bin):
+#
+#   header   magic, version, record count, range count
+#   records  fixed-width (date: datetime64[D], value: float64), sorted by date
+#   ranges   (start, end) date ranges known to be complete, sorted and merged
+#
+# Readers map the file read-only and answer range queries by binary search
+# over the mapped date column, returning views into the mapping (no copy, no
+# JSON). Writers take an exclusive flock, merge, write a new file and
+# os.replace it, so readers always see a complete snapshot and pick up the new
+# file on their next lookup. Only final data (dates before today) is stored.
+# Ranges are kept trimmed to NBP business days (nbp_calendar), so extending one
+# over a weekend or holiday, which adds no data, does not rewrite the file.
+
+MAGIC = b"NBPR"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u4"), ("records", "<u8"), ("ranges", "<u8")])
+RECORD_DTYPE = np.dtype([("date", "<M8[D]"), ("value", "<f8")])
+RANGE_DTYPE = np.dtype([("start", "<M8[D]"), ("end", "<M8[D]")])
+SERIES_CODE = re.compile(r"[A-Z]{3}|" + re.escape(GOLD_SERIES)) # Codes double as file names
+
+def _series_code(code: str) -> str | None:
+    """Normalized series code, or None when it cannot be a series (and must not become a path)."""
+    code = code.upper() if isinstance(code, str) else ""
+    return code if SERIES_CODE.fullmatch(code) else None
+
+class _Snapshot:
+    """One mapped version of a series file."""
+
+    __slots__ = ("key", "records", "ranges")
+
+    def __init__(self, key: Tuple[int, int, int], records: np.ndarray, ranges: np.ndarray):
+        self.key = key
+        self.records = records
+        self.ranges = ranges
+
+    def covers(self, start_date: date, end_date: date) -> bool:
+        if not len(self.ranges):
+            return False
+        i = np.searchsorted(self.ranges["start"], np.datetime64(start_date, "D"), side="right") - 1
+        return i >= 0 and self.ranges["end"][i] >= np.datetime64(end_date, "D")
+
+    def slice(self, code: str, start_date: date, end_date: date) -> RateSeries:
+        dates = self.records["date"]
+        lo = np.searchsorted(dates, np.datetime64(start_date, "D"), side="left")
+        hi = np.searchsorted(dates, np.datetime64(end_date, "D"), side="right")
+        return RateSeries(code, dates[lo:hi], self.records["value"][lo:hi])
+
+def _merge_ranges(ranges: np.ndarray) -> np.ndarray:
+    """Sorts and merges overlapping ranges and those with no business day between them."""
+    if len(ranges) < 2:
+        return ranges
+    ranges = np.sort(ranges, order="start")
+    merged = [list(ranges[0])]
+    for start, end in ranges[1:]:
+        if start <= np.datetime64(nbp_calendar.next_business_day(merged[-1][1]), "D"):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.array([tuple(r) for r in merged], dtype=RANGE_DTYPE)
+
+def _records(series: RateSeries) -> np.ndarray:
+    records = np.empty(len(series), dtype=RECORD_DTYPE)
+    records["date"] = series.dates
+    records["value"] = series.values
+    return records
+
+class SharedRateCache:
+    """Memory-mapped per-series rate store shared by the processes of a host."""
+
+    def __init__(self, directory: str, enabled: bool = True):
+        self.directory = directory
+        self.enabled = enabled and fcntl is not None
+        self._snapshots: Dict[str, _Snapshot] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        if self.enabled:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Shared rate cache disabled, cannot create {directory}: {e}")
+                self.enabled = False
+
+    def _path(self, code: str, suffix: str = ".bin") -> str:
+        """File of a series code already validated by _series_code."""
+        return os.path.join(self.directory, f"{code}{suffix}")
+
+    def _snapshot(self, code: str) -> _Snapshot | None:
+        """Current mapping of a series file, remapped when a writer has replaced it."""
+        path = self._path(code)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            snapshot = self._snapshots.get(code)
+        if snapshot is not None and snapshot.key == key:
+            return snapshot
+        try:
+            with open(path, "rb") as f:
+                # Views below keep the mapping alive; it is released with the last one
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header = np.frombuffer(mapping, HEADER_DTYPE, count=1)[0]
+            if header["magic"] != MAGIC or header["version"] != VERSION:
+                logger.warning(f"Ignoring shared cache file with unknown format: {path}")
+                return None
+            offset = HEADER_DTYPE.itemsize
+            records = np.frombuffer(mapping, RECORD_DTYPE, count=int(header["records"]), offset=offset)
+            offset += records.nbytes
+            ranges = np.frombuffer(mapping, RANGE_DTYPE, count=int(header["ranges"]), offset=offset)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map shared cache file {path}: {e}")
+            return None
+        snapshot = _Snapshot(key, records, ranges)
+        with self._lock:
+            self._snapshots[code] = snapshot
+        return snapshot
+
+    def lookup(self, code: str, start_date: date, end_date: date) -> RateSeries | None:
+        """
+        The stored points of [start_date, end_date] as zero-copy views, or None
+        unless the whole range is known to be complete.
+        """
+        code = _series_code(code)
+        if not self.enabled or code is None:
+            return None
+        snapshot = self._snapshot(code)
+        business_range = nbp_calendar.trim(start_date, end_date)
+        if snapshot is None or business_range is None or not snapshot.covers(*business_range):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return snapshot.slice(code, start_date, end_date)
+
+    @contextmanager
+    def _write_lock(self, code: str) -> Iterator[None]:
+        with open(self._path(code, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def store(self, code: str, start_date: date, end_date: date, series: RateSeries) -> None:
+        """
+        Records series as the complete data of [start_date, end_date]. Dates from
+        today on are left out, since today's table may not be published yet. The
+        file is only rewritten when the store adds records or coverage.
+        """
+        code = _series_code(code)
+        if not self.enabled or code is None:
+            return
+        end_date = min(end_date, nbp_now().date() - timedelta(days=1))
+        business_range = nbp_calendar.trim(start_date, end_date)
+        if business_range is None:
+            return # No table in the range, nothing to record
+        series = series.sort().slice(start_date, end_date)
+        new_range = np.array([business_range], dtype=RANGE_DTYPE)
+        try:
+            with self._write_lock(code):
+                current = self._snapshot(code)
+                if current is not None:
+                    if current.covers(*business_range):
+                        return # Already complete, possibly stored by another process
+                    existing = RateSeries(code, current.records["date"], current.records["value"])
+                    records = _records(series.merge(existing))
+                    ranges = _merge_ranges(np.concatenate((current.ranges, new_range)))
+                    if np.array_equal(records, current.records) and np.array_equal(ranges, current.ranges):
+                        return
+                else:
+                    records, ranges = _records(series.dedup()), new_range
+                self._write(code, records, ranges)
+            with self._lock:
+                self.writes += 1
+        except OSError as e:
+            logger.warning(f"Could not update shared cache for {code}: {e}")
+
+    def _write(self, code: str, records: np.ndarray, ranges: np.ndarray) -> None:
+        header = np.array([(MAGIC, VERSION, len(records), len(ranges))], dtype=HEADER_DTYPE)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{code}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header.tobytes())
+                f.write(records.tobytes())
+                f.write(ranges.tobytes())
+            os.replace(tmp_path, self._path(code)) # Atomic: readers see the old or the new file
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def clear(self) -> None:
+        """Removes all series files (e.g. after NBP corrects published data)."""
+        with self._lock:
+            self._snapshots.clear()
+        if not self.enabled:
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                os.unlink(os.path.join(self.directory, name))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "directory": self.directory,
+                "mapped_series": len(self._snapshots),
+                "mapped_bytes": sum(s.records.nbytes + s.ranges.nbytes for s in self._snapshots.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+shared_cache = SharedRateCache(settings.SHARED_CACHE_DIR, settings.SHARED_CACHE_ENABLED)
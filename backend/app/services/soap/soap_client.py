@@ -1,6 +1,12 @@
-from zeep import Client, Transport
+from zeep import AsyncClient, Client, Transport
+from zeep.cache import InMemoryCache
 from zeep.exceptions import Fault, TransportError
+from zeep.transports import AsyncTransport
+import httpx
 import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import MaxRetryError
 from ...config import settings
 
@@ -9,6 +15,50 @@ logger = logging.getLogger(__name__)
 # Use service name in Docker or localhost for development
 WSDL_URL = f"http://{settings.SOAP_SERVICE_HOST}:{settings.SOAP_SERVICE_PORT}/soap/?wsdl"
 
+# Long-lived clients: the WSDL is downloaded and parsed once (and kept in an
+# in-memory cache for SOAP_WSDL_MAX_AGE seconds), and calls reuse pooled
+# keep-alive connections instead of building a new client per call.
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+def _wsdl_cache() -> InMemoryCache:
+    return InMemoryCache(timeout=settings.SOAP_WSDL_MAX_AGE)
+
+def get_client() -> Client:
+    """Shared synchronous zeep client, created on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.HTTP_PER_HOST_LIMIT)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            transport = Transport(session=session, cache=_wsdl_cache(), timeout=10, operation_timeout=30)
+            _client = Client(WSDL_URL, transport=transport)
+        return _client
+
+def get_async_client() -> AsyncClient:
+    """Shared asyncio zeep client (httpx-based pooled transport), created on first use."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            limits = httpx.Limits(max_connections=settings.HTTP_PER_HOST_LIMIT, keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY)
+            transport = AsyncTransport(
+                client=httpx.AsyncClient(limits=limits, timeout=30),
+                wsdl_client=httpx.Client(timeout=10),
+                cache=_wsdl_cache(),
+            )
+            _async_client = AsyncClient(WSDL_URL, transport=transport)
+        return _async_client
+
+def reset_clients():
+    """Drops the shared clients, e.g. after the service's WSDL changed."""
+    global _client, _async_client
+    with _lock:
+        _client = None
+        _async_client = None
+
 def fetch_exchange_rates(currency_code: str, start_date: str, end_date: str):
     """
     Fetch exchange rates using the SOAP service with proper error handling.
@@ -22,9 +72,8 @@ def fetch_exchange_rates(currency_code: str, start_date: str, end_date: str):
         List of exchange rate data or None if error occurs
     """
     try:
-        transport = Transport(timeout=10)
-        client = Client(WSDL_URL, transport=transport)
-        
+        client = get_client()
+
         logger.info(f"Fetching rates for {currency_code} from {start_date} to {end_date}")
         response = client.service.get_exchange_rates(
             currency_code=currency_code,
@@ -44,6 +93,77 @@ def fetch_exchange_rates(currency_code: str, start_date: str, end_date: str):
     
     return None
 
+def fetch_exchange_rates_batch(items):
+    """
+    Fetch exchange rates for many currencies and date ranges in one SOAP call.
+
+    Args:
+        items: Iterable of (currency_code, start_date, end_date) tuples,
+               dates in YYYY-MM-DD format
+
+    Returns:
+        List of per-item results (currency_code, start_date, end_date and
+        rates, or an error) or None if error occurs
+    """
+    try:
+        client = get_client()
+
+        batch = [
+            {"currency_code": currency_code, "start_date": start_date, "end_date": end_date}
+            for currency_code, start_date, end_date in items
+        ]
+        logger.info(f"Fetching rates for {len(batch)} currency ranges in one batch")
+        return client.service.get_exchange_rates_batch(item=batch)
+
+    except Fault as fault:
+        logger.error(f"SOAP Fault: {fault.message}")
+    except TransportError as transport_error:
+        logger.error(f"Transport Error: {transport_error}")
+    except MaxRetryError:
+        logger.error("Max retries exceeded - service unavailable")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+
+    return None
+
+async def fetch_exchange_rates_async(currency_code: str, start_date: str, end_date: str):
+    """Async variant of fetch_exchange_rates using the shared AsyncClient."""
+    try:
+        client = get_async_client()
+        logger.info(f"Fetching rates for {currency_code} from {start_date} to {end_date}")
+        return await client.service.get_exchange_rates(
+            currency_code=currency_code,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except Fault as fault:
+        logger.error(f"SOAP Fault: {fault.message}")
+    except (TransportError, httpx.HTTPError) as transport_error:
+        logger.error(f"Transport Error: {transport_error}")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+
+    return None
+
+async def fetch_exchange_rates_batch_async(items):
+    """Async variant of fetch_exchange_rates_batch using the shared AsyncClient."""
+    try:
+        client = get_async_client()
+        batch = [
+            {"currency_code": currency_code, "start_date": start_date, "end_date": end_date}
+            for currency_code, start_date, end_date in items
+        ]
+        logger.info(f"Fetching rates for {len(batch)} currency ranges in one batch")
+        return await client.service.get_exchange_rates_batch(item=batch)
+    except Fault as fault:
+        logger.error(f"SOAP Fault: {fault.message}")
+    except (TransportError, httpx.HTTPError) as transport_error:
+        logger.error(f"Transport Error: {transport_error}")
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+
+    return None
+
 if __name__ == "__main__":
     # Example usage with error handling
     try:
@@ -1,13 +1,25 @@
 from http.server import BaseHTTPRequestHandler
 from xml.etree import ElementTree
-import requests
-from datetime import datetime, timedelta
+from datetime import date, datetime
+import io
 import logging
-from wsgiref.simple_server import make_server
-from typing import Callable, Dict, List, Any
+from wsgiref.simple_server import make_server, WSGIServer
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Any, Tuple
+import anyio
+from lxml import etree
+from ...config import settings
+from .. import cross_rates, nbp_api
+from . import wsdl
 
 logger = logging.getLogger(__name__)
 
+SOAP_ENV_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+
+# Concurrent NBP fetches of batch operations, shared across SOAP requests
+_batch_executor = ThreadPoolExecutor(max_workers=settings.NBP_MAX_CONCURRENCY, thread_name_prefix='soap-batch')
+
 class SOAPHandler:
     def __init__(self):
         self.namespace = {'soap': 'http://schemas.xmlsoap.org/soap/envelope/'}
@@ -15,7 +27,39 @@ class SOAPHandler:
     def __call__(self, environ: dict, start_response: Callable) -> List[bytes]:
         """WSGI application handler for SOAP requests"""
         method = environ.get('REQUEST_METHOD', '')
-        
+        request_body = b''
+        if method == 'POST':
+            content_length = int(environ.get('CONTENT_LENGTH') or 0)
+            request_body = environ['wsgi.input'].read(content_length)
+        location = f"{environ.get('wsgi.url_scheme', 'http')}://{environ.get('HTTP_HOST', 'localhost')}{environ.get('SCRIPT_NAME', '')}{environ.get('PATH_INFO', '')}"
+        status_line, headers, response_body = self.handle_request(
+            method, request_body, environ.get('QUERY_STRING', ''), location, environ.get('HTTP_IF_NONE_MATCH')
+        )
+        start_response(status_line, headers)
+        return [response_body] if isinstance(response_body, bytes) else response_body
+
+    def handle_request(
+        self, method: str, request_body: bytes, query_string: str = '', location: str = '', if_none_match: str | None = None
+    ) -> Tuple[str, List[Tuple[str, str]], bytes | Iterator[bytes]]:
+        """
+        Transport-independent request handling shared by the WSGI and ASGI
+        entry points. Returns (status line, headers, body); the body is either
+        bytes or, for streamed operations, an iterator of byte chunks.
+        """
+        # Serve the WSDL on GET ?wsdl
+        if method in ('GET', 'HEAD') and query_string.lower().split('&')[0] == 'wsdl':
+            document, etag = wsdl.get_wsdl(location)
+            headers = [
+                ('Content-Type', 'text/xml; charset=utf-8'),
+                ('Cache-Control', f'public, max-age={settings.SOAP_WSDL_MAX_AGE}'),
+                ('ETag', etag),
+                ('Access-Control-Allow-Origin', '*'),
+            ]
+            if if_none_match == etag:
+                return '304 Not Modified', headers, b''
+            headers.append(('Content-Length', str(len(document))))
+            return '200 OK', headers, document if method == 'GET' else b''
+
         # Handle OPTIONS for CORS
         if method == 'OPTIONS':
             headers = [
@@ -25,14 +69,11 @@ class SOAPHandler:
                 ('Access-Control-Max-Age', '86400'),
                 ('Content-Type', 'text/plain'),
             ]
-            start_response('200 OK', headers)
-            return [b'']
+            return '200 OK', headers, b''
 
         # Handle POST request
         if method == 'POST':
             try:
-                content_length = int(environ.get('CONTENT_LENGTH', 0))
-                request_body = environ['wsgi.input'].read(content_length)
                 logger.info(f"Received SOAP request: {request_body.decode('utf-8')}")
 
                 # Parse SOAP request
@@ -48,7 +89,8 @@ class SOAPHandler:
                 handlers = {
                     'get_exchange_rates': self.handle_get_exchange_rates,
                     'get_historical_rates': self.handle_get_historical_rates,
-                    'convert_currency': self.handle_convert_currency
+                    'convert_currency': self.handle_convert_currency,
+                    'get_exchange_rates_batch': self.handle_get_exchange_rates_batch
                 }
 
                 handler = handlers.get(method_name)
@@ -56,18 +98,20 @@ class SOAPHandler:
                     raise ValueError(f"Unknown method: {method_name}")
 
                 response_data = handler(method_element)
-                soap_response = self._create_soap_response(response_data)
-                response_bytes = soap_response.encode('utf-8')
-
                 headers = [
                     ('Content-Type', 'text/xml; charset=utf-8'),
-                    ('Content-Length', str(len(response_bytes))),
                     ('Access-Control-Allow-Origin', '*'),
                     ('Access-Control-Allow-Methods', 'POST, OPTIONS'),
                     ('Access-Control-Allow-Headers', 'Content-Type, SOAPAction'),
                 ]
-                start_response('200 OK', headers)
-                return [response_bytes]
+                if not isinstance(response_data, str):
+                    # Handler streams the complete envelope itself
+                    return '200 OK', headers, response_data
+
+                soap_response = self._create_soap_response(response_data)
+                response_bytes = soap_response.encode('utf-8')
+                headers.insert(1, ('Content-Length', str(len(response_bytes))))
+                return '200 OK', headers, response_bytes
 
             except Exception as e:
                 logger.error(f"SOAP error: {str(e)}", exc_info=True)
@@ -78,15 +122,13 @@ class SOAPHandler:
                     ('Content-Length', str(len(error_bytes))),
                     ('Access-Control-Allow-Origin', '*'),
                 ]
-                start_response('500 Internal Server Error', headers)
-                return [error_bytes]
+                return '500 Internal Server Error', headers, error_bytes
 
         # Handle unsupported methods
-        start_response('405 Method Not Allowed', [
+        return '405 Method Not Allowed', [
             ('Content-Type', 'text/xml'),
             ('Access-Control-Allow-Origin', '*'),
-        ])
-        return [b'Method not allowed']
+        ], b'Method not allowed'
 
     def _create_soap_response(self, body_content: str) -> str:
         return f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -118,17 +160,14 @@ class SOAPHandler:
             datetime.strptime(start_date, '%Y-%m-%d')
             datetime.strptime(end_date, '%Y-%m-%d')
 
-            # Call NBP API
-            url = f"http://api.nbp.pl/api/exchangerates/rates/a/{currency_code}/{start_date}/{end_date}/"
-            response = requests.get(url, headers={"Accept": "application/json"})
+            # Shared NBP path: split into 93-day chunks and served from the response cache
+            rates = nbp_api.get_currency_data_for_range(
+                currency_code, date.fromisoformat(start_date), date.fromisoformat(end_date), raise_on_error=True
+            )
 
-            if response.status_code == 404:
+            if not rates:
                 return f"<getExchangeRatesResponse><error>No data found for {currency_code}</error></getExchangeRatesResponse>"
 
-            response.raise_for_status()
-            data = response.json()
-            rates = data.get('rates', [])
-
             rates_xml = "".join(
                 f'<rate><date>{r["effectiveDate"]}</date><value>{r["mid"]}</value></rate>'
                 for r in rates
@@ -145,22 +184,11 @@ class SOAPHandler:
             currency_code = method_element.find('currency_code').text.upper()
             date_str = method_element.find('date').text
 
-            # Validate date
-            datetime.strptime(date_str, '%Y-%m-%d')
-
-            # Call NBP API
-            url = f"http://api.nbp.pl/api/exchangerates/rates/a/{currency_code}/{date_str}/"
-            response = requests.get(url, headers={"Accept": "application/json"})
-
-            if response.status_code == 404:
-                return f"<getHistoricalRatesResponse><error>No data found for {currency_code} on {date_str}</error></getHistoricalRatesResponse>"
-
-            response.raise_for_status()
-            data = response.json()
-            rate = data['rates'][0] if data.get('rates') else None
+            # Weekends and holidays resolve to the last published table, located with the calendar
+            rate = nbp_api.get_rate_as_of(currency_code, date.fromisoformat(date_str), raise_on_error=True)
 
             if not rate:
-                raise ValueError(f"No rate data available for {currency_code} on {date_str}")
+                return f"<getHistoricalRatesResponse><error>No data found for {currency_code} on {date_str}</error></getHistoricalRatesResponse>"
 
             return f"""<getHistoricalRatesResponse>
                 <rate>
@@ -174,6 +202,76 @@ class SOAPHandler:
             logger.error(f"Error in get_historical_rates: {str(e)}", exc_info=True)
             raise
 
+    def handle_get_exchange_rates_batch(self, method_element):
+        """
+        Handle get_exchange_rates_batch SOAP method: many <item> elements, each with
+        currency_code, start_date and end_date. Items are fetched concurrently
+        through the shared NBP path (93-day chunks, response cache) and the
+        response envelope is streamed with lxml's incremental writer.
+        """
+        try:
+            items = []
+            for item in method_element.iter('item'):
+                currency_code = (item.findtext('currency_code') or '').strip().upper()
+                if len(currency_code) != 3:
+                    raise ValueError(f"Invalid currency_code: {currency_code!r}")
+                start_date = date.fromisoformat((item.findtext('start_date') or '').strip())
+                end_date = date.fromisoformat((item.findtext('end_date') or '').strip())
+                if end_date < start_date:
+                    raise ValueError(f"end_date before start_date for {currency_code}")
+                items.append((currency_code, start_date, end_date))
+            if not items:
+                raise ValueError("get_exchange_rates_batch requires at least one item")
+            if len(items) > settings.SOAP_BATCH_MAX_ITEMS:
+                raise ValueError(f"Batch exceeds the {settings.SOAP_BATCH_MAX_ITEMS} item limit")
+
+            def fetch(currency_code: str, start_date: date, end_date: date):
+                try:
+                    return nbp_api.get_currency_data_for_range(currency_code, start_date, end_date, raise_on_error=True)
+                except nbp_api.NBPFetchError as e:
+                    return e
+
+            futures = [_batch_executor.submit(fetch, *item) for item in items]
+            results = [future.result() for future in futures]
+            return self._iter_batch_response(items, results)
+
+        except Exception as e:
+            logger.error(f"Error in get_exchange_rates_batch: {str(e)}", exc_info=True)
+            raise
+
+    def _iter_batch_response(self, items, results) -> Iterator[bytes]:
+        """Streams the batch response envelope, one <result> element per item."""
+        buffer = io.BytesIO()
+
+        def drain() -> bytes:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        with etree.xmlfile(buffer, encoding='UTF-8') as xf:
+            xf.write_declaration()
+            with xf.element(f'{{{SOAP_ENV_NS}}}Envelope', nsmap={'soap': SOAP_ENV_NS}):
+                with xf.element(f'{{{SOAP_ENV_NS}}}Body'):
+                    with xf.element('getExchangeRatesBatchResponse'):
+                        for (currency_code, start_date, end_date), rates in zip(items, results):
+                            result = etree.Element('result')
+                            etree.SubElement(result, 'currency_code').text = currency_code
+                            etree.SubElement(result, 'start_date').text = start_date.isoformat()
+                            etree.SubElement(result, 'end_date').text = end_date.isoformat()
+                            if isinstance(rates, Exception):
+                                etree.SubElement(result, 'error').text = str(rates)
+                            elif not rates:
+                                etree.SubElement(result, 'error').text = f"No data found for {currency_code}"
+                            for r in rates if isinstance(rates, list) else []:
+                                rate = etree.SubElement(result, 'rate')
+                                etree.SubElement(rate, 'date').text = r['effectiveDate']
+                                etree.SubElement(rate, 'value').text = str(r['mid'])
+                            xf.write(result)
+                            xf.flush()
+                            yield drain()
+        yield drain()
+
     def handle_convert_currency(self, method_element):
         """Handle convert_currency SOAP method"""
         try:
@@ -184,59 +282,113 @@ class SOAPHandler:
             if amount <= 0:
                 raise ValueError("Amount must be positive")
 
-            # Get latest rates for both currencies
-            today = datetime.now().strftime('%Y-%m-%d')
-            rates = {}
-
-            for currency in [from_currency, to_currency]:
-                if currency != 'PLN':
-                    url = f"http://api.nbp.pl/api/exchangerates/rates/a/{currency}/today/"
-                    response = requests.get(url, headers={"Accept": "application/json"})
-                    
-                    if response.status_code == 404:
-                        # Try yesterday if today's rate is not available
-                        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-                        url = f"http://api.nbp.pl/api/exchangerates/rates/a/{currency}/{yesterday}/"
-                        response = requests.get(url, headers={"Accept": "application/json"})
-                        
-                        if response.status_code == 404:
-                            raise ValueError(f"No rate found for {currency}")
-                    
-                    response.raise_for_status()
-                    rates[currency] = response.json()['rates'][0]['mid']
-                else:
-                    rates[currency] = 1.0
-
-            # Calculate conversion
-            if from_currency == 'PLN':
-                result = amount / rates[to_currency]
-            elif to_currency == 'PLN':
-                result = amount * rates[from_currency]
-            else:
-                pln_amount = amount * rates[from_currency]
-                result = pln_amount / rates[to_currency]
+            # One cached table A lookup covers both legs, including PLN and cross rates;
+            # weekends and holidays resolve to the last published table
+            conversion = cross_rates.convert(amount, from_currency, to_currency)
 
             return f"""<convertCurrencyResponse>
-                <result>{result:.4f}</result>
+                <result>{conversion['result']:.4f}</result>
                 <from_currency>{from_currency}</from_currency>
                 <to_currency>{to_currency}</to_currency>
                 <amount>{amount}</amount>
-                <date>{today}</date>
+                <date>{conversion['effective_date']:%Y-%m-%d}</date>
             </convertCurrencyResponse>"""
 
         except Exception as e:
             logger.error(f"Error in convert_currency: {str(e)}", exc_info=True)
             raise
 
-# Create WSGI application
-wsgi_app = SOAPHandler()
+class SOAPASGIApp:
+    """
+    Native ASGI entry point for the SOAP handler, mounted at /soap. Request
+    bodies are read asynchronously and the (blocking) handlers run in worker
+    threads, at most SOAP_WORKERS at a time, so one slow NBP call does not
+    hold up other SOAP clients or the event loop.
+    """
+
+    def __init__(self, handler: SOAPHandler, workers: int):
+        self.handler = handler
+        self.workers = workers
+        self._limiter = None
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope['type'] != 'http':
+            return
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.workers)
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        request_headers = dict(scope.get('headers') or [])
+        host = request_headers.get(b'host', b'localhost').decode('latin-1')
+        root_path, path = scope.get('root_path', ''), scope.get('path', '')
+        if not path.startswith(root_path): # Older servers pass the path relative to the mount
+            path = root_path + path
+        location = f"{scope.get('scheme', 'http')}://{host}{path}"
+        if_none_match = request_headers.get(b'if-none-match')
+        status_line, headers, body = await anyio.to_thread.run_sync(
+            self.handler.handle_request, scope['method'], b''.join(chunks),
+            scope.get('query_string', b'').decode('latin-1'), location,
+            if_none_match.decode('latin-1') if if_none_match else None,
+            limiter=self._limiter
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': int(status_line.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        if isinstance(body, bytes):
+            await send({'type': 'http.response.body', 'body': body})
+            return
+        # Streamed envelope: serialize chunk by chunk off the event loop
+        while (chunk := await anyio.to_thread.run_sync(next, body, None, limiter=self._limiter)) is not None:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """wsgiref server handling each connection on a bounded pool of worker threads."""
+
+    request_queue_size = 128 # Listen backlog, sized for bursts of parallel clients
+
+    def __init__(self, *args, workers: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='soap-worker')
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
-def run_server(host='0.0.0.0', port=8001):
-    """Run the SOAP server using WSGI"""
-    with make_server(host, port, wsgi_app) as httpd:
-        logger.info(f"SOAP service starting on http://{host}:{port}")
+# Create WSGI and ASGI applications
+wsgi_app = SOAPHandler()
+asgi_app = SOAPASGIApp(wsgi_app, settings.SOAP_WORKERS)
+
+def create_server(host='0.0.0.0', port=8001, workers: int | None = None) -> ThreadPoolWSGIServer:
+    """Binds the standalone SOAP server; call serve_forever() to run it and shutdown() to stop it"""
+    workers = workers or settings.SOAP_WORKERS
+    server_class = partial(ThreadPoolWSGIServer, workers=workers)
+    httpd = make_server(host, port, wsgi_app, server_class=server_class)
+    logger.info(f"SOAP service starting on http://{host}:{port} with {workers} workers")
+    return httpd
+
+def run_server(host='0.0.0.0', port=8001, workers: int | None = None):
+    """Run the standalone SOAP server, handling up to `workers` requests in parallel"""
+    with create_server(host, port, workers) as httpd:
         httpd.serve_forever()
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
-    run_server()
\ No newline at end of file
+    run_server()
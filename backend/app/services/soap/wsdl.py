@@ -0,0 +1,177 @@
+import hashlib
+import threading
+from typing import Dict, Tuple
+
+# WSDL 1.1 (document/literal) description of the operations served by
+# SOAPHandler. Request and response elements are unqualified, matching the
+# element names the handler parses and emits. The document only varies by
+# service address, so it is rendered once per location and reused.
+
+SERVICE_NAME = "NBPExchangeService"
+
+WSDL_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<wsdl:definitions name="{service}"
+    targetNamespace="http://nbp-exchange-monitor/soap"
+    xmlns:tns="http://nbp-exchange-monitor/soap"
+    xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+
+  <wsdl:types>
+    <xsd:schema elementFormDefault="unqualified">
+      <xsd:complexType name="Rate">
+        <xsd:sequence>
+          <xsd:element name="date" type="xsd:date"/>
+          <xsd:element name="value" type="xsd:double"/>
+          <xsd:element name="currency" type="xsd:string" minOccurs="0"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="RangeItem">
+        <xsd:sequence>
+          <xsd:element name="currency_code" type="xsd:string"/>
+          <xsd:element name="start_date" type="xsd:date"/>
+          <xsd:element name="end_date" type="xsd:date"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="RangeResult">
+        <xsd:sequence>
+          <xsd:element name="currency_code" type="xsd:string"/>
+          <xsd:element name="start_date" type="xsd:date"/>
+          <xsd:element name="end_date" type="xsd:date"/>
+          <xsd:element name="error" type="xsd:string" minOccurs="0"/>
+          <xsd:element name="rate" type="Rate" minOccurs="0" maxOccurs="unbounded"/>
+        </xsd:sequence>
+      </xsd:complexType>
+
+      <xsd:element name="get_exchange_rates">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="currency_code" type="xsd:string"/>
+            <xsd:element name="start_date" type="xsd:date"/>
+            <xsd:element name="end_date" type="xsd:date"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+      <xsd:element name="getExchangeRatesResponse">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="error" type="xsd:string" minOccurs="0"/>
+            <xsd:element name="rate" type="Rate" minOccurs="0" maxOccurs="unbounded"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+
+      <xsd:element name="get_historical_rates">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="currency_code" type="xsd:string"/>
+            <xsd:element name="date" type="xsd:date"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+      <xsd:element name="getHistoricalRatesResponse">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="error" type="xsd:string" minOccurs="0"/>
+            <xsd:element name="rate" type="Rate" minOccurs="0"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+
+      <xsd:element name="convert_currency">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="from_currency" type="xsd:string"/>
+            <xsd:element name="to_currency" type="xsd:string"/>
+            <xsd:element name="amount" type="xsd:double"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+      <xsd:element name="convertCurrencyResponse">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="result" type="xsd:double"/>
+            <xsd:element name="from_currency" type="xsd:string"/>
+            <xsd:element name="to_currency" type="xsd:string"/>
+            <xsd:element name="amount" type="xsd:double"/>
+            <xsd:element name="date" type="xsd:date"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+
+      <xsd:element name="get_exchange_rates_batch">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="item" type="RangeItem" maxOccurs="unbounded"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+      <xsd:element name="getExchangeRatesBatchResponse">
+        <xsd:complexType>
+          <xsd:sequence>
+            <xsd:element name="result" type="RangeResult" minOccurs="0" maxOccurs="unbounded"/>
+          </xsd:sequence>
+        </xsd:complexType>
+      </xsd:element>
+    </xsd:schema>
+  </wsdl:types>
+{messages}
+  <wsdl:portType name="{service}PortType">{port_operations}
+  </wsdl:portType>
+
+  <wsdl:binding name="{service}Binding" type="tns:{service}PortType">
+    <soap:binding style="document" transport="http://schemas.xmlsoap.org/soap/http"/>{binding_operations}
+  </wsdl:binding>
+
+  <wsdl:service name="{service}">
+    <wsdl:port name="{service}Port" binding="tns:{service}Binding">
+      <soap:address location="{location}"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>
+"""
+
+# operation name -> response element name
+OPERATIONS = {
+    "get_exchange_rates": "getExchangeRatesResponse",
+    "get_historical_rates": "getHistoricalRatesResponse",
+    "convert_currency": "convertCurrencyResponse",
+    "get_exchange_rates_batch": "getExchangeRatesBatchResponse",
+}
+
+def render_wsdl(location: str) -> bytes:
+    messages = "".join(f"""
+  <wsdl:message name="{op}Request"><wsdl:part name="parameters" element="{op}"/></wsdl:message>
+  <wsdl:message name="{op}Response"><wsdl:part name="parameters" element="{response}"/></wsdl:message>"""
+        for op, response in OPERATIONS.items())
+    port_operations = "".join(f"""
+    <wsdl:operation name="{op}">
+      <wsdl:input message="tns:{op}Request"/>
+      <wsdl:output message="tns:{op}Response"/>
+    </wsdl:operation>""" for op in OPERATIONS)
+    binding_operations = "".join(f"""
+    <wsdl:operation name="{op}">
+      <soap:operation soapAction="{op}"/>
+      <wsdl:input><soap:body use="literal"/></wsdl:input>
+      <wsdl:output><soap:body use="literal"/></wsdl:output>
+    </wsdl:operation>""" for op in OPERATIONS)
+    return WSDL_TEMPLATE.format(
+        service=SERVICE_NAME,
+        messages=messages,
+        port_operations=port_operations,
+        binding_operations=binding_operations,
+        location=location,
+    ).encode("utf-8")
+
+_cache: Dict[str, Tuple[bytes, str]] = {}
+_lock = threading.Lock()
+
+def get_wsdl(location: str) -> Tuple[bytes, str]:
+    """Rendered WSDL for a service address and its ETag, computed once per address."""
+    with _lock:
+        cached = _cache.get(location)
+        if cached is None:
+            document = render_wsdl(location)
+            cached = (document, f'"{hashlib.sha256(document).hexdigest()[:32]}"')
+            _cache[location] = cached
+        return cached
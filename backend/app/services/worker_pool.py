@@ -0,0 +1,60 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+from fastapi import Response
+from ..config import settings
+
+# Bounded pool for CPU-bound work started from async endpoints (serialization,
+# parsing, NumPy analytics). Keeping it separate from the default threadpool
+# means a few large exports cannot starve sync endpoints or the event loop.
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_SENTINEL = object()
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.CPU_POOL_WORKERS, thread_name_prefix="cpu-worker")
+        return _executor
+
+async def run(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs func(*args, **kwargs) on the pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+async def iterate(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Async view of a blocking iterator (e.g. an export_service generator): each
+    chunk is produced on the pool, so StreamingResponse never runs it on the loop.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    while (chunk := await loop.run_in_executor(executor, next, iterator, _SENTINEL)) is not _SENTINEL:
+        yield chunk
+
+def _default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+async def json_response(content: Any, status_code: int = 200) -> Response:
+    """JSON response serialized on the pool instead of by FastAPI on the event loop."""
+    return Response(content=await run(dumps, content), status_code=status_code, media_type="application/json")
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,5 @@
+import pytest
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
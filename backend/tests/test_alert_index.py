@@ -0,0 +1,37 @@
+import random
+from types import SimpleNamespace
+from app.models import NotificationDirection
+from app.services.alert_index import AlertIndex
+
+ABOVE, BELOW = NotificationDirection.ABOVE, NotificationDirection.BELOW
+
+def notification(currency, direction, threshold):
+    return SimpleNamespace(currency=currency, direction=direction, threshold=threshold)
+
+def brute_force(notifications, currency, rate):
+    return [
+        n for n in notifications if n.currency.upper() == currency.upper()
+        and (n.threshold < rate if n.direction == ABOVE else n.threshold > rate)
+    ]
+
+def test_thresholds_are_strict():
+    above, below = notification("usd", ABOVE, 4.0), notification("USD", BELOW, 4.0)
+    index = AlertIndex.build([above, below])
+
+    assert index.triggered("USD", 4.0) == []
+    assert index.triggered("usd", 4.01) == [above]
+    assert index.triggered("USD", 3.99) == [below]
+    assert index.triggered("EUR", 3.99) == []
+    assert len(index) == 2 and index.currencies() == ["USD"]
+
+def test_matches_a_linear_scan():
+    rng = random.Random(7)
+    notifications = [
+        notification(rng.choice(["USD", "eur", "CHF"]), rng.choice([ABOVE, BELOW]), round(rng.uniform(3.5, 4.5), 2))
+        for _ in range(500)
+    ]
+    index = AlertIndex.build(notifications)
+
+    for _ in range(200):
+        currency, rate = rng.choice(["USD", "EUR", "chf", "GBP"]), round(rng.uniform(3.4, 4.6), 2)
+        assert sorted(map(id, index.triggered(currency, rate))) == sorted(map(id, brute_force(notifications, currency, rate)))
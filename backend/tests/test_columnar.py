@@ -0,0 +1,56 @@
+import io
+import numpy as np
+import pytest
+from app.services import columnar
+from app.services.rate_series import RateFrame, RateSeries
+
+needs_pyarrow = pytest.mark.skipif(columnar.pa is None, reason="needs pyarrow")
+
+def frame() -> RateFrame:
+    usd = np.arange(np.datetime64("2024-03-01"), np.datetime64("2024-03-11"), dtype="datetime64[D]")
+    eur = usd[::2]
+    return RateFrame([
+        RateSeries("USD", usd, 4.0 + np.arange(len(usd)) / 1000),
+        RateSeries("EUR", eur, 4.3 + np.arange(len(eur)) / 3),
+    ])
+
+def assert_same_frame(actual: RateFrame, expected: RateFrame):
+    assert sorted(actual.codes()) == sorted(expected.codes())
+    for code in expected.codes():
+        assert np.array_equal(actual[code].dates, expected[code].dates)
+        assert np.array_equal(actual[code].values, expected[code].values) # Exact: no precision lost
+
+FORMATS = [
+    pytest.param(columnar.iter_parquet, columnar.read_parquet, marks=needs_pyarrow, id="parquet"),
+    pytest.param(columnar.iter_arrow, columnar.read_arrow, marks=needs_pyarrow, id="arrow"),
+    pytest.param(columnar.iter_csv, columnar.read_csv, id="csv"),
+]
+
+@pytest.mark.parametrize("write, read", FORMATS)
+@pytest.mark.parametrize("layout", columnar.LAYOUTS)
+def test_round_trip(monkeypatch, write, read, layout):
+    monkeypatch.setattr(columnar.settings, "EXPORT_ROW_GROUP_SIZE", 3) # Several row groups / batches
+    data = b"".join(write(frame(), layout, "Rate", columnar.CODE_KEY))
+
+    assert_same_frame(read(io.BytesIO(data)), frame())
+
+@pytest.mark.parametrize("layout", columnar.LAYOUTS)
+def test_csv_round_trip_without_pyarrow(monkeypatch, layout):
+    data = b"".join(columnar.iter_csv(frame(), layout, "Rate", columnar.CODE_KEY))
+    monkeypatch.setattr(columnar, "pa", None)
+
+    assert_same_frame(columnar.read_csv(io.BytesIO(data)), frame())
+
+def test_csv_layouts():
+    long_csv = b"".join(columnar.iter_csv(frame(), "long", "Rate", columnar.CODE_KEY)).decode().splitlines()
+    wide_csv = b"".join(columnar.iter_csv(frame(), "wide", "Rate")).decode().splitlines()
+
+    assert long_csv[:3] == ["Date,Rate,Currency", "2024-03-01,4.0,USD", "2024-03-01,4.3,EUR"]
+    assert wide_csv[0] in ("Date,EUR,USD", "Date,USD,EUR")
+    assert len(wide_csv) == 11 and wide_csv[2].split(",").count("") == 1 # 03-02 has no EUR point
+
+def test_gold_without_code_column():
+    gold = RateFrame([RateSeries("GOLD", np.array(["2024-03-01", "2024-03-04"], dtype="datetime64[D]"), np.array([260.5, 261.25]))])
+    data = b"".join(columnar.iter_csv(gold, "long", "Price"))
+
+    assert_same_frame(columnar.read_csv(io.BytesIO(data)), gold)
@@ -0,0 +1,21 @@
+import gzip
+import pytest
+from app.services import compression
+
+CHUNKS = [f"{i},2024-01-02,USD,{4 + i / 1000:.4f}\n".encode() for i in range(20000)]
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return compression.brotli.decompress(data)
+    return compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+@pytest.mark.parametrize("encoding", compression.available_encodings())
+def test_compress_iter_round_trips_without_flushing_every_chunk(encoding):
+    pieces = list(compression.compress_iter(iter(CHUNKS), encoding))
+
+    assert decompress(b"".join(pieces), encoding) == b"".join(CHUNKS)
+    # One flush per COMPRESSION_FLUSH_BYTES of input at most, not one per chunk
+    assert len(pieces) <= len(b"".join(CHUNKS)) // compression.settings.COMPRESSION_FLUSH_BYTES + 2
+    assert len(b"".join(pieces)) <= len(compression.compress_bytes(b"".join(CHUNKS), encoding)) * 1.05
@@ -0,0 +1,127 @@
+import asyncio
+import smtplib
+import socket
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+import pytest
+from aiosmtpd.controller import Controller
+from app.config import settings
+from app.services.email_queue import EmailQueue, is_transient
+
+class RecordingHandler:
+    """Accepts messages, optionally answering the first DATA commands with the given replies."""
+
+    def __init__(self, replies=(), delay=0.0):
+        self.replies = list(replies)
+        self.delay = delay
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope)
+        return "250 OK"
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    controllers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        controllers.append(controller)
+        monkeypatch.setattr(settings, "SMTP_SERVER", controller.hostname)
+        monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+        monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+        monkeypatch.setattr(settings, "EMAIL_ADDRESS", "alerts@example.com")
+        monkeypatch.setattr(settings, "EMAIL_PASSWORD", None) # No AUTH on the stand-in server
+        return handler
+
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+def _message(recipient: str) -> MIMEMultipart:
+    message = MIMEMultipart()
+    message["To"] = recipient
+    message["Subject"] = "Rate alert"
+    message.attach(MIMEText("USD crossed your threshold", "plain"))
+    return message
+
+def _queue(**overrides) -> EmailQueue:
+    options = dict(workers=1, max_size=100, max_retries=3, retry_backoff=0.01, idle_timeout=5)
+    options.update(overrides)
+    return EmailQueue(**options)
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def test_delivers_over_one_reused_connection(smtp_server):
+    handler = smtp_server(RecordingHandler())
+    email_queue = _queue()
+    for i in range(5):
+        assert email_queue.enqueue(f"user{i}@example.com", _message(f"user{i}@example.com"))
+    _wait_for(lambda: email_queue.stats()["sent"] == 5)
+    email_queue.stop()
+
+    assert sorted(e.rcpt_tos[0] for e in handler.messages) == [f"user{i}@example.com" for i in range(5)]
+    stats = email_queue.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["failed"] == 0 and stats["retries"] == 0
+
+def test_retries_temporary_failures(smtp_server):
+    handler = smtp_server(RecordingHandler(replies=["451 Try again later", "421 Service busy"]))
+    email_queue = _queue()
+    email_queue.enqueue("user@example.com", _message("user@example.com"))
+    _wait_for(lambda: email_queue.stats()["sent"] + email_queue.stats()["failed"] == 1)
+    email_queue.stop()
+
+    assert len(handler.messages) == 1
+    assert email_queue.stats()["retries"] == 2
+
+def test_permanent_failures_are_not_retried(smtp_server):
+    handler = smtp_server(RecordingHandler(replies=["554 Message rejected"]))
+    email_queue = _queue()
+    email_queue.enqueue("user@example.com", _message("user@example.com"))
+    email_queue.enqueue("other@example.com", _message("other@example.com"))
+    _wait_for(lambda: email_queue.stats()["sent"] + email_queue.stats()["failed"] == 2)
+    email_queue.stop()
+
+    stats = email_queue.stats()
+    assert stats["failed"] == 1 and stats["retries"] == 0 and stats["sent"] == 1
+    assert [e.rcpt_tos[0] for e in handler.messages] == ["other@example.com"]
+    assert stats["connections_opened"] == 1 # The 5xx reply left the connection usable
+
+def test_stop_does_not_hang_on_a_full_queue(smtp_server):
+    smtp_server(RecordingHandler(delay=0.5))
+    email_queue = _queue(max_size=3)
+    while email_queue.enqueue("user@example.com", _message("user@example.com")):
+        pass
+    started = time.monotonic()
+    email_queue.stop(timeout=1.0)
+    assert time.monotonic() - started < 2.0
+
+@pytest.mark.parametrize("error, transient", [
+    (smtplib.SMTPServerDisconnected("gone"), True),
+    (smtplib.SMTPConnectError(421, "busy"), True),
+    (smtplib.SMTPDataError(451, "try later"), True),
+    (smtplib.SMTPDataError(554, "rejected"), False),
+    (smtplib.SMTPSenderRefused(550, "no", "alerts@example.com"), False),
+    (smtplib.SMTPNotSupportedError("no STARTTLS"), False),
+    (socket.timeout("timed out"), True),
+    (ConnectionResetError(), True),
+    (OSError("network unreachable"), True),
+])
+def test_error_classification(error, transient):
+    assert is_transient(error) is transient
@@ -0,0 +1,54 @@
+import httpx
+import numpy as np
+import pytest
+from app import main
+from app.services import compression
+from app.services.rate_series import RateFrame, RateSeries
+
+@pytest.mark.anyio
+async def test_cached_export_matches_the_request_spelling(monkeypatch):
+    dates = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-03-01"), dtype="datetime64[D]")
+    loads = []
+
+    async def load_rate_frame(data_type, start_date, end_date, currencies):
+        loads.append(currencies)
+        codes = currencies.split(",")
+        return RateFrame(RateSeries(code, dates, np.full(len(dates), float(i + 1))) for i, code in enumerate(codes))
+
+    monkeypatch.setattr(main, "_load_rate_frame", load_rate_frame)
+    monkeypatch.setattr(compression, "artifact_cache", compression.ArtifactCache(1 << 20))
+    params = {"data_type": "currency", "start_date": "2024-01-01", "end_date": "2024-02-29"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        async def export(currencies):
+            response = await client.get(
+                f"{main.settings.API_V1_STR}/export/xml", params={**params, "currencies": currencies},
+                headers={"Accept-Encoding": "gzip"},
+            )
+            assert response.status_code == 200
+            return response
+
+        first = await export("usd,eur")
+        second = await export(" USD, eur,usd ")
+
+    assert loads == ["USD,EUR"] # The second request was served from the artifact cache
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.content == second.content
+    assert b'currencies="USD,EUR"' in first.content[:500]
+
+@pytest.mark.anyio
+async def test_not_modified_responses_vary_on_accept_encoding(monkeypatch):
+    dates = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-03-01"), dtype="datetime64[D]")
+
+    async def load_rate_frame(data_type, start_date, end_date, currencies):
+        return RateFrame([RateSeries("USD", dates, np.full(len(dates), 4.0))])
+
+    monkeypatch.setattr(main, "_load_rate_frame", load_rate_frame)
+    params = {"start_date": "2024-01-01", "end_date": "2024-02-29", "currencies": "USD"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        for path in ("data/currency", "export/csv"):
+            url = f"{main.settings.API_V1_STR}/{path}"
+            first = await client.get(url, params={**params, "data_type": "currency"})
+            again = await client.get(url, params={**params, "data_type": "currency"}, headers={"If-None-Match": first.headers["etag"]})
+            assert first.status_code == 200 and again.status_code == 304
+            assert "Accept-Encoding" in again.headers.get("vary", "")
+            assert again.headers["vary"] == first.headers["vary"]
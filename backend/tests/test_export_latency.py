@@ -0,0 +1,53 @@
+import asyncio
+import time
+from datetime import date
+import httpx
+import numpy as np
+import pytest
+from app import main
+from app.services.rate_series import RateFrame, RateSeries
+
+SMALL_REQUESTS = 20
+MAX_SMALL_LATENCY = 0.5 # Seconds per small request while the export runs
+
+def _large_frame(series: int = 4, points: int = 50_000) -> RateFrame:
+    dates = np.arange(np.datetime64("1990-01-01"), np.datetime64("1990-01-01") + points, dtype="datetime64[D]")
+    return RateFrame(RateSeries(f"C{i:02d}", dates, np.linspace(1, 2, points) + i) for i in range(series))
+
+@pytest.mark.anyio
+async def test_small_requests_stay_fast_during_large_export(monkeypatch):
+    frame = _large_frame()
+
+    async def load_rate_frame(data_type, start_date, end_date, currencies):
+        return frame
+
+    monkeypatch.setattr(main, "_load_rate_frame", load_rate_frame)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        async def export():
+            response = await client.get(
+                f"{main.settings.API_V1_STR}/export/xml",
+                params={"data_type": "currency", "start_date": "2024-01-01", "end_date": date.today().isoformat(), "currencies": "usd"},
+                headers={"Accept-Encoding": "gzip"},
+            )
+            return response, time.perf_counter()
+
+        export_task = asyncio.create_task(export())
+        await asyncio.sleep(0.2) # Let serialization get going on the worker pool
+
+        latencies = []
+        for _ in range(SMALL_REQUESTS):
+            started = time.perf_counter()
+            response = await client.get(f"{main.settings.API_V1_STR}/currencies")
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        small_done = time.perf_counter()
+
+        response, export_done = await export_task
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.content) > 1_000_000
+    # The small requests were answered while the export was still being produced
+    assert small_done < export_done
+    assert max(latencies) < MAX_SMALL_LATENCY, f"slowest small request took {max(latencies):.3f}s"
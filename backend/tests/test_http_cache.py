@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+import numpy as np
+from fastapi import Request
+from app.services import http_cache
+from app.services.rate_series import RateFrame, RateSeries
+
+ETAG = '"0123456789abcdef"'
+LAST_MODIFIED = datetime(2024, 3, 28, 11, 15, tzinfo=timezone.utc)
+
+def request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    later = "Fri, 29 Mar 2024 00:00:00 GMT"
+    assert not http_cache.is_not_modified(request(If_None_Match='"other"', If_Modified_Since=later), ETAG, LAST_MODIFIED)
+    assert http_cache.is_not_modified(request(If_None_Match=ETAG, If_Modified_Since="Mon, 01 Jan 2024 00:00:00 GMT"), ETAG, LAST_MODIFIED)
+
+def test_if_none_match_ignores_weakness_and_content_coding():
+    for header in (ETAG, f"W/{ETAG}", http_cache.encoded_etag(ETAG, "gzip"), f'"other", {http_cache.encoded_etag(ETAG, "br")}', "*"):
+        assert http_cache.is_not_modified(request(If_None_Match=header), ETAG, LAST_MODIFIED), header
+
+def test_if_modified_since():
+    assert http_cache.is_not_modified(request(If_Modified_Since="Thu, 28 Mar 2024 11:15:00 GMT"), ETAG, LAST_MODIFIED)
+    assert not http_cache.is_not_modified(request(If_Modified_Since="Thu, 28 Mar 2024 11:14:59 GMT"), ETAG, LAST_MODIFIED)
+    assert not http_cache.is_not_modified(request(If_Modified_Since="not a date"), ETAG, LAST_MODIFIED)
+    assert not http_cache.is_not_modified(request(If_Modified_Since="Thu, 28 Mar 2024 11:15:00 GMT"), ETAG, None)
+    assert not http_cache.is_not_modified(request(), ETAG, LAST_MODIFIED)
+
+def test_stored_headers_round_trip():
+    headers = http_cache.validator_headers(http_cache.encoded_etag(ETAG, "zstd"), LAST_MODIFIED, "public, max-age=60")
+
+    assert http_cache.is_not_modified_stored(request(If_None_Match=ETAG), headers)
+    assert http_cache.is_not_modified_stored(request(If_Modified_Since=headers["Last-Modified"]), headers)
+
+def test_frame_etag_depends_on_data_and_parameters():
+    dates = np.array(["2024-03-27", "2024-03-28"], dtype="datetime64[D]")
+    frame = RateFrame([RateSeries("USD", dates, np.array([4.0, 4.1]))])
+    changed = RateFrame([RateSeries("USD", dates, np.array([4.0, 4.2]))])
+
+    assert http_cache.frame_etag(frame, "csv") == http_cache.frame_etag(frame, "csv")
+    assert http_cache.frame_etag(frame, "csv") != http_cache.frame_etag(frame, "json")
+    assert http_cache.frame_etag(frame, "csv") != http_cache.frame_etag(changed, "csv")
@@ -0,0 +1,33 @@
+import io
+from datetime import date
+import yaml
+from app.services import import_service
+
+YAML = b"""
+Data:
+  - {Date: 2024-01-02, Rate: 4.01, Currency: usd}
+  - {Date: 2024-01-03, Rate: 0, Value: 4.02, Currency: eur}
+  - {Date: 2024-01-04, Rate: null, Value: "4.03", Currency: chf}
+  - {Date: "2024-01-05", Rate: "0", Currency: gbp}
+  - {Date: null, Rate: 4.05, Currency: usd}
+  - {Date: 2024-01-08, Rate: 0, Currency: usd}
+  - {Date: 2024-01-09, Rate: '4.09', Currency: 'nok', Extra: {nested: [1, 2]}}
+"""
+
+def test_yaml_scalars_match_safe_load():
+    mappings = list(import_service._iter_yaml_mappings(io.BytesIO(YAML)))
+    expected = yaml.safe_load(YAML)["Data"]
+
+    assert mappings == [{k: v for k, v in r.items() if k != "Extra"} for r in expected]
+    assert mappings[0]["Date"] == date(2024, 1, 2) and mappings[3]["Date"] == "2024-01-05"
+    assert mappings[1]["Rate"] == 0 and mappings[2]["Rate"] is None and mappings[3]["Rate"] == "0"
+
+def test_yaml_records_skip_zero_and_missing_values():
+    records = import_service.parse_yaml(io.BytesIO(YAML))
+
+    assert [(str(r["Date"]), r["Value"], r["Currency"]) for r in records] == [
+        ("2024-01-02", 4.01, "USD"),
+        ("2024-01-03", 4.02, "EUR"),
+        ("2024-01-04", 4.03, "CHF"),
+        ("2024-01-09", 4.09, "NOK"),
+    ]
@@ -0,0 +1,87 @@
+import threading
+from datetime import date, datetime
+import httpx
+import pytest
+from app.services import http_client, nbp_api
+from app.services.nbp_cache import NBP_TIMEZONE, ResponseCache
+from app.services.rate_series import GOLD_SERIES
+
+START, END = date(2024, 3, 4), date(2024, 3, 8)
+CODES = ["USD", "EUR", "CHF", "GBP"]
+
+def nbp_handler(request: httpx.Request) -> httpx.Response:
+    path = request.url.path
+    if "/cenyzlota/" in path:
+        return httpx.Response(200, json=[{"data": "2024-03-04", "cena": 260.5}])
+    if "/exchangerates/tables/" in path:
+        return httpx.Response(200, json=[{"effectiveDate": "2024-03-04", "rates": [{"code": c, "mid": 4.0} for c in CODES]}])
+    code = path.split("/rates/a/")[1].split("/")[0].upper()
+    return httpx.Response(200, json={"code": code, "rates": [{"effectiveDate": "2024-03-04", "mid": 4.0}]})
+
+class RecordingCache:
+    """Shared cache stand-in that misses every lookup and records the thread of each store."""
+
+    def __init__(self):
+        self.stores = []
+
+    def lookup(self, code, start_date, end_date):
+        return None
+
+    def store(self, code, start_date, end_date, series):
+        self.stores.append((code, threading.get_ident()))
+
+@pytest.fixture
+def nbp_mock(monkeypatch):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(nbp_handler), base_url="http://nbp.test")
+    cache = RecordingCache()
+    monkeypatch.setattr(http_client, "get_async_client", lambda: client)
+    monkeypatch.setattr(nbp_api, "response_cache", ResponseCache(1 << 20))
+    monkeypatch.setattr(nbp_api, "shared_cache", cache)
+    return cache
+
+@pytest.mark.anyio
+async def test_shared_cache_store_runs_off_the_event_loop(nbp_mock):
+    ranges = [(code, START, END) for code in CODES] + [("JPY", START, date(2024, 3, 7)), (GOLD_SERIES, START, END)]
+    results = await nbp_api.fetch_ranges_async(ranges)
+
+    assert all(len(series) == 1 for series in results)
+    loop_thread = threading.get_ident()
+    # Table mode (CODES), a single currency (JPY) and gold all stored, none of them on the loop
+    assert sorted(code for code, _ in nbp_mock.stores) == sorted(CODES + ["JPY", GOLD_SERIES])
+    assert all(thread != loop_thread for _, thread in nbp_mock.stores)
+
+@pytest.fixture
+def as_of_mock(monkeypatch):
+    """Fixed clock (Tuesday 2024-04-02, before publication) and a table for every date in published."""
+    requested, published = [], set()
+
+    def fetch_nbp_data(url, raise_on_error=False, range_end=None):
+        requested.append(range_end)
+        if range_end in published:
+            return {"code": "USD", "rates": [{"effectiveDate": range_end.isoformat(), "mid": 4.0}]}
+        return None
+
+    monkeypatch.setattr(nbp_api, "nbp_now", lambda: datetime(2024, 4, 2, 9, 0, tzinfo=NBP_TIMEZONE))
+    monkeypatch.setattr(nbp_api, "fetch_nbp_data", fetch_nbp_data)
+    return requested, published
+
+def test_rate_as_of_today_uses_the_latest_published_table(as_of_mock):
+    requested, published = as_of_mock
+    published.add(date(2024, 3, 29)) # Friday before Easter Monday (2024-04-01)
+
+    for on_date in (date(2024, 4, 2), date(2024, 4, 20)):
+        assert nbp_api.get_rate_as_of("usd", on_date)["effectiveDate"] == "2024-03-29"
+    assert requested == [date(2024, 3, 29)] * 2
+
+def test_rate_as_of_steps_back_over_a_missing_table(as_of_mock):
+    requested, published = as_of_mock
+    published.add(date(2024, 3, 27))
+
+    assert nbp_api.get_rate_as_of("USD", date(2024, 3, 30))["effectiveDate"] == "2024-03-27"
+    assert requested == [date(2024, 3, 29), date(2024, 3, 28), date(2024, 3, 27)]
+
+def test_rate_as_of_gives_up_after_a_bounded_number_of_tables(as_of_mock):
+    requested, _ = as_of_mock
+
+    assert nbp_api.get_rate_as_of("XXX", date(2024, 3, 15)) is None
+    assert len(requested) == nbp_api.AS_OF_MAX_TABLES
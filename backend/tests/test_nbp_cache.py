@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+import pytest
+from app.services import nbp_cache
+from app.services.nbp_cache import NBP_TIMEZONE, ResponseCache
+
+def warsaw(*args) -> datetime:
+    return datetime(*args, tzinfo=NBP_TIMEZONE)
+
+@pytest.fixture(autouse=True)
+def publication_time(monkeypatch):
+    monkeypatch.setattr(nbp_cache.settings, "NBP_PUBLICATION_TIME", "12:15")
+    monkeypatch.setattr(nbp_cache.settings, "NBP_CACHE_PENDING_TTL", 60)
+
+@pytest.mark.parametrize("now, publication", [
+    (warsaw(2024, 3, 28, 9, 0), warsaw(2024, 3, 28, 12, 15)), # Thursday morning: today's table
+    (warsaw(2024, 3, 28, 13, 0), warsaw(2024, 3, 29, 12, 15)), # Thursday afternoon: Friday's
+    (warsaw(2024, 3, 29, 13, 0), warsaw(2024, 4, 2, 12, 15)), # Over the weekend and Easter Monday
+])
+def test_next_publication_time(now, publication):
+    assert nbp_cache.next_publication_time(now) == publication
+
+def test_latest_table_date():
+    assert nbp_cache.latest_table_date(warsaw(2024, 4, 2, 12, 0)) == date(2024, 3, 29)
+    assert nbp_cache.latest_table_date(warsaw(2024, 4, 2, 12, 15)) == date(2024, 4, 2)
+    assert nbp_cache.latest_table_date(warsaw(2024, 4, 6, 18, 0)) == date(2024, 4, 5)
+
+def test_expiry_for_final_and_current_ranges():
+    now = warsaw(2024, 3, 28, 9, 0)
+    assert nbp_cache.expiry_for(date(2024, 3, 27), now) is None
+    assert nbp_cache.expiry_for(date(2024, 3, 28), now) == warsaw(2024, 3, 28, 12, 15)
+
+def test_response_expiry_retries_soon_while_the_latest_table_is_overdue():
+    now = warsaw(2024, 3, 28, 12, 30) # Thursday's table is due
+    assert nbp_cache.response_expiry(date(2024, 3, 28), date(2024, 3, 27), now) == now + timedelta(seconds=60)
+    assert nbp_cache.response_expiry(date(2024, 3, 28), None, now) == now + timedelta(seconds=60)
+    assert nbp_cache.response_expiry(date(2024, 3, 28), date(2024, 3, 28), now) == warsaw(2024, 3, 29, 12, 15)
+    # Before publication nothing is overdue: the range is valid until the table comes out
+    assert nbp_cache.response_expiry(date(2024, 3, 28), date(2024, 3, 27), warsaw(2024, 3, 28, 9, 0)) == warsaw(2024, 3, 28, 12, 15)
+    assert nbp_cache.response_expiry(date(2024, 3, 20), date(2024, 3, 20), now) is None
+
+def test_response_cache_expires_and_evicts(monkeypatch):
+    clock = [warsaw(2024, 3, 28, 9, 0)]
+    monkeypatch.setattr(nbp_cache, "nbp_now", lambda: clock[0])
+    cache = ResponseCache(max_bytes=2000)
+
+    cache.put("final", [{"mid": 4.0}], None)
+    cache.put("current", [{"mid": 4.1}], warsaw(2024, 3, 28, 12, 15))
+    assert cache.get("current") == (True, [{"mid": 4.1}])
+    clock[0] = warsaw(2024, 3, 28, 12, 15)
+    assert cache.get("current") == (False, None)
+    assert cache.get("final") == (True, [{"mid": 4.0}])
+
+    for i in range(20): # Least recently used entries go first once max_bytes is exceeded
+        cache.put(f"chunk-{i}", [{"mid": float(i)}], None)
+    stats = cache.stats()
+    assert stats["bytes"] <= 2000 and stats["evictions"] > 0 and stats["expirations"] == 1
+    assert cache.get("chunk-19")[0] and not cache.get("final")[0]
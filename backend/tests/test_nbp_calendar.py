@@ -0,0 +1,54 @@
+from datetime import date
+import numpy as np
+import pytest
+from app.services import nbp_calendar
+
+@pytest.mark.parametrize("year, easter", [(2019, date(2019, 4, 21)), (2024, date(2024, 3, 31)), (2025, date(2025, 4, 20)), (2038, date(2038, 4, 25))])
+def test_easter_sunday(year, easter):
+    assert nbp_calendar.easter_sunday(year) == easter
+
+@pytest.mark.parametrize("day", [
+    date(2024, 1, 1), # New Year's Day
+    date(2024, 1, 6), # Epiphany (a Saturday, holiday since 2011)
+    date(2024, 4, 1), # Easter Monday
+    date(2024, 5, 1), date(2024, 5, 3),
+    date(2024, 5, 30), # Corpus Christi
+    date(2024, 8, 15), date(2024, 11, 1), date(2024, 11, 11), date(2024, 12, 25), date(2024, 12, 26),
+    date(2025, 12, 24), # Christmas Eve, holiday since 2025
+    date(2018, 11, 12), # One-off holiday (NBP_EXTRA_HOLIDAYS)
+])
+def test_holidays_have_no_table(day):
+    assert not nbp_calendar.is_business_day(day)
+
+@pytest.mark.parametrize("day", [date(2010, 1, 6), date(2024, 12, 24), date(2024, 4, 2), date(2018, 11, 13)])
+def test_former_and_neighbouring_days_have_a_table(day):
+    assert nbp_calendar.is_business_day(day)
+
+@pytest.mark.parametrize("day, number", [
+    (date(2024, 1, 2), "001/A/NBP/2024"),
+    (date(2024, 1, 5), "004/A/NBP/2024"),
+    (date(2024, 12, 31), "252/A/NBP/2024"),
+    (date(2025, 12, 31), "251/A/NBP/2025"),
+])
+def test_table_number(day, number):
+    assert nbp_calendar.table_number(day) == number
+
+def test_table_number_of_a_day_without_table():
+    with pytest.raises(ValueError):
+        nbp_calendar.table_number(date(2024, 4, 1))
+
+def test_navigation_skips_weekends_and_holidays():
+    assert nbp_calendar.business_day_on_or_before(date(2024, 4, 1)) == date(2024, 3, 29)
+    assert nbp_calendar.business_day_on_or_after(date(2024, 3, 30)) == date(2024, 4, 2)
+    assert nbp_calendar.previous_business_day(date(2024, 4, 2)) == date(2024, 3, 29)
+    assert nbp_calendar.next_business_day(date(2024, 12, 24)) == date(2024, 12, 27)
+    assert nbp_calendar.business_day_on_or_before(date(2024, 3, 28)) == date(2024, 3, 28)
+    assert nbp_calendar.trim(date(2024, 3, 30), date(2024, 4, 1)) is None
+    assert nbp_calendar.trim(date(2024, 3, 30), date(2024, 4, 7)) == (date(2024, 4, 2), date(2024, 4, 5))
+
+def test_missing_business_days_ignore_weekends_and_holidays():
+    present = [date(2024, 3, 28), date(2024, 4, 2), date(2024, 4, 4)]
+    missing = nbp_calendar.missing_business_days(present, date(2024, 3, 28), date(2024, 4, 7))
+
+    assert list(missing) == [np.datetime64("2024-03-29"), np.datetime64("2024-04-03"), np.datetime64("2024-04-05")]
+    assert nbp_calendar.count_business_days(date(2024, 3, 28), date(2024, 4, 7)) == 6
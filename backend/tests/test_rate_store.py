@@ -0,0 +1,63 @@
+import logging
+from datetime import date, datetime
+import numpy as np
+import pytest
+from app import crud
+from app.services import nbp_calendar, rate_store
+from app.services.nbp_cache import NBP_TIMEZONE
+from app.services.rate_series import RateSeries
+
+def test_find_missing_ranges():
+    covered = [(date(2024, 1, 1), date(2024, 1, 10)), (date(2024, 1, 15), date(2024, 1, 20))]
+
+    assert rate_store.find_missing_ranges(covered, date(2024, 1, 5), date(2024, 1, 25)) == [
+        (date(2024, 1, 11), date(2024, 1, 14)), (date(2024, 1, 21), date(2024, 1, 25)),
+    ]
+    assert rate_store.find_missing_ranges(covered, date(2024, 1, 2), date(2024, 1, 9)) == []
+    assert rate_store.find_missing_ranges([], date(2024, 1, 2), date(2024, 1, 9)) == [(date(2024, 1, 2), date(2024, 1, 9))]
+
+@pytest.fixture
+def store(monkeypatch):
+    """Rate store against in-memory coverage, at a clock set through the returned dict."""
+    state = {"now": None, "coverage": []}
+    monkeypatch.setattr(rate_store, "nbp_now", lambda: state["now"])
+    monkeypatch.setattr(crud, "get_coverage", lambda db, series, s, e: [r for r in state["coverage"] if r[0] <= e and r[1] >= s])
+    monkeypatch.setattr(crud, "add_coverage", lambda db, series, s, e: state["coverage"].append((s, e)))
+    monkeypatch.setattr(crud, "upsert_exchange_rates", lambda db, series, data: None)
+    return state
+
+def series_on(days):
+    dates = np.array(days, dtype="datetime64[D]")
+    return RateSeries("USD", dates, np.full(len(dates), 4.0))
+
+def test_plan_gaps_stops_at_today(store):
+    store["now"] = datetime(2024, 3, 28, 9, 0, tzinfo=NBP_TIMEZONE)
+    store["coverage"] = [(date(2024, 3, 1), date(2024, 3, 20))]
+
+    assert rate_store._plan_gaps(None, "USD", date(2024, 3, 10), date(2024, 4, 30)) == [(date(2024, 3, 21), date(2024, 3, 28))]
+    assert rate_store._plan_gaps(None, "USD", date(2024, 4, 1), date(2024, 4, 30)) == []
+
+def test_gap_ending_on_a_holiday_is_final_once_its_last_table_is_in(store):
+    store["now"] = datetime(2024, 4, 1, 10, 0, tzinfo=NBP_TIMEZONE) # Easter Monday
+    rate_store._store_gap(None, "USD", date(2024, 3, 25), date(2024, 4, 1), series_on(nbp_calendar.business_days(date(2024, 3, 25), date(2024, 3, 29))))
+
+    assert store["coverage"] == [(date(2024, 3, 25), date(2024, 4, 1))]
+
+def test_gap_ending_today_before_publication_is_final_through_yesterday(store):
+    store["now"] = datetime(2024, 4, 2, 10, 0, tzinfo=NBP_TIMEZONE)
+    rate_store._store_gap(None, "USD", date(2024, 3, 25), date(2024, 4, 2), series_on(nbp_calendar.business_days(date(2024, 3, 25), date(2024, 3, 29))))
+
+    assert store["coverage"] == [(date(2024, 3, 25), date(2024, 4, 1))]
+
+def test_only_missing_business_days_are_reported(store, caplog):
+    store["now"] = datetime(2024, 4, 10, 10, 0, tzinfo=NBP_TIMEZONE)
+    days = [d for d in nbp_calendar.business_days(date(2024, 3, 25), date(2024, 4, 5)) if d != np.datetime64("2024-03-27")]
+
+    with caplog.at_level(logging.WARNING, logger=rate_store.__name__):
+        rate_store._store_gap(None, "USD", date(2024, 3, 25), date(2024, 4, 5), series_on(days))
+    assert "1 business day(s)" in caplog.text and "2024-03-27" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger=rate_store.__name__):
+        rate_store._store_gap(None, "USD", date(2024, 3, 25), date(2024, 4, 5), series_on(nbp_calendar.business_days(date(2024, 3, 25), date(2024, 4, 5))))
+    assert not caplog.text # Weekends and Easter Monday are not gaps
@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from app.services import nbp_calendar, shared_cache
+from app.services.rate_series import RateSeries
+from app.services.shared_cache import SharedRateCache
+
+pytestmark = pytest.mark.skipif(shared_cache.fcntl is None, reason="the shared cache needs fcntl")
+
+def business_series(code: str, start_date: date, end_date: date, offset: float = 0.0) -> RateSeries:
+    """A point per business day, valued by its days since January 1."""
+    dates = nbp_calendar.business_days(start_date, end_date)
+    days = (dates - dates.astype("datetime64[Y]")).astype(int)
+    return RateSeries(code, dates, days + offset)
+
+def store_week(directory: str, week: int) -> None:
+    start = date(2023, 1, 2) + timedelta(weeks=week)
+    end = start + timedelta(days=6)
+    SharedRateCache(directory).store("USD", start, end, business_series("USD", start, end))
+
+def test_store_and_lookup_round_trip(tmp_path):
+    cache = SharedRateCache(str(tmp_path))
+    series = business_series("usd", date(2024, 3, 1), date(2024, 4, 30))
+    cache.store("usd", date(2024, 3, 1), date(2024, 4, 30), series)
+
+    hit = cache.lookup("USD", date(2024, 3, 25), date(2024, 4, 7)) # Easter Monday (04-01) has no table
+    expected = series.slice(date(2024, 3, 25), date(2024, 4, 7))
+    assert hit.code == "USD"
+    assert np.array_equal(hit.dates, expected.dates) and np.array_equal(hit.values, expected.values)
+    assert cache.lookup("USD", date(2024, 4, 27), date(2024, 4, 28)) is None # A weekend: nothing to serve
+    assert cache.lookup("USD", date(2024, 2, 28), date(2024, 3, 5)) is None
+    assert len(cache.lookup("USD", date(2024, 4, 27), date(2024, 5, 1))) == 2 # Weekend and holiday edges hold no tables
+    assert cache.lookup("USD", date(2024, 4, 29), date(2024, 5, 2)) is None
+    assert cache.lookup("EUR", date(2024, 3, 4), date(2024, 3, 8)) is None
+
+def test_merge_joins_ranges_across_weekends_and_new_values_win(tmp_path):
+    cache = SharedRateCache(str(tmp_path))
+    cache.store("EUR", date(2024, 1, 8), date(2024, 1, 12), business_series("EUR", date(2024, 1, 8), date(2024, 1, 12)))
+    cache.store("EUR", date(2024, 1, 15), date(2024, 1, 19), business_series("EUR", date(2024, 1, 15), date(2024, 1, 19)))
+    cache.store("EUR", date(2024, 1, 17), date(2024, 1, 24), business_series("EUR", date(2024, 1, 17), date(2024, 1, 24), offset=0.5))
+
+    merged = cache.lookup("EUR", date(2024, 1, 6), date(2024, 1, 24))
+    assert len(merged) == 13
+    assert list(merged.values) == [7, 8, 9, 10, 11, 14, 15, 16.5, 17.5, 18.5, 21.5, 22.5, 23.5]
+
+def test_store_skips_writes_that_add_nothing(tmp_path):
+    cache = SharedRateCache(str(tmp_path))
+    cache.store("CHF", date(2024, 3, 4), date(2024, 3, 8), business_series("CHF", date(2024, 3, 4), date(2024, 3, 8)))
+    before = os.stat(tmp_path / "CHF.bin")
+
+    # The weekend after, and a covered sub-range, add no records and no coverage
+    cache.store("CHF", date(2024, 3, 4), date(2024, 3, 10), business_series("CHF", date(2024, 3, 4), date(2024, 3, 10)))
+    cache.store("CHF", date(2024, 3, 5), date(2024, 3, 6), business_series("CHF", date(2024, 3, 5), date(2024, 3, 6)))
+    after = os.stat(tmp_path / "CHF.bin")
+
+    assert cache.writes == 1
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
+def test_invalid_codes_never_become_paths(tmp_path):
+    cache = SharedRateCache(str(tmp_path / "cache"))
+    cache.store("../x", date(2024, 3, 4), date(2024, 3, 8), business_series("X", date(2024, 3, 4), date(2024, 3, 8)))
+
+    assert cache.lookup("../x", date(2024, 3, 4), date(2024, 3, 8)) is None
+    assert os.listdir(tmp_path) == ["cache"] and not os.listdir(tmp_path / "cache")
+
+def test_concurrent_writers_keep_every_range(tmp_path):
+    weeks = 8
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=store_week, args=(str(tmp_path), week)) for week in range(weeks)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+    start, end = date(2023, 1, 2), date(2023, 1, 2) + timedelta(weeks=weeks, days=-1)
+    stored = SharedRateCache(str(tmp_path)).lookup("USD", start, end)
+    expected = business_series("USD", start, end)
+    assert np.array_equal(stored.dates, expected.dates) and np.array_equal(stored.values, expected.values)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]